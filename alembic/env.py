@@ -9,7 +9,17 @@ from alembic import context
 
 from app.config import settings
 from app.db.base import Base
-from app.models import Conversation, Message, ScheduledTask, TaskExecution, User  # noqa: F401
+from app.models import (  # noqa: F401
+    Conversation,
+    Message,
+    ScheduledTask,
+    TaskExecution,
+    TaskExecutionPayload,
+    TaskQueueItem,
+    ToolCacheEntry,
+    UsageEvent,
+    User,
+)
 
 config = context.config
 config.set_main_option("sqlalchemy.url", settings.DATABASE_URL)
@@ -20,11 +30,17 @@ if config.config_file_name is not None:
 target_metadata = Base.metadata
 
 
+def include_name(name, type_, parent_names) -> bool:
+    # Monthly partitions of task_execution_payloads are managed by app.scheduler.execution_log
+    return not (type_ == "table" and name.startswith("task_execution_payloads_"))
+
+
 def run_migrations_offline() -> None:
     url = config.get_main_option("sqlalchemy.url")
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_name=include_name,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -34,7 +50,7 @@ def run_migrations_offline() -> None:
 
 
 def do_run_migrations(connection: Connection) -> None:
-    context.configure(connection=connection, target_metadata=target_metadata)
+    context.configure(connection=connection, target_metadata=target_metadata, include_name=include_name)
 
     with context.begin_transaction():
         context.run_migrations()
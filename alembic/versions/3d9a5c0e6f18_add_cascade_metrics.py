@@ -0,0 +1,30 @@
+"""add_cascade_metrics
+
+Revision ID: 3d9a5c0e6f18
+Revises: e7f2b3a81c04
+Create Date: 2026-10-18 11:47:09.630418
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3d9a5c0e6f18'
+down_revision: Union[str, Sequence[str], None] = 'e7f2b3a81c04'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('messages', sa.Column('ttft_ms', sa.Integer(), nullable=True))
+    op.add_column('usage_events', sa.Column('cost_usd', sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('usage_events', 'cost_usd')
+    op.drop_column('messages', 'ttft_ms')
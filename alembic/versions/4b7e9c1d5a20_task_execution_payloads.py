@@ -0,0 +1,100 @@
+"""task_execution_payloads
+
+Revision ID: 4b7e9c1d5a20
+Revises: c5b8e03f7a21
+Create Date: 2026-10-19 15:02:17.309544
+
+"""
+import json
+import uuid
+import zlib
+from datetime import date, datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b7e9c1d5a20'
+down_revision: Union[str, Sequence[str], None] = 'c5b8e03f7a21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH = 500
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('task_execution_payloads',
+    sa.Column('execution_id', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('llm_messages', sa.LargeBinary(), nullable=False),
+    sa.Column('raw_bytes', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['execution_id'], ['task_executions.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('execution_id', 'created_at'),
+    postgresql_partition_by='RANGE (created_at)',
+    )
+
+    # Monthly partitions (UTC) from the oldest logged execution to two months ahead
+    bind = op.get_bind()
+    oldest = bind.scalar(sa.text('SELECT min(created_at) FROM task_executions WHERE llm_messages IS NOT NULL'))
+    now = datetime.now(timezone.utc)
+    oldest = (oldest or now).astimezone(timezone.utc)
+    month = date(oldest.year, oldest.month, 1)
+    last = _add_months(date(now.year, now.month, 1), 2)
+    while month <= last:
+        op.execute(
+            f"CREATE TABLE task_execution_payloads_{month:%Y_%m} PARTITION OF task_execution_payloads "
+            f"FOR VALUES FROM ('{month} 00:00+00') TO ('{_add_months(month, 1)} 00:00+00')"
+        )
+        month = _add_months(month, 1)
+
+    # Move existing logs, compressed, in batches by id
+    select = sa.text(
+        'SELECT id, created_at, llm_messages::text FROM task_executions '
+        'WHERE llm_messages IS NOT NULL AND id > :after ORDER BY id LIMIT :limit'
+    )
+    insert = sa.text(
+        'INSERT INTO task_execution_payloads (execution_id, created_at, llm_messages, raw_bytes) '
+        'VALUES (:execution_id, :created_at, :llm_messages, :raw_bytes)'
+    )
+    after = uuid.UUID(int=0)
+    while batch := bind.execute(select, {'after': after, 'limit': BATCH}).all():
+        params = []
+        for execution_id, created_at, messages in batch:
+            raw = json.dumps(json.loads(messages), ensure_ascii=False, separators=(',', ':')).encode()
+            params.append({
+                'execution_id': execution_id,
+                'created_at': created_at,
+                'llm_messages': zlib.compress(raw, 6),
+                'raw_bytes': len(raw),
+            })
+        bind.execute(insert, params)
+        after = batch[-1][0]
+
+    op.drop_column('task_executions', 'llm_messages')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column('task_executions', sa.Column('llm_messages', postgresql.JSONB(), nullable=True))
+    bind = op.get_bind()
+    select = sa.text(
+        'SELECT execution_id, llm_messages FROM task_execution_payloads '
+        'WHERE execution_id > :after ORDER BY execution_id LIMIT :limit'
+    )
+    update = sa.text('UPDATE task_executions SET llm_messages = CAST(:llm_messages AS jsonb) WHERE id = :id')
+    after = uuid.UUID(int=0)
+    while batch := bind.execute(select, {'after': after, 'limit': BATCH}).all():
+        bind.execute(update, [
+            {'id': execution_id, 'llm_messages': zlib.decompress(data).decode()} for execution_id, data in batch
+        ])
+        after = batch[-1][0]
+    op.drop_table('task_execution_payloads')
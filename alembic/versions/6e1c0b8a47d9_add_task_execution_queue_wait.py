@@ -0,0 +1,28 @@
+"""add_task_execution_queue_wait
+
+Revision ID: 6e1c0b8a47d9
+Revises: d2a7f5e91c30
+Create Date: 2026-10-19 12:18:03.661527
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6e1c0b8a47d9'
+down_revision: Union[str, Sequence[str], None] = 'd2a7f5e91c30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('task_executions', sa.Column('queue_wait_ms', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('task_executions', 'queue_wait_ms')
@@ -0,0 +1,37 @@
+"""add_task_execution_shared_work
+
+Revision ID: 8f3d6a2c9b15
+Revises: 6e1c0b8a47d9
+Create Date: 2026-10-19 13:02:45.190374
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f3d6a2c9b15'
+down_revision: Union[str, Sequence[str], None] = '6e1c0b8a47d9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('task_executions', sa.Column('work_key', sa.String(length=64), nullable=True))
+    op.add_column('task_executions', sa.Column('shared_from_id', sa.UUID(), nullable=True))
+    op.create_index(op.f('ix_task_executions_work_key'), 'task_executions', ['work_key'], unique=False)
+    op.create_foreign_key(
+        'task_executions_shared_from_id_fkey', 'task_executions', 'task_executions',
+        ['shared_from_id'], ['id'], ondelete='SET NULL',
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('task_executions_shared_from_id_fkey', 'task_executions', type_='foreignkey')
+    op.drop_index(op.f('ix_task_executions_work_key'), table_name='task_executions')
+    op.drop_column('task_executions', 'shared_from_id')
+    op.drop_column('task_executions', 'work_key')
@@ -0,0 +1,31 @@
+"""task_executions_history_index
+
+Revision ID: 9c2f4e7a1b83
+Revises: 4b7e9c1d5a20
+Create Date: 2026-10-19 15:48:05.726113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c2f4e7a1b83'
+down_revision: Union[str, Sequence[str], None] = '4b7e9c1d5a20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_task_executions_task_id_created_at', 'task_executions',
+        ['task_id', sa.text('created_at DESC'), sa.text('id DESC')], unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_task_executions_task_id_created_at', table_name='task_executions')
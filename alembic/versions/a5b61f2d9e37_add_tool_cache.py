@@ -0,0 +1,37 @@
+"""add_tool_cache
+
+Revision ID: a5b61f2d9e37
+Revises: 3d9a5c0e6f18
+Create Date: 2026-10-18 13:20:44.905127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a5b61f2d9e37'
+down_revision: Union[str, Sequence[str], None] = '3d9a5c0e6f18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('tool_cache',
+    sa.Column('key', sa.String(length=64), nullable=False),
+    sa.Column('tool_name', sa.String(length=100), nullable=False),
+    sa.Column('result', sa.Text(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+    op.create_index(op.f('ix_tool_cache_expires_at'), 'tool_cache', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_tool_cache_expires_at'), table_name='tool_cache')
+    op.drop_table('tool_cache')
@@ -0,0 +1,50 @@
+"""add_usage_events
+
+Revision ID: c41e7a9d2b65
+Revises: 8a8ed330400f
+Create Date: 2026-10-18 10:12:31.482913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41e7a9d2b65'
+down_revision: Union[str, Sequence[str], None] = '8a8ed330400f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('usage_events',
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('conversation_id', sa.UUID(), nullable=True),
+    sa.Column('task_id', sa.UUID(), nullable=True),
+    sa.Column('execution_id', sa.UUID(), nullable=True),
+    sa.Column('kind', sa.String(length=20), nullable=False),
+    sa.Column('model', sa.String(length=100), nullable=False),
+    sa.Column('prompt_tokens', sa.Integer(), nullable=False),
+    sa.Column('completion_tokens', sa.Integer(), nullable=False),
+    sa.Column('cache_read_tokens', sa.Integer(), nullable=False),
+    sa.Column('cache_write_tokens', sa.Integer(), nullable=False),
+    sa.Column('total_tokens', sa.Integer(), nullable=False),
+    sa.Column('latency_ms', sa.Integer(), nullable=True),
+    sa.Column('ttft_ms', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['conversation_id'], ['conversations.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['task_id'], ['scheduled_tasks.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_usage_events_user_id_created_at', 'usage_events', ['user_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_usage_events_user_id_created_at', table_name='usage_events')
+    op.drop_table('usage_events')
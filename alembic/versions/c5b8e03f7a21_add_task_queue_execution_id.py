@@ -0,0 +1,33 @@
+"""add_task_queue_execution_id
+
+Revision ID: c5b8e03f7a21
+Revises: 8f3d6a2c9b15
+Create Date: 2026-10-19 14:11:38.502961
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5b8e03f7a21'
+down_revision: Union[str, Sequence[str], None] = '8f3d6a2c9b15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('task_queue', sa.Column('execution_id', sa.UUID(), nullable=True))
+    op.create_foreign_key(
+        'task_queue_execution_id_fkey', 'task_queue', 'task_executions',
+        ['execution_id'], ['id'], ondelete='CASCADE',
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('task_queue_execution_id_fkey', 'task_queue', type_='foreignkey')
+    op.drop_column('task_queue', 'execution_id')
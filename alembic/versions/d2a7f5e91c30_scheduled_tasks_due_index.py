@@ -0,0 +1,33 @@
+"""scheduled_tasks_due_index
+
+Revision ID: d2a7f5e91c30
+Revises: b9e4d7c2a318
+Create Date: 2026-10-19 11:06:52.274810
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2a7f5e91c30'
+down_revision: Union[str, Sequence[str], None] = 'b9e4d7c2a318'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_scheduled_tasks_due', 'scheduled_tasks', ['next_run_at'], unique=False,
+        postgresql_where=sa.text('is_active'),
+    )
+    # Jobs now live in scheduled_tasks.next_run_at; APScheduler's jobstore is no longer used
+    op.execute('DROP TABLE IF EXISTS apscheduler_jobs')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_scheduled_tasks_due', table_name='scheduled_tasks', postgresql_where=sa.text('is_active'))
@@ -0,0 +1,48 @@
+"""add_message_token_counts
+
+Revision ID: e7f2b3a81c04
+Revises: c41e7a9d2b65
+Create Date: 2026-10-18 11:03:52.117205
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7f2b3a81c04'
+down_revision: Union[str, Sequence[str], None] = 'c41e7a9d2b65'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('messages', sa.Column('token_count', sa.Integer(), nullable=True))
+    op.add_column('conversations', sa.Column('token_total', sa.Integer(), server_default='0', nullable=False))
+
+    # Backfill with estimate_message_tokens from app.core.tokens: characters from U+2E80 up (CJK)
+    # count as one token each, the rest as one per 4 characters, plus 4 tokens of message overhead.
+    op.execute(r"""
+        UPDATE messages SET token_count = s.wide + ceil((s.chars - s.wide) / 4.0)::int + 4
+        FROM (
+            SELECT id,
+                   char_length(coalesce(content, '')) AS chars,
+                   char_length(regexp_replace(coalesce(content, ''), '[^\u2E80-\U0010FFFF]', '', 'g')) AS wide
+            FROM messages
+        ) s
+        WHERE s.id = messages.id
+    """)
+    op.execute("""
+        UPDATE conversations c SET token_total = s.total
+        FROM (SELECT conversation_id, sum(token_count) AS total FROM messages GROUP BY conversation_id) s
+        WHERE s.conversation_id = c.id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('conversations', 'token_total')
+    op.drop_column('messages', 'token_count')
@@ -0,0 +1,28 @@
+"""add_task_execution_input_fingerprint
+
+Revision ID: f3c8d21a6b47
+Revises: a5b61f2d9e37
+Create Date: 2026-10-19 00:25:13.418302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3c8d21a6b47'
+down_revision: Union[str, Sequence[str], None] = 'a5b61f2d9e37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('task_executions', sa.Column('input_fingerprint', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('task_executions', 'input_fingerprint')
@@ -0,0 +1,39 @@
+from datetime import datetime, timedelta, timezone
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.db.session import get_db
+from app.scheduler.engine import scheduler_engine
+from app.scheduler.execution_log import storage_stats
+from app.scheduler.leader import scheduler_leader
+from app.scheduler.shared_work import sharing_stats
+
+router = APIRouter(prefix="/api/scheduler", tags=["scheduler"])
+
+
+@router.get("/leader")
+async def scheduler_leader_status():
+    """Which replica currently fires scheduled triggers, how long it has led and its last heartbeat.
+
+    On the leader, `reconcile` has the counts and timing of its startup pass over scheduled_tasks.
+    """
+    if not settings.SCHEDULER_ENABLED:
+        return {"enabled": False}
+    return {"enabled": True, **await scheduler_leader.status(), "reconcile": scheduler_engine.last_reconcile}
+
+
+@router.get("/sharing")
+async def scheduler_sharing(hours: float = 24, db: AsyncSession = Depends(get_db)):
+    """Share of task executions that reused identical work from another task, and the tokens saved."""
+    return await sharing_stats(db, datetime.now(timezone.utc) - timedelta(hours=hours))
+
+
+@router.get("/storage")
+async def scheduler_storage(db: AsyncSession = Depends(get_db)):
+    """Size of task execution message logs before and after compression, and of the tables holding them.
+
+    On the leader, `maintenance` has the partitions dropped and executions pruned by the last retention pass.
+    """
+    return {**await storage_stats(db), "maintenance": scheduler_engine.last_maintenance}
@@ -1,19 +1,33 @@
+import base64
+import json
 import uuid
+from datetime import datetime
 
 import structlog
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import load_only, selectinload
 
 from app.api.deps import get_current_user_id
 from app.core.tools import tool_manager
-from app.db.session import get_db
+from app.db.session import async_session, get_db
 from app.models.scheduled_task import ScheduledTask
 from app.models.task_execution import TaskExecution
 from app.scheduler.engine import scheduler_engine
+from app.scheduler.execution_log import load_messages
 from app.scheduler.nl_parser import parse_task_description
-from app.schemas.task import TaskCreate, TaskExecutionOut, TaskOut, TaskUpdate
+from app.scheduler.queue import enqueue_statement
+from app.scheduler.task_events import subscribe
+from app.schemas.task import (
+    TaskCreate,
+    TaskExecutionDetailOut,
+    TaskExecutionOut,
+    TaskExecutionPage,
+    TaskOut,
+    TaskUpdate,
+)
 
 router = APIRouter(prefix="/api/tasks", tags=["tasks"])
 logger = structlog.get_logger()
@@ -33,6 +47,7 @@ async def create_task(
     # If no cron provided, use LLM to parse from description
     if not cron_expression:
         available_tools = None
+        await tool_manager.ensure_connected()
         if tool_manager.has_tools:
             available_tools = [t["function"]["name"] for t in tool_manager.get_tools_schema()]
 
@@ -81,11 +96,8 @@ async def create_task(
     await db.flush()
 
     # Register with scheduler
-    scheduler_engine.add_task(task.id, cron_expression, req.timezone)
-    next_run = scheduler_engine.get_next_run_time(task.id)
-    if next_run:
-        task.next_run_at = next_run
-        await db.flush()
+    await scheduler_engine.reschedule(db, task)
+    await db.flush()
 
     await db.refresh(task)
     logger.info("api.task_created", task_id=str(task.id), name=name, cron=cron_expression)
@@ -136,10 +148,6 @@ async def update_task(
         task.task_config = req.task_config
     if req.is_active is not None:
         task.is_active = req.is_active
-        if req.is_active:
-            scheduler_engine.add_task(task.id, task.cron_expression, task.timezone)
-        else:
-            scheduler_engine.remove_task(task.id)
 
     if req.cron_expression is not None:
         # Validate
@@ -149,12 +157,9 @@ async def update_task(
         except (ValueError, KeyError) as e:
             raise HTTPException(status_code=422, detail=f"Invalid cron expression: {e}")
         task.cron_expression = req.cron_expression
-        if task.is_active:
-            scheduler_engine.update_task(task.id, req.cron_expression, task.timezone)
 
     # Update next_run_at
-    next_run = scheduler_engine.get_next_run_time(task.id)
-    task.next_run_at = next_run
+    await scheduler_engine.reschedule(db, task)
 
     await db.flush()
     await db.refresh(task)
@@ -169,53 +174,140 @@ async def delete_task(
 ):
     """Delete a scheduled task."""
     task = await _get_user_task(db, task_id, user_id)
-    scheduler_engine.remove_task(task.id)
     await db.delete(task)
 
 
-@router.post("/{task_id}/run", response_model=TaskExecutionOut)
+@router.post("/{task_id}/run", response_model=TaskExecutionOut, status_code=202)
 async def trigger_task(
     task_id: uuid.UUID,
     db: AsyncSession = Depends(get_db),
     user_id: uuid.UUID = Depends(get_current_user_id),
 ):
-    """Manually trigger a task execution."""
+    """Manually trigger a task execution.
+
+    The run is queued for a worker; this returns its pending execution at once. Follow it with
+    GET /{task_id}/executions/{execution_id}/events.
+    """
     task = await _get_user_task(db, task_id, user_id)
 
-    # Run task directly (not through scheduler)
-    from app.scheduler.task_runner import run_task
-    await run_task(str(task.id))
+    execution = TaskExecution(task_id=task.id, status="pending")
+    db.add(execution)
+    await db.flush()
+    await db.execute(enqueue_statement(task.id, execution_id=execution.id))
+    await db.refresh(execution)
+    logger.info("api.task_triggered", task_id=str(task.id), execution_id=str(execution.id))
+    return execution
 
-    # Fetch the latest execution
-    result = await db.execute(
-        select(TaskExecution)
-        .where(TaskExecution.task_id == task.id)
-        .order_by(TaskExecution.created_at.desc())
-        .limit(1)
+
+@router.get("/{task_id}/executions/{execution_id}/events")
+async def execution_events(
+    task_id: uuid.UUID,
+    execution_id: uuid.UUID,
+    db: AsyncSession = Depends(get_db),
+    user_id: uuid.UUID = Depends(get_current_user_id),
+):
+    """Stream a running execution's LLM deltas and tool calls as SSE, ending with a `done` event.
+
+    A failed attempt that the queue will retry sends `retrying`, and the stream follows the next attempt.
+    """
+    await _get_user_task(db, task_id, user_id)  # Authorization check
+    execution = await db.get(TaskExecution, execution_id)
+    if not execution or execution.task_id != task_id:
+        raise HTTPException(status_code=404, detail="Execution not found")
+
+    async def generate():
+        async for event, data in subscribe(execution_id):
+            if event in ("listening", "keepalive"):
+                # Finished before we subscribed, or its `done` event was lost: report it and stop
+                async with async_session() as check:
+                    current = await check.get(TaskExecution, execution_id)
+                if current.finished_at and current.status not in ("pending", "running"):
+                    yield _sse_event("done", {
+                        "status": current.status,
+                        "result": current.result,
+                        "error": current.error,
+                        "token_usage": current.token_usage,
+                    })
+                    return
+                if event == "listening":
+                    yield _sse_event("status", {"status": current.status})
+                else:
+                    yield ": keepalive\n\n"  # SSE comment, keeps proxies from closing an idle stream
+                continue
+            yield _sse_event(event, data)
+
+    return StreamingResponse(
+        generate(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no",
+        },
     )
-    execution = result.scalar_one_or_none()
-    if not execution:
-        raise HTTPException(status_code=500, detail="Task execution not recorded")
-    return execution
 
 
-@router.get("/{task_id}/executions", response_model=list[TaskExecutionOut])
+@router.get("/{task_id}/executions", response_model=TaskExecutionPage)
 async def list_executions(
     task_id: uuid.UUID,
-    limit: int = 20,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = None,
     db: AsyncSession = Depends(get_db),
     user_id: uuid.UUID = Depends(get_current_user_id),
 ):
-    """List execution history for a task."""
+    """List execution history for a task, newest first.
+
+    Only the columns of TaskExecutionOut are loaded; GET /{task_id}/executions/{execution_id} has the logs.
+    """
     await _get_user_task(db, task_id, user_id)  # Authorization check
 
-    result = await db.execute(
+    query = (
         select(TaskExecution)
+        .options(load_only(*(getattr(TaskExecution, name) for name in TaskExecutionOut.model_fields)))
         .where(TaskExecution.task_id == task_id)
-        .order_by(TaskExecution.created_at.desc())
-        .limit(limit)
+        .order_by(TaskExecution.created_at.desc(), TaskExecution.id.desc())
+        .limit(limit + 1)
     )
-    return result.scalars().all()
+    if cursor:
+        query = query.where(tuple_(TaskExecution.created_at, TaskExecution.id) < _decode_cursor(cursor))
+    executions = (await db.execute(query)).scalars().all()
+
+    next_cursor = _encode_cursor(executions[limit - 1]) if len(executions) > limit else None
+    return TaskExecutionPage(items=executions[:limit], next_cursor=next_cursor)
+
+
+@router.get("/{task_id}/executions/{execution_id}", response_model=TaskExecutionDetailOut)
+async def get_execution(
+    task_id: uuid.UUID,
+    execution_id: uuid.UUID,
+    db: AsyncSession = Depends(get_db),
+    user_id: uuid.UUID = Depends(get_current_user_id),
+):
+    """One execution with its tool calls and LLM message log."""
+    await _get_user_task(db, task_id, user_id)  # Authorization check
+    execution = await db.get(TaskExecution, execution_id)
+    if not execution or execution.task_id != task_id:
+        raise HTTPException(status_code=404, detail="Execution not found")
+
+    detail = TaskExecutionDetailOut.model_validate(execution)
+    detail.llm_messages = await load_messages(db, execution.id)
+    return detail
+
+
+def _encode_cursor(execution: TaskExecution) -> str:
+    return base64.urlsafe_b64encode(f"{execution.created_at.isoformat()}|{execution.id}".encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    try:
+        created_at, execution_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), uuid.UUID(execution_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
 
 async def _get_user_task(db: AsyncSession, task_id: uuid.UUID, user_id: uuid.UUID) -> ScheduledTask:
@@ -0,0 +1,24 @@
+from fastapi import APIRouter
+
+from app.core.tool_cache import tool_cache
+from app.core.tool_guard import tool_guard
+from app.core.tools import tool_manager
+
+router = APIRouter(prefix="/api/tools", tags=["tools"])
+
+
+@router.get("/status")
+async def tool_status():
+    """Circuit breaker state per tool, MCP replica metrics and result cache counters."""
+    return {
+        "schema_version": tool_manager.schema.version,
+        "breakers": tool_guard.status(),
+        "servers": tool_manager.stats(),
+        "cache": tool_cache.stats(),
+    }
+
+
+@router.post("/reload")
+async def reload_tools():
+    """Re-read mcp_servers.json and apply added, removed and changed servers."""
+    return await tool_manager.reload()
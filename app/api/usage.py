@@ -0,0 +1,39 @@
+import uuid
+from datetime import datetime
+from typing import Literal
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_current_user_id
+from app.config import settings
+from app.core.usage import summarize_conversations, summarize_usage
+from app.db.session import get_db
+from app.schemas.usage import ConversationUsageOut, UsageSummaryOut
+
+router = APIRouter(prefix="/api/usage", tags=["usage"])
+
+
+@router.get("/summary", response_model=list[UsageSummaryOut])
+async def usage_summary(
+    group_by: Literal["user", "model", "conversation", "task"] = "model",
+    since: datetime | None = None,
+    until: datetime | None = None,
+    db: AsyncSession = Depends(get_db),
+    user_id: uuid.UUID = Depends(get_current_user_id),
+):
+    """Aggregate token usage and latency from the usage ledger."""
+    return await summarize_usage(db, user_id, group_by, since=since, until=until)
+
+
+@router.get("/conversations", response_model=list[ConversationUsageOut])
+async def conversation_usage(
+    since: datetime | None = None,
+    until: datetime | None = None,
+    db: AsyncSession = Depends(get_db),
+    user_id: uuid.UUID = Depends(get_current_user_id),
+):
+    """Per-conversation average TTFT, fast-model (cascade) turns and spend."""
+    return await summarize_conversations(
+        db, user_id, settings.CASCADE_FAST_MODEL, since=since, until=until
+    )
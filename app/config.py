@@ -10,6 +10,13 @@ class Settings(BaseSettings):
     DEFAULT_MODEL: str = "claude-sonnet"
     APP_ENV: str = "development"
 
+    # Cascade: try CASCADE_FAST_MODEL first on simple chat turns, escalate when needed
+    CASCADE_ENABLED: bool = False
+    CASCADE_FAST_MODEL: str = "claude-haiku"
+
+    # Prompt token budget for conversation history (approximate, see app.core.tokens)
+    CONTEXT_TOKEN_BUDGET: int = 150000
+
     # Phase 1: hardcoded default user
     DEFAULT_USER_ID: str = "00000000-0000-0000-0000-000000000001"
 
@@ -19,9 +26,47 @@ class Settings(BaseSettings):
 
     # Phase 2: MCP Tools
     MCP_SERVERS_CONFIG: str = "mcp_servers.json"
+    MCP_CONFIG_WATCH_INTERVAL: float = 5.0  # Seconds between mtime checks for hot reload; 0 disables
+    MCP_CONNECT_TIMEOUT: float = 30.0  # Per server, overridable with "connect_timeout"
+    MCP_HEALTH_CHECK_INTERVAL: float = 30.0  # 0 disables ping/auto-restart
+    MCP_RESTART_MAX_BACKOFF: float = 300.0
+    MCP_REPLICA_MAX_INFLIGHT: int = 4  # Concurrent calls per replica, overridable with "max_inflight"
+    # Defaults for tool_options.<tool>.timeout/max_concurrency/breaker_threshold/breaker_reset
+    MCP_TOOL_TIMEOUT: float = 60.0
+    MCP_TOOL_MAX_CONCURRENCY: int = 16
+    MCP_BREAKER_THRESHOLD: int = 5
+    MCP_BREAKER_RESET: float = 30.0
+    TOOL_SELECTION_TOP_K: int = 8  # MCP tools sent per turn when more are registered; 0 sends all
+    TOOL_EMBEDDING_MODEL: str = "sentence-transformers/all-MiniLM-L6-v2"
+    # Tool result caps, overridable per tool with tool_options.<tool>.max_result_bytes/max_result_tokens/summarize
+    TOOL_RESULT_MAX_BYTES: int = 200_000
+    TOOL_RESULT_MAX_TOKENS: int = 4000
+    TOOL_RESULT_SUMMARIZE: bool = False
+    TOOL_SUMMARY_MODEL: str = "claude-haiku"
+    TOOL_RESULT_DIGEST_TOKENS: int = 300  # Results from earlier tool rounds; 0 keeps them whole
+    # Tool result cache (per-tool opt-in via tool_options.<tool>.cache_ttl in MCP_SERVERS_CONFIG)
+    TOOL_CACHE_MAX_ENTRIES: int = 1000
+    TOOL_CACHE_MAX_BYTES: int = 20 * 1024 * 1024
+    TOOL_CACHE_PERSIST: bool = False  # Share results across replicas via the tool_cache table
 
     # Phase 3: Scheduler
     SCHEDULER_ENABLED: bool = True
+    SCHEDULER_LEADER_INTERVAL: float = 5.0  # Leader heartbeat and follower retry period; bounds failover time
+    SCHEDULER_MAX_SLEEP: float = 60.0  # Trigger loop re-checks at least this often, even without NOTIFY
+    # Seconds to spread each run over, overridable with task_config.jitter_seconds
+    SCHEDULER_DEFAULT_JITTER: float = 0.0
+    SCHEDULER_CATCHUP_RATE: float = 1.0  # Late runs (e.g. missed during downtime) released per second; 0 releases all
+    TASK_QUEUE_WORKERS: int = 2  # Task runs this process executes concurrently; 0 only enqueues
+    TASK_QUEUE_LEASE_SECONDS: float = 300.0  # Renewed while a run is in progress
+    TASK_QUEUE_MAX_RUNNING: int = 0  # Concurrent runs across all workers and replicas; 0 is unlimited
+    TASK_QUEUE_MAX_ATTEMPTS: int = 3
+    TASK_SHARE_WINDOW: float = 300.0  # Reuse identical task work finished this recently; 0 disables
+    TASK_QUEUE_RETRY_BASE: float = 60.0
+    TASK_QUEUE_RETRY_MAX: float = 3600.0
+    TASK_QUEUE_POLL_INTERVAL: float = 2.0
+    TASK_QUEUE_RETENTION_DAYS: int = 7
+    TASK_EXECUTION_RETENTION_DAYS: int = 90  # Overridable with task_config.retention_days; 0 keeps executions
+    TASK_MESSAGES_RETENTION_DAYS: int = 30  # LLM message logs, dropped a monthly partition at a time; 0 keeps them
 
     # Phase 4: Feishu
     FEISHU_ENABLED: bool = False
@@ -31,5 +76,10 @@ class Settings(BaseSettings):
     FEISHU_ENCRYPT_KEY: str = ""
     FEISHU_WEBHOOK_URL: str = ""  # Default group webhook
 
+    # Benchmarking: record/replay LLM and tool traffic
+    CASSETTE_MODE: str = "off"  # off / record / replay
+    CASSETTE_PATH: str = "cassettes/default.jsonl.gz"
+    CASSETTE_REPLAY_TIMING: bool = False  # Replay with the recorded latencies
+
 
 settings = Settings()
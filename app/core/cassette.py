@@ -0,0 +1,94 @@
+"""
+Record/replay cassettes for LLM and MCP tool traffic.
+
+CASSETTE_MODE=record appends every LLM call and MCP tool call (request, response and,
+for streams, per-chunk timings) to CASSETTE_PATH as gzipped JSON lines.
+CASSETTE_MODE=replay serves them back without touching LiteLLM or the MCP servers,
+so recorded conversations and scheduled tasks can be re-run offline.
+
+Interactions are matched by a hash of the canonical request; identical requests are
+served in recording order. Run with MEM0_ENABLED=false in both modes so prompts
+don't depend on memory search results.
+"""
+
+import gzip
+import hashlib
+import json
+from collections import defaultdict, deque
+from pathlib import Path
+
+import structlog
+
+from app.config import settings
+
+logger = structlog.get_logger()
+
+
+class CassetteMiss(LookupError):
+    """Raised in replay mode when no recorded interaction matches a request."""
+
+
+def _dumps(data) -> str:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"), sort_keys=True, default=str)
+
+
+def request_key(kind: str, request: dict) -> str:
+    return hashlib.sha256(f"{kind}:{_dumps(request)}".encode()).hexdigest()[:32]
+
+
+def load_interactions(path: str | Path) -> list[dict]:
+    """Read all interactions from a cassette file, in recording order."""
+    interactions = []
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                interactions.append(json.loads(line))
+    return interactions
+
+
+class Cassette:
+    def __init__(self, mode: str = "off", path: str = "", replay_timing: bool = False):
+        self.mode = mode
+        self.path = Path(path) if path else None
+        self.replay_timing = replay_timing
+        self._recorded: dict[str, deque[dict]] | None = None
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == "record"
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    def record(self, kind: str, request: dict, response: dict | None = None,
+               chunks: list | None = None, latency_ms: int | None = None):
+        """Append one interaction. chunks is a list of [offset_ms, item] for streams."""
+        entry = {"kind": kind, "key": request_key(kind, request), "request": request, "latency_ms": latency_ms}
+        if response is not None:
+            entry["response"] = response
+        if chunks is not None:
+            entry["chunks"] = chunks
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Appending opens a new gzip member; readers see one continuous stream
+        with gzip.open(self.path, "at", encoding="utf-8") as f:
+            f.write(_dumps(entry) + "\n")
+
+    def lookup(self, kind: str, request: dict) -> dict:
+        """Return the next recorded interaction for this request."""
+        if self._recorded is None:
+            self._recorded = defaultdict(deque)
+            for entry in load_interactions(self.path):
+                self._recorded[entry["key"]].append(entry)
+            logger.info("cassette.loaded", path=str(self.path), keys=len(self._recorded))
+
+        key = request_key(kind, request)
+        queue = self._recorded.get(key)
+        if not queue:
+            raise CassetteMiss(f"No recorded {kind} interaction for request {key}")
+        # Keep the last one around so repeated identical calls keep replaying
+        return queue.popleft() if len(queue) > 1 else queue[0]
+
+
+cassette = Cassette(settings.CASSETTE_MODE, settings.CASSETTE_PATH, settings.CASSETTE_REPLAY_TIMING)
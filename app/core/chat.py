@@ -1,18 +1,24 @@
 import asyncio
 import json
+import time
 import uuid
 from collections.abc import AsyncIterator
 
 import structlog
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 
 from app.config import settings
-from app.core.llm import LLMResponse, ToolCall, llm_client
+from app.core.llm import LLMResponse, StreamUsage, ToolCall, llm_client, merge_usage
 from app.core.memory import memory_manager
 from app.core.internal_tools import execute_internal_tool, is_internal_tool
+from app.core.tokens import estimate_message_tokens
+from app.core.tool_output import compact_tool_result, digest_tool_results
+from app.core.tool_selector import tool_selector
 from app.core.tools import tool_manager
+from app.core.usage import record_usage
 from app.models.conversation import Conversation
 from app.models.message import Message
 
@@ -29,6 +35,23 @@ MEMORY_PROMPT_TEMPLATE = (
 
 MAX_TOOL_ROUNDS = 10
 
+# Cascade mode: simple turns go to CASCADE_FAST_MODEL first, which may hand the turn back by
+# replying ESCALATE_TOKEN; the turn is then re-run on the full model
+ESCALATE_TOKEN = "ESCALATE"
+CASCADE_INSTRUCTION = (
+    "If answering well requires tools, web search, up-to-date information, scheduling, "
+    f"or careful multi-step reasoning, reply with exactly {ESCALATE_TOKEN} and nothing else."
+)
+CASCADE_MAX_CHARS = 200
+# Cheap classifier: any of these means the turn likely needs tools or the stronger model
+CASCADE_COMPLEX_MARKERS = (
+    "```", "http://", "https://",
+    "search", "latest", "news", "today", "schedule", "remind", "every ", "analy", "explain",
+    "compare", "write", "code", "debug", "plan", "step by step", "feishu",
+    "搜索", "查一下", "最新", "新闻", "今天", "定时", "每天", "每周", "提醒", "任务",
+    "分析", "解释", "比较", "写", "代码", "计划", "飞书",
+)
+
 # C3 fix: prevent GC of fire-and-forget tasks
 _background_tasks: set[asyncio.Task] = set()
 
@@ -75,6 +98,40 @@ async def _retrieve_memories(user_id: str, message: str) -> list[str]:
     return [m["memory"] for m in memories if m.get("memory")]
 
 
+def _select_history(conversation: Conversation, budget: int) -> list[Message]:
+    """Return the most recent messages that fit in `budget` tokens, oldest first.
+
+    Uses the stored per-message counts, so the common case (whole history fits)
+    is a single comparison against conversation.token_total.
+    """
+    # S7 fix: ensure messages are in chronological order
+    sorted_msgs = sorted(conversation.messages, key=lambda m: m.created_at)
+    if (conversation.token_total or 0) <= budget:
+        return sorted_msgs
+
+    kept: list[Message] = []
+    used = 0
+    for msg in reversed(sorted_msgs):
+        cost = msg.token_count if msg.token_count is not None else estimate_message_tokens(msg.content)
+        if used + cost > budget:
+            break
+        kept.append(msg)
+        used += cost
+    kept.reverse()
+
+    # History must not open with an orphaned assistant reply
+    while kept and kept[0].role != "user":
+        kept.pop(0)
+
+    logger.info(
+        "chat.history_trimmed",
+        conversation_id=str(conversation.id),
+        kept=len(kept),
+        dropped=len(sorted_msgs) - len(kept),
+    )
+    return kept
+
+
 def build_messages(
     conversation: Conversation, new_message: str, memories: list[str] | None = None
 ) -> list[dict]:
@@ -85,21 +142,51 @@ def build_messages(
             base_prompt=SYSTEM_PROMPT, memories=memory_text
         )
 
-    # S7 fix: ensure messages are in chronological order
+    budget = (
+        settings.CONTEXT_TOKEN_BUDGET
+        - estimate_message_tokens(system_content)
+        - estimate_message_tokens(new_message)
+    )
+
     messages = [{"role": "system", "content": system_content}]
-    sorted_msgs = sorted(conversation.messages, key=lambda m: m.created_at)
-    for msg in sorted_msgs:
+    for msg in _select_history(conversation, budget):
         messages.append({"role": msg.role, "content": msg.content})
     messages.append({"role": "user", "content": new_message})
     return messages
 
 
+async def _add_message(
+    db: AsyncSession, conversation: Conversation, role: str, content: str, **fields
+) -> Message:
+    """Add a message, counting its tokens once and keeping the conversation total current.
+
+    The total is incremented in SQL, so concurrent turns on one conversation don't lose counts.
+    """
+    msg = Message(
+        conversation_id=conversation.id,
+        role=role,
+        content=content,
+        token_count=estimate_message_tokens(content),
+        **fields,
+    )
+    db.add(msg)
+    total = await db.scalar(
+        update(Conversation)
+        .where(Conversation.id == conversation.id)
+        .values(token_total=Conversation.token_total + msg.token_count)
+        .returning(Conversation.token_total)
+    )
+    set_committed_value(conversation, "token_total", total)
+    return msg
+
+
 async def _execute_tool_calls(
     tool_calls: list[ToolCall],
     user_id: uuid.UUID | None = None,
     db: AsyncSession | None = None,
+    conversation: Conversation | None = None,
 ) -> list[dict]:
-    """Execute tool calls and return tool result messages for the LLM."""
+    """Execute tool calls and return compacted tool result messages for the LLM."""
     results = []
     for tc in tool_calls:
         try:
@@ -112,6 +199,15 @@ async def _execute_tool_calls(
         else:
             result_text = await tool_manager.execute_tool(tc.name, arguments)
 
+        result_text, summary = await compact_tool_result(
+            tc.name, result_text, tool_manager.get_tool_options(tc.name)
+        )
+        if summary and db and conversation:
+            _record_llm_call(
+                db, user_id, conversation, "tool_summary", summary.usage, summary.latency_ms,
+                model=settings.TOOL_SUMMARY_MODEL,
+            )
+
         results.append({
             "role": "tool",
             "tool_call_id": tc.id,
@@ -143,42 +239,115 @@ async def _set_title(db: AsyncSession, conversation: Conversation, first_message
     await db.flush()
 
 
-def _get_tools() -> list[dict] | None:
-    """Get all tool schemas (MCP + internal) if any are available, else None."""
-    if tool_manager.has_any_tools:
-        return tool_manager.get_all_tools_schema()
-    return None
-
-
-async def chat(
+def _record_llm_call(
     db: AsyncSession,
     user_id: uuid.UUID,
-    message: str,
-    conversation_id: uuid.UUID | None = None,
+    conversation: Conversation,
+    kind: str,
+    usage: dict,
+    latency_ms: int | None,
+    ttft_ms: int | None = None,
     model: str | None = None,
-) -> tuple[Conversation, Message]:
-    """Non-streaming chat with tool execution loop."""
-    conversation = await get_or_create_conversation(db, user_id, conversation_id, model)
+):
+    """Add a usage ledger row for one LLM call of a chat turn."""
+    record_usage(
+        db,
+        user_id=user_id,
+        model=model or conversation.model,
+        kind=kind,
+        usage=usage,
+        latency_ms=latency_ms,
+        ttft_ms=ttft_ms,
+        conversation_id=conversation.id,
+    )
 
-    # Retrieve relevant memories
-    memories = await _retrieve_memories(str(user_id), message)
-    messages = build_messages(conversation, message, memories=memories)
 
-    # Save user message
-    user_msg = Message(
-        conversation_id=conversation.id,
-        role="user",
-        content=message,
+async def _get_tools(message: str) -> list[dict] | None:
+    """Get the MCP tools relevant to this message plus all internal tools, or None if there are none."""
+    await tool_manager.ensure_connected()
+    if not tool_manager.has_any_tools:
+        return None
+    return await tool_selector.select(
+        message, tool_manager.get_tools_schema(), tool_manager.get_internal_tools_schema()
+    )
+
+
+def _is_simple_turn(message: str) -> bool:
+    """Cheap classifier for turns the fast model can answer on its own."""
+    if len(message) > CASCADE_MAX_CHARS or message.count("\n") > 2:
+        return False
+    lowered = message.lower()
+    return not any(marker in lowered for marker in CASCADE_COMPLEX_MARKERS)
+
+
+def _use_cascade(conversation: Conversation, message: str) -> bool:
+    return (
+        settings.CASCADE_ENABLED
+        and conversation.model != settings.CASCADE_FAST_MODEL
+        and _is_simple_turn(message)
     )
-    db.add(user_msg)
-    await db.flush()
 
-    if not conversation.title:
-        await _set_title(db, conversation, message)
 
-    # Tool execution loop
-    tools = _get_tools()
+def _cascade_messages(messages: list[dict]) -> list[dict]:
+    """Copy of the prompt with the escalation instruction added to the system message."""
+    system = {**messages[0], "content": f"{messages[0]['content']}\n\n{CASCADE_INSTRUCTION}"}
+    return [system, *messages[1:]]
+
+
+class _EscalationGate:
+    """Holds back the fast model's first characters until it's clear whether it is escalating."""
+
+    def __init__(self):
+        self.buffer = ""
+        self.decided = False
+        self.escalated = False
+
+    def feed(self, text: str) -> str:
+        """Return the text that is safe to emit so far."""
+        if self.decided:
+            return "" if self.escalated else text
+        self.buffer += text
+        head = self.buffer.lstrip()
+        if len(head) < len(ESCALATE_TOKEN) and ESCALATE_TOKEN.startswith(head):
+            return ""
+        self.decided = True
+        self.escalated = head.startswith(ESCALATE_TOKEN)
+        return "" if self.escalated else self.buffer
+
+    def finish(self) -> str:
+        """Decide on whatever is still buffered when the fast model stops."""
+        if self.decided:
+            return ""
+        self.decided = True
+        head = self.buffer.strip()
+        self.escalated = not head or ESCALATE_TOKEN.startswith(head)
+        return "" if self.escalated else self.buffer
+
+
+async def _cascade_complete(
+    db: AsyncSession, user_id: uuid.UUID, conversation: Conversation, messages: list[dict]
+) -> LLMResponse | None:
+    """Answer with the fast model, or return None if the turn should escalate."""
+    fast_model = settings.CASCADE_FAST_MODEL
+    response = await llm_client.complete(_cascade_messages(messages), fast_model, tools=None)
+    _record_llm_call(
+        db, user_id, conversation, "cascade", response.usage, response.latency_ms, model=fast_model
+    )
+    gate = _EscalationGate()
+    gate.feed(response.content)
+    gate.finish()
+    logger.info("chat.cascade", model=fast_model, escalated=gate.escalated)
+    return None if gate.escalated else response
+
+
+async def _complete_with_tools(
+    db: AsyncSession, user_id: uuid.UUID, conversation: Conversation, messages: list[dict], message: str
+) -> tuple[LLMResponse, dict]:
+    """Run the tool execution loop with the conversation's model. Returns (final response, turn usage)."""
+    tools = await _get_tools(message)
     response: LLMResponse = await llm_client.complete(messages, conversation.model, tools=tools)
+    _record_llm_call(db, user_id, conversation, "chat", response.usage, response.latency_ms)
+    turn_usage = response.usage
 
     for _ in range(MAX_TOOL_ROUNDS):
         if not response.has_tool_calls:
@@ -199,26 +368,66 @@ async def chat(
         })
 
         # Execute tools and append results
-        tool_results = await _execute_tool_calls(response.tool_calls, user_id, db)
+        tool_results = await _execute_tool_calls(response.tool_calls, user_id, db, conversation)
+        digest_tool_results(messages)
         messages.extend(tool_results)
 
         # Next LLM call
         response = await llm_client.complete(messages, conversation.model, tools=tools)
+        _record_llm_call(db, user_id, conversation, "chat", response.usage, response.latency_ms)
+        turn_usage = merge_usage(turn_usage, response.usage)
     else:
         # I6 fix: if loop exhausted and still has tool calls, do one final call without tools
         if response.has_tool_calls:
             logger.warning("chat.max_tool_rounds_exhausted", rounds=MAX_TOOL_ROUNDS)
             response = await llm_client.complete(messages, conversation.model, tools=None)
+            _record_llm_call(db, user_id, conversation, "chat", response.usage, response.latency_ms)
+            turn_usage = merge_usage(turn_usage, response.usage)
+
+    return response, turn_usage
+
+
+async def chat(
+    db: AsyncSession,
+    user_id: uuid.UUID,
+    message: str,
+    conversation_id: uuid.UUID | None = None,
+    model: str | None = None,
+) -> tuple[Conversation, Message]:
+    """Non-streaming chat with tool execution loop."""
+    conversation = await get_or_create_conversation(db, user_id, conversation_id, model)
+
+    # Retrieve relevant memories
+    memories = await _retrieve_memories(str(user_id), message)
+    messages = build_messages(conversation, message, memories=memories)
+
+    # Save user message
+    await _add_message(db, conversation, "user", message)
+    await db.flush()
+
+    if not conversation.title:
+        await _set_title(db, conversation, message)
+
+    # Cascade: let the fast model try simple turns first
+    response = None
+    answered_by = conversation.model
+    if _use_cascade(conversation, message):
+        response = await _cascade_complete(db, user_id, conversation, messages)
+    if response is not None:
+        answered_by = settings.CASCADE_FAST_MODEL
+        turn_usage = response.usage
+    else:
+        response, turn_usage = await _complete_with_tools(db, user_id, conversation, messages, message)
 
     # Save assistant message
-    assistant_msg = Message(
-        conversation_id=conversation.id,
-        role="assistant",
-        content=response.content,
-        model=conversation.model,
-        token_usage=response.usage.get("total_tokens"),
+    assistant_msg = await _add_message(
+        db,
+        conversation,
+        "assistant",
+        response.content,
+        model=answered_by,
+        token_usage=turn_usage.get("total_tokens"),
     )
-    db.add(assistant_msg)
     await db.flush()
 
     _fire_and_forget(_store_memory(str(user_id), message, response.content))
@@ -234,6 +443,7 @@ async def chat_stream(
     model: str | None = None,
 ) -> AsyncIterator[str]:
     """Streaming chat with tool execution loop. Yields SSE events."""
+    turn_start = time.perf_counter()
     conversation = await get_or_create_conversation(db, user_id, conversation_id, model)
 
     # Retrieve relevant memories
@@ -241,39 +451,86 @@ async def chat_stream(
     messages = build_messages(conversation, message, memories=memories)
 
     # Save user message
-    user_msg = Message(
-        conversation_id=conversation.id,
-        role="user",
-        content=message,
-    )
-    db.add(user_msg)
+    await _add_message(db, conversation, "user", message)
     await db.flush()
 
     if not conversation.title:
         await _set_title(db, conversation, message)
 
-    # Stream metadata
-    yield _sse_event("metadata", {
-        "conversation_id": str(conversation.id),
-        "model": conversation.model,
-    })
+    def metadata(answering_model: str) -> str:
+        return _sse_event("metadata", {"conversation_id": str(conversation.id), "model": answering_model})
 
-    tools = _get_tools()
+    tools = await _get_tools(message)
     full_content = ""
+    turn_usage: dict = {}
+    answered_by = conversation.model
+    ttft_ms = None
+    cascade = _use_cascade(conversation, message)
+    # With the cascade, metadata waits until it's known which model answers
+    announced = not cascade
+    if announced:
+        yield metadata(conversation.model)
 
     try:
+        # Cascade: let the fast model try simple turns first
+        escalate = True
+        if cascade:
+            fast_model = settings.CASCADE_FAST_MODEL
+            gate = _EscalationGate()
+            async for item in llm_client.stream(_cascade_messages(messages), fast_model, tools=None):
+                if isinstance(item, str):
+                    text = gate.feed(item)
+                    if text:
+                        if not announced:
+                            announced = True
+                            yield metadata(fast_model)
+                        if ttft_ms is None:
+                            ttft_ms = int((time.perf_counter() - turn_start) * 1000)
+                        full_content += text
+                        yield _sse_event("message", {"content": text})
+                elif isinstance(item, StreamUsage):
+                    _record_llm_call(
+                        db, user_id, conversation, "cascade", item.usage, item.latency_ms, item.ttft_ms,
+                        model=fast_model,
+                    )
+                    turn_usage = merge_usage(turn_usage, item.usage)
+            text = gate.finish()
+            if text:
+                if not announced:
+                    announced = True
+                    yield metadata(fast_model)
+                if ttft_ms is None:
+                    ttft_ms = int((time.perf_counter() - turn_start) * 1000)
+                full_content += text
+                yield _sse_event("message", {"content": text})
+            escalate = gate.escalated
+            if not escalate:
+                answered_by = fast_model
+            logger.info("chat_stream.cascade", model=fast_model, escalated=escalate)
+            if not announced:
+                announced = True
+                yield metadata(conversation.model)
+
         exhausted = False
-        for _ in range(MAX_TOOL_ROUNDS):
+        # Zero rounds when the fast model already answered
+        for _ in range(MAX_TOOL_ROUNDS if escalate else 0):
             tool_calls_in_round: list[ToolCall] = []
             round_content = ""
 
             async for item in llm_client.stream(messages, conversation.model, tools=tools):
                 if isinstance(item, str):
+                    if ttft_ms is None:
+                        ttft_ms = int((time.perf_counter() - turn_start) * 1000)
                     round_content += item
                     full_content += item
                     yield _sse_event("message", {"content": item})
                 elif isinstance(item, ToolCall):
                     tool_calls_in_round.append(item)
+                elif isinstance(item, StreamUsage):
+                    _record_llm_call(
+                        db, user_id, conversation, "chat_stream", item.usage, item.latency_ms, item.ttft_ms
+                    )
+                    turn_usage = merge_usage(turn_usage, item.usage)
 
             if not tool_calls_in_round:
                 break  # No tool calls, final response
@@ -301,7 +558,8 @@ async def chat_stream(
             })
 
             # Execute tools
-            tool_results = await _execute_tool_calls(tool_calls_in_round, user_id, db)
+            tool_results = await _execute_tool_calls(tool_calls_in_round, user_id, db, conversation)
+            digest_tool_results(messages)
             messages.extend(tool_results)
 
             # Emit tool result events
@@ -311,29 +569,40 @@ async def chat_stream(
                     "result": result["content"],
                 })
         else:
-            exhausted = True
+            exhausted = escalate
 
         # I6 fix: if loop exhausted, do final non-tool call for text response
         if exhausted:
             logger.warning("chat_stream.max_tool_rounds_exhausted", rounds=MAX_TOOL_ROUNDS)
             async for item in llm_client.stream(messages, conversation.model, tools=None):
                 if isinstance(item, str):
+                    if ttft_ms is None:
+                        ttft_ms = int((time.perf_counter() - turn_start) * 1000)
                     full_content += item
                     yield _sse_event("message", {"content": item})
+                elif isinstance(item, StreamUsage):
+                    _record_llm_call(
+                        db, user_id, conversation, "chat_stream", item.usage, item.latency_ms, item.ttft_ms
+                    )
+                    turn_usage = merge_usage(turn_usage, item.usage)
 
     except Exception as e:
         logger.exception("chat_stream.error")
+        if not announced:
+            yield metadata(answered_by)
         yield _sse_event("error", {"message": str(e)})
         return
 
     # Save assistant message
-    assistant_msg = Message(
-        conversation_id=conversation.id,
-        role="assistant",
-        content=full_content,
-        model=conversation.model,
+    assistant_msg = await _add_message(
+        db,
+        conversation,
+        "assistant",
+        full_content,
+        model=answered_by,
+        token_usage=turn_usage.get("total_tokens"),
+        ttft_ms=ttft_ms,
     )
-    db.add(assistant_msg)
     await db.flush()
     await db.commit()
 
@@ -189,11 +189,9 @@ async def _action_create(
     await db.flush()
 
     # Register with scheduler
-    scheduler_engine.add_task(task.id, cron_expression, timezone)
-    next_run = scheduler_engine.get_next_run_time(task.id)
-    if next_run:
-        task.next_run_at = next_run
-        await db.flush()
+    await scheduler_engine.reschedule(db, task)
+    next_run = task.next_run_at
+    await db.flush()
 
     next_run_str = next_run.strftime("%Y-%m-%d %H:%M %Z") if next_run else "unknown"
     logger.info(
@@ -253,7 +251,6 @@ async def _action_delete(
         return f"Error: Task '{task_id}' not found."
 
     name = task.name
-    scheduler_engine.remove_task(task.id)
     await db.delete(task)
     await db.flush()
 
@@ -274,16 +271,13 @@ async def _action_toggle(
         return f"Error: Task '{task_id}' not found."
 
     task.is_active = not task.is_active
+    await scheduler_engine.reschedule(db, task)
 
     if task.is_active:
-        scheduler_engine.add_task(task.id, task.cron_expression, task.timezone)
-        next_run = scheduler_engine.get_next_run_time(task.id)
-        task.next_run_at = next_run
+        next_run = task.next_run_at
         next_run_str = next_run.strftime("%Y-%m-%d %H:%M %Z") if next_run else "unknown"
         status_msg = f"resumed. Next run: {next_run_str}"
     else:
-        scheduler_engine.remove_task(task.id)
-        task.next_run_at = None
         status_msg = "paused"
 
     await db.flush()
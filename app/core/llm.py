@@ -1,10 +1,13 @@
+import asyncio
+import time
 from collections.abc import AsyncIterator
-from dataclasses import dataclass, field
+from dataclasses import asdict, dataclass, field
 
 import structlog
 from openai import AsyncOpenAI
 
 from app.config import settings
+from app.core.cassette import cassette
 
 logger = structlog.get_logger()
 
@@ -21,12 +24,67 @@ class LLMResponse:
     content: str = ""
     tool_calls: list[ToolCall] = field(default_factory=list)
     usage: dict = field(default_factory=dict)
+    latency_ms: int | None = None
 
     @property
     def has_tool_calls(self) -> bool:
         return len(self.tool_calls) > 0
 
 
+@dataclass
+class StreamUsage:
+    """Final item of a stream: token usage and timings for the whole call."""
+    usage: dict = field(default_factory=dict)
+    latency_ms: int | None = None
+    ttft_ms: int | None = None
+
+
+def _extract_usage(usage) -> dict:
+    """Normalize an OpenAI-format usage object, including LiteLLM's cache token fields."""
+    if not usage:
+        return {}
+    result = {
+        "prompt_tokens": usage.prompt_tokens or 0,
+        "completion_tokens": usage.completion_tokens or 0,
+        "total_tokens": usage.total_tokens or 0,
+    }
+    details = getattr(usage, "prompt_tokens_details", None)
+    cache_read = getattr(usage, "cache_read_input_tokens", None)
+    if cache_read is None and details is not None:
+        cache_read = getattr(details, "cached_tokens", None)
+    result["cache_read_tokens"] = cache_read or 0
+    result["cache_write_tokens"] = getattr(usage, "cache_creation_input_tokens", None) or 0
+    return result
+
+
+def merge_usage(total: dict, usage: dict) -> dict:
+    """Sum token counts of one LLM call into a running total (e.g. over tool rounds)."""
+    merged = dict(total)
+    for key, value in usage.items():
+        merged[key] = merged.get(key, 0) + (value or 0)
+    return merged
+
+
+def _elapsed_ms(start: float) -> int:
+    return int((time.perf_counter() - start) * 1000)
+
+
+def _encode_stream_item(item: str | ToolCall | StreamUsage) -> dict:
+    if isinstance(item, str):
+        return {"text": item}
+    if isinstance(item, ToolCall):
+        return {"tool_call": asdict(item)}
+    return {"usage": asdict(item)}
+
+
+def _decode_stream_item(data: dict) -> str | ToolCall | StreamUsage:
+    if "text" in data:
+        return data["text"]
+    if "tool_call" in data:
+        return ToolCall(**data["tool_call"])
+    return StreamUsage(**data["usage"])
+
+
 class LLMClient:
     def __init__(self):
         self.client = AsyncOpenAI(
@@ -43,22 +101,39 @@ class LLMClient:
         """Non-streaming completion. Returns LLMResponse with content and/or tool_calls."""
         model = model or settings.DEFAULT_MODEL
 
+        if cassette.mode != "off":
+            request = {"model": model, "messages": messages, "tools": tools}
+            if cassette.replaying:
+                entry = cassette.lookup("llm.complete", request)
+                if cassette.replay_timing and entry.get("latency_ms"):
+                    await asyncio.sleep(entry["latency_ms"] / 1000)
+                data = entry["response"]
+                return LLMResponse(
+                    content=data["content"],
+                    tool_calls=[ToolCall(**tc) for tc in data["tool_calls"]],
+                    usage=data["usage"],
+                    latency_ms=data["latency_ms"],
+                )
+            response = await self._complete(messages, model, tools)
+            cassette.record("llm.complete", request, response=asdict(response), latency_ms=response.latency_ms)
+            return response
+
+        return await self._complete(messages, model, tools)
+
+    async def _complete(self, messages: list[dict], model: str, tools: list[dict] | None) -> LLMResponse:
         kwargs = {"model": model, "messages": messages}
         if tools:
             kwargs["tools"] = tools
             kwargs["tool_choice"] = "auto"
 
+        start = time.perf_counter()
         response = await self.client.chat.completions.create(**kwargs)
+        latency_ms = _elapsed_ms(start)
         msg = response.choices[0].message
 
-        usage = {}
-        if response.usage:
-            usage = {
-                "prompt_tokens": response.usage.prompt_tokens,
-                "completion_tokens": response.usage.completion_tokens,
-                "total_tokens": response.usage.total_tokens,
-            }
-            logger.info("llm.complete", model=model, **usage)
+        usage = _extract_usage(response.usage)
+        if usage:
+            logger.info("llm.complete", model=model, latency_ms=latency_ms, **usage)
 
         tool_calls = []
         if msg.tool_calls:
@@ -73,6 +148,7 @@ class LLMClient:
             content=msg.content or "",
             tool_calls=tool_calls,
             usage=usage,
+            latency_ms=latency_ms,
         )
 
     async def stream(
@@ -80,24 +156,67 @@ class LLMClient:
         messages: list[dict],
         model: str | None = None,
         tools: list[dict] | None = None,
-    ) -> AsyncIterator[str | ToolCall]:
-        """Streaming completion. Yields content deltas (str) or accumulated ToolCall objects."""
+    ) -> AsyncIterator[str | ToolCall | StreamUsage]:
+        """Streaming completion.
+
+        Yields content deltas (str), then accumulated ToolCall objects, then a single
+        StreamUsage with the call's token usage and timings.
+        """
         model = model or settings.DEFAULT_MODEL
 
-        kwargs = {"model": model, "messages": messages, "stream": True}
+        if cassette.mode == "off":
+            async for item in self._stream(messages, model, tools):
+                yield item
+            return
+
+        request = {"model": model, "messages": messages, "tools": tools}
+        if cassette.replaying:
+            entry = cassette.lookup("llm.stream", request)
+            elapsed = 0
+            for offset_ms, data in entry["chunks"]:
+                if cassette.replay_timing and offset_ms > elapsed:
+                    await asyncio.sleep((offset_ms - elapsed) / 1000)
+                    elapsed = offset_ms
+                yield _decode_stream_item(data)
+            return
+
+        start = time.perf_counter()
+        chunks = []
+        async for item in self._stream(messages, model, tools):
+            chunks.append([_elapsed_ms(start), _encode_stream_item(item)])
+            yield item
+        cassette.record("llm.stream", request, chunks=chunks, latency_ms=_elapsed_ms(start))
+
+    async def _stream(
+        self, messages: list[dict], model: str, tools: list[dict] | None
+    ) -> AsyncIterator[str | ToolCall | StreamUsage]:
+        kwargs = {
+            "model": model,
+            "messages": messages,
+            "stream": True,
+            "stream_options": {"include_usage": True},
+        }
         if tools:
             kwargs["tools"] = tools
             kwargs["tool_choice"] = "auto"
 
+        start = time.perf_counter()
+        ttft_ms = None
+        usage = {}
         response = await self.client.chat.completions.create(**kwargs)
 
         # Accumulate tool calls across chunks
         pending_tool_calls: dict[int, dict] = {}
 
         async for chunk in response:
+            # With include_usage, the last chunk carries usage and no choices
+            if chunk.usage:
+                usage = _extract_usage(chunk.usage)
             if not chunk.choices:
                 continue
             delta = chunk.choices[0].delta
+            if ttft_ms is None and (delta.content or delta.tool_calls):
+                ttft_ms = _elapsed_ms(start)
 
             # Stream text content
             if delta.content:
@@ -125,6 +244,10 @@ class LLMClient:
                 arguments=tc_data["arguments"],
             )
 
+        latency_ms = _elapsed_ms(start)
+        logger.info("llm.stream", model=model, latency_ms=latency_ms, ttft_ms=ttft_ms, **usage)
+        yield StreamUsage(usage=usage, latency_ms=latency_ms, ttft_ms=ttft_ms)
+
     async def list_models(self) -> list[dict]:
         """List available models from LiteLLM."""
         try:
@@ -0,0 +1,25 @@
+"""
+Local token count approximation.
+
+Close enough for context budgeting and cost estimates without a provider
+round trip: CJK (and other wide) characters count as one token each, the rest
+as one token per 4 characters, plus a fixed per-message overhead for the chat
+format.
+"""
+
+import math
+
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(text: str | None) -> int:
+    """Approximate the token count of a piece of text."""
+    if not text:
+        return 0
+    wide = sum(1 for ch in text if ord(ch) >= 0x2E80)
+    return wide + math.ceil((len(text) - wide) / 4)
+
+
+def estimate_message_tokens(content: str | None) -> int:
+    """Approximate the tokens a chat message costs in the prompt, including format overhead."""
+    return estimate_tokens(content) + MESSAGE_OVERHEAD_TOKENS
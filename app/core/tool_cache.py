@@ -0,0 +1,171 @@
+"""
+TTL result cache for MCP tool calls.
+
+Keyed by (tool name, canonical JSON arguments). Only tools that opt in through
+`tool_options.<tool>.cache_ttl` in mcp_servers.json are cached. The in-process
+layer is an LRU bounded by entry count and total bytes; with TOOL_CACHE_PERSIST
+results are also written to the `tool_cache` table so replicas share them.
+Concurrent identical calls are coalesced into one MCP request.
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timedelta, timezone
+
+import structlog
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+
+from app.config import settings
+from app.db.session import async_session
+from app.models.tool_cache_entry import ToolCacheEntry
+
+logger = structlog.get_logger()
+
+
+def make_key(name: str, arguments: dict) -> str:
+    canonical = json.dumps(arguments, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(f"{name}\x00{canonical}".encode()).hexdigest()
+
+
+class ToolResultCache:
+    def __init__(self, max_entries: int, max_bytes: int, persist: bool = False):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.persist = persist
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()  # key -> (expires_at, text)
+        self._bytes = 0
+        self._inflight: dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def get_or_call(self, name: str, arguments: dict, ttl: float, call: Callable[[], Awaitable[str]]) -> str:
+        """Return a cached result, or run `call` once and cache its result for `ttl` seconds.
+
+        Exceptions from `call` propagate and are not cached.
+        """
+        key = make_key(name, arguments)
+        text = self._get_local(key)
+        if text is None and self.persist:
+            text = await self._get_persisted(key)
+        if text is not None:
+            self.hits += 1
+            logger.info("tools.cache_hit", tool=name)
+            return text
+
+        inflight = self._inflight.get(key)
+        if inflight:
+            self.hits += 1
+            return await asyncio.shield(inflight)
+
+        self.misses += 1
+        # One shared task per key: a cancelled caller (client gone, timeout) stops waiting, but the
+        # call still completes for everyone else awaiting it
+        task = asyncio.create_task(self._call_and_store(key, name, ttl, call))
+        task.add_done_callback(self._call_done)
+        self._inflight[key] = task
+        return await asyncio.shield(task)
+
+    async def _call_and_store(self, key: str, name: str, ttl: float, call: Callable[[], Awaitable[str]]) -> str:
+        try:
+            text = await call()
+        finally:
+            self._inflight.pop(key, None)
+        self._set_local(key, text, ttl)
+        if self.persist:
+            await self._set_persisted(key, name, text, ttl)
+        return text
+
+    @staticmethod
+    def _call_done(task: asyncio.Task):
+        # Mark retrieved so an exception nobody is left to await doesn't log "exception was never retrieved"
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def _get_local(self, key: str) -> str | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, text = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return text
+
+    def _set_local(self, key: str, text: str, ttl: float):
+        size = len(text.encode())
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic() + ttl, text)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: str):
+        _, text = self._entries.pop(key)
+        self._bytes -= len(text.encode())
+
+    async def _get_persisted(self, key: str) -> str | None:
+        try:
+            async with async_session() as db:
+                row = (await db.execute(
+                    select(ToolCacheEntry.result, ToolCacheEntry.expires_at).where(
+                        ToolCacheEntry.key == key,
+                        ToolCacheEntry.expires_at > datetime.now(timezone.utc),
+                    )
+                )).one_or_none()
+        except Exception:
+            logger.exception("tools.cache_read_failed")
+            return None
+        if row is None:
+            return None
+        remaining = (row.expires_at - datetime.now(timezone.utc)).total_seconds()
+        self._set_local(key, row.result, remaining)
+        return row.result
+
+    async def _set_persisted(self, key: str, name: str, text: str, ttl: float):
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=ttl)
+        stmt = insert(ToolCacheEntry).values(key=key, tool_name=name, result=text, expires_at=expires_at)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ToolCacheEntry.key],
+            set_={"result": text, "expires_at": expires_at},
+        )
+        try:
+            async with async_session() as db:
+                await db.execute(stmt)
+                await db.commit()
+        except Exception:
+            logger.exception("tools.cache_write_failed")
+
+    async def purge_expired(self) -> int:
+        """Delete expired rows from the persistent cache. Returns the number removed."""
+        if not self.persist:
+            return 0
+        async with async_session() as db:
+            result = await db.execute(
+                delete(ToolCacheEntry).where(ToolCacheEntry.expires_at <= datetime.now(timezone.utc))
+            )
+            await db.commit()
+        return result.rowcount
+
+
+tool_cache = ToolResultCache(
+    max_entries=settings.TOOL_CACHE_MAX_ENTRIES,
+    max_bytes=settings.TOOL_CACHE_MAX_BYTES,
+    persist=settings.TOOL_CACHE_PERSIST,
+)
@@ -0,0 +1,166 @@
+"""
+Per-tool deadlines, bulkheads and circuit breakers for MCP tool calls.
+
+Configured per tool through `tool_options.<tool>` in mcp_servers.json:
+`timeout` (seconds, covers queueing and the call), `max_concurrency` (bulkhead
+shared by chat and scheduled tasks), `breaker_threshold` (consecutive failures
+before the circuit opens) and `breaker_reset` (seconds before a trial call).
+Changed options apply on the next call. Only timeouts and transport errors
+count as breaker failures; an error result reported by the tool itself does
+not. Rejections are raised as ToolUnavailable with a JSON body the model can read.
+"""
+
+import asyncio
+import json
+import time
+from collections.abc import Awaitable, Callable
+
+import structlog
+
+from app.config import settings
+
+logger = structlog.get_logger()
+
+
+class ToolUnavailable(Exception):
+    """A tool call was rejected or abandoned by the guard."""
+
+    def __init__(self, tool: str, reason: str, message: str, retry_after: float | None = None):
+        self.tool = tool
+        self.reason = reason  # timeout/overloaded/circuit_open
+        self.retry_after = retry_after
+        body = {"type": reason, "tool": tool, "message": message}
+        if retry_after is not None:
+            body["retry_after_s"] = round(retry_after, 1)
+        super().__init__(json.dumps({"error": body}, ensure_ascii=False))
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker: closed -> open -> half_open (one trial call) -> closed."""
+
+    def __init__(self, threshold: int, reset_after: float):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_running = False
+
+    def retry_after(self) -> float:
+        return max(self.opened_at + self.reset_after - time.monotonic(), 0.0)
+
+    def allow(self) -> bool:
+        if self.state == "open" and self.retry_after() == 0:
+            self.state = "half_open"
+        if self.state == "half_open":
+            if self._trial_running:
+                return False
+            self._trial_running = True
+            return True
+        return self.state == "closed"
+
+    def record_success(self):
+        self._trial_running = False
+        self.state = "closed"
+        self.failures = 0
+
+    def record_failure(self):
+        self._trial_running = False
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.threshold:
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def release_trial(self):
+        """Give up a trial call that ended without a verdict (e.g. cancelled)."""
+        self._trial_running = False
+
+    def snapshot(self) -> dict:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "retry_after_s": round(self.retry_after(), 1) if self.state == "open" else None,
+        }
+
+
+class ToolGuard:
+    def __init__(self):
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._bulkheads: dict[str, tuple[int, asyncio.Semaphore]] = {}  # Tool -> (limit, semaphore)
+
+    def _breaker(self, name: str, options: dict) -> CircuitBreaker:
+        threshold = options.get("breaker_threshold", settings.MCP_BREAKER_THRESHOLD)
+        reset_after = options.get("breaker_reset", settings.MCP_BREAKER_RESET)
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            breaker = self._breakers[name] = CircuitBreaker(threshold, reset_after)
+        else:
+            # tool_options may have been reloaded: apply them, keeping the breaker's state
+            breaker.threshold, breaker.reset_after = threshold, reset_after
+        return breaker
+
+    def _bulkhead(self, name: str, options: dict) -> asyncio.Semaphore:
+        limit = options.get("max_concurrency", settings.MCP_TOOL_MAX_CONCURRENCY)
+        bulkhead = self._bulkheads.get(name)
+        if bulkhead is None or bulkhead[0] != limit:
+            # A semaphore can't be resized; calls holding the old one release it when they finish
+            bulkhead = self._bulkheads[name] = (limit, asyncio.Semaphore(limit))
+        return bulkhead[1]
+
+    async def run(
+        self,
+        name: str,
+        options: dict,
+        call: Callable[[], Awaitable[str]],
+        tool_errors: tuple[type[Exception], ...] = (),
+    ) -> str:
+        """Run `call` under the tool's breaker, bulkhead and deadline.
+
+        `tool_errors` are error results the tool reported: the server answered, so they are
+        re-raised without counting as breaker failures.
+        """
+        breaker = self._breaker(name, options)
+        if not breaker.allow():
+            raise ToolUnavailable(
+                name, "circuit_open",
+                f"Tool '{name}' failed repeatedly and is temporarily disabled; do not retry it now.",
+                retry_after=breaker.retry_after(),
+            )
+
+        timeout = options.get("timeout", settings.MCP_TOOL_TIMEOUT)
+        bulkhead = self._bulkhead(name, options)
+        started = False
+        try:
+            async with asyncio.timeout(timeout):
+                async with bulkhead:
+                    started = True
+                    text = await call()
+        except TimeoutError:
+            if not started:
+                breaker.release_trial()
+                raise ToolUnavailable(
+                    name, "overloaded", f"Tool '{name}' is at its concurrency limit; try again later."
+                ) from None
+            breaker.record_failure()
+            logger.warning("tools.timeout", tool=name, timeout=timeout, breaker=breaker.state)
+            raise ToolUnavailable(name, "timeout", f"Tool '{name}' did not respond within {timeout}s.") from None
+        except tool_errors:
+            breaker.record_success()
+            raise
+        except Exception:
+            breaker.record_failure()
+            if breaker.state == "open":
+                logger.warning("tools.breaker_open", tool=name, failures=breaker.failures)
+            raise
+        except BaseException:
+            breaker.release_trial()
+            raise
+
+        breaker.record_success()
+        return text
+
+    def status(self) -> dict:
+        return {name: breaker.snapshot() for name, breaker in self._breakers.items()}
+
+
+tool_guard = ToolGuard()
@@ -0,0 +1,100 @@
+"""
+Compaction of tool results before they enter the prompt.
+
+The tool loop resends the whole message list every round, so a large result is
+paid for again on each of up to MAX_TOOL_ROUNDS calls. Results are capped when
+they arrive (`tool_options.<tool>.max_result_bytes` / `max_result_tokens`),
+oversized ones are optionally summarized by TOOL_SUMMARY_MODEL
+(`tool_options.<tool>.summarize`), and results from earlier rounds are cut down
+to short digests before the next round.
+"""
+
+import structlog
+
+from app.config import settings
+from app.core.llm import LLMResponse, llm_client
+from app.core.tokens import estimate_tokens
+
+logger = structlog.get_logger()
+
+SUMMARY_PROMPT = (
+    "The following is the output of the tool '{tool}'. Condense it to at most about {max_tokens} tokens. "
+    "Keep every fact, number, name, date and URL that could answer a question; drop boilerplate, "
+    "navigation text and repetition. Reply with the condensed output only."
+)
+
+DIGEST_SUFFIX = "Call the tool again if you need the rest.]"
+DIGEST_NOTE = "[Earlier tool result, shortened from ~{tokens} tokens. " + DIGEST_SUFFIX
+
+
+def truncate_middle(text: str, max_tokens: int) -> str:
+    """Cut text to about max_tokens, keeping the start and the end."""
+    total = estimate_tokens(text)
+    if total <= max_tokens:
+        return text
+    keep = int(len(text) * max_tokens / total)
+    head = text[:keep * 2 // 3]
+    tail = text[len(text) - keep // 3:] if keep // 3 else ""
+    omitted = total - estimate_tokens(head) - estimate_tokens(tail)
+    return f"{head}\n[... {omitted} tokens omitted ...]\n{tail}"
+
+
+async def _summarize(name: str, text: str, max_tokens: int) -> LLMResponse | None:
+    messages = [
+        {"role": "system", "content": SUMMARY_PROMPT.format(tool=name, max_tokens=max_tokens)},
+        {"role": "user", "content": text},
+    ]
+    try:
+        return await llm_client.complete(messages, settings.TOOL_SUMMARY_MODEL, tools=None)
+    except Exception:
+        logger.exception("tools.summarize_failed", tool=name)
+        return None
+
+
+async def compact_tool_result(name: str, text: str, options: dict) -> tuple[str, LLMResponse | None]:
+    """Apply the tool's size caps. Returns (text for the prompt, summarization response if one was made)."""
+    max_bytes = options.get("max_result_bytes", settings.TOOL_RESULT_MAX_BYTES)
+    max_tokens = options.get("max_result_tokens", settings.TOOL_RESULT_MAX_TOKENS)
+
+    raw = text.encode()
+    if len(raw) > max_bytes:
+        text = raw[:max_bytes].decode(errors="ignore") + f"\n[... {len(raw) - max_bytes} bytes omitted ...]"
+
+    tokens = estimate_tokens(text)
+    if tokens <= max_tokens:
+        return text, None
+
+    summary = None
+    if options.get("summarize", settings.TOOL_RESULT_SUMMARIZE):
+        summary = await _summarize(name, text, max_tokens)
+        if summary and summary.content:
+            text = summary.content
+
+    compacted = truncate_middle(text, max_tokens)
+    logger.info(
+        "tools.result_compacted",
+        tool=name,
+        tokens=tokens,
+        compacted_tokens=estimate_tokens(compacted),
+        summarized=summary is not None,
+    )
+    return compacted, summary
+
+
+def digest_tool_results(messages: list[dict]):
+    """Shorten tool results already in `messages` to TOOL_RESULT_DIGEST_TOKENS, in place.
+
+    Call before appending a new round's results; the latest round is always sent in full.
+    """
+    max_tokens = settings.TOOL_RESULT_DIGEST_TOKENS
+    if max_tokens <= 0:
+        return
+    for message in messages:
+        if message["role"] != "tool":
+            continue
+        content = message["content"]
+        tokens = estimate_tokens(content)
+        if tokens <= max_tokens or content.endswith(DIGEST_SUFFIX):
+            continue
+        head = content[:int(len(content) * max_tokens / tokens)]
+        message["content"] = f"{head}\n{DIGEST_NOTE.format(tokens=tokens)}"
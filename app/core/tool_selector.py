@@ -0,0 +1,94 @@
+"""
+Relevance-based tool schema selection.
+
+With many MCP tools, sending every schema on every LLM call costs thousands of
+prompt tokens per round. Tool descriptions are embedded once (when a server's
+tools are registered) and each chat turn sends only the TOOL_SELECTION_TOP_K
+tools most similar to the user's message, plus the pinned internal tools.
+Selection is skipped while there are no more MCP tools than TOOL_SELECTION_TOP_K.
+
+Uses the same sentence-transformers model as Mem0. If it can't be loaded,
+every tool is sent as before.
+"""
+
+import asyncio
+from collections.abc import Callable, Sequence
+
+import structlog
+
+from app.config import settings
+
+logger = structlog.get_logger()
+
+Embedder = Callable[[list[str]], list[list[float]]]  # texts -> unit vectors
+
+
+def tool_text(tool: dict) -> str:
+    function = tool["function"]
+    return f"{function['name']}: {function.get('description', '')}"
+
+
+def _load_sentence_transformer(model_name: str) -> Embedder:
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(model_name)
+
+    def embed(texts: list[str]) -> list[list[float]]:
+        return model.encode(texts, normalize_embeddings=True).tolist()
+
+    return embed
+
+
+def _dot(a: list[float], b: list[float]) -> float:
+    return sum(x * y for x, y in zip(a, b))
+
+
+class ToolSelector:
+    def __init__(self, top_k: int, embed: Embedder | None = None, model_name: str = ""):
+        self.top_k = top_k
+        self.model_name = model_name
+        self._embed = embed
+        self._unavailable = False
+        self._vectors: dict[str, list[float]] = {}  # tool_text -> embedding
+        self._lock = asyncio.Lock()
+
+    async def _get_embedder(self) -> Embedder | None:
+        if self._embed is None and not self._unavailable:
+            try:
+                loop = asyncio.get_running_loop()
+                self._embed = await loop.run_in_executor(None, _load_sentence_transformer, self.model_name)
+            except Exception:
+                self._unavailable = True
+                logger.exception("tools.selector_unavailable", model=self.model_name)
+        return self._embed
+
+    async def _encode(self, texts: list[str]) -> list[list[float]]:
+        embed = await self._get_embedder()
+        return await asyncio.get_running_loop().run_in_executor(None, embed, texts)
+
+    async def index(self, tools: Sequence[dict]):
+        """Embed descriptions of tools not seen before. Called when tools are registered."""
+        if len(tools) <= self.top_k:
+            return
+        async with self._lock:
+            texts = [t for t in dict.fromkeys(tool_text(tool) for tool in tools) if t not in self._vectors]
+            if not texts or not await self._get_embedder():
+                return
+            self._vectors.update(zip(texts, await self._encode(texts)))
+            logger.info("tools.selector_indexed", tools=len(texts))
+
+    async def select(self, query: str, tools: Sequence[dict], pinned: Sequence[dict] = ()) -> list[dict]:
+        """Return the top_k tools most relevant to `query`, followed by `pinned`."""
+        if self.top_k <= 0 or len(tools) <= self.top_k:
+            return [*tools, *pinned]
+
+        await self.index(tools)
+        if self._unavailable:
+            return [*tools, *pinned]
+
+        query_vector = (await self._encode([query]))[0]
+        ranked = sorted(tools, key=lambda t: _dot(query_vector, self._vectors[tool_text(t)]), reverse=True)
+        return [*ranked[:self.top_k], *pinned]
+
+
+tool_selector = ToolSelector(settings.TOOL_SELECTION_TOP_K, model_name=settings.TOOL_EMBEDDING_MODEL)
@@ -1,156 +1,573 @@
+import asyncio
 import json
-from contextlib import AsyncExitStack
+import time
+from contextlib import AsyncExitStack, asynccontextmanager
+from dataclasses import dataclass
+from functools import cached_property
 from pathlib import Path
 
+import httpx
 import structlog
 from mcp import ClientSession, StdioServerParameters
+from mcp.client.sse import sse_client
 from mcp.client.stdio import stdio_client
+from mcp.client.streamable_http import streamable_http_client
 
 from app.config import settings
+from app.core.cassette import CassetteMiss, cassette
+from app.core.tool_cache import tool_cache
+from app.core.tool_guard import ToolUnavailable, tool_guard
+from app.core.tool_selector import tool_selector
 
 logger = structlog.get_logger()
 
 
+class ToolError(Exception):
+    """The MCP server reported an error result (CallToolResult.isError)."""
+
+
 class MCPServerConnection:
-    """A single MCP server connection."""
+    """A single MCP server connection over stdio, streamable HTTP or SSE.
+
+    The transport client and session live inside a dedicated supervisor task, because
+    their anyio cancel scopes must be entered and exited by the same task. This
+    lets servers start concurrently and be restarted independently.
+    """
+
+    def __init__(self, name: str, config: dict, replica: int = 0):
+        self.name = name
+        self.config = config
+        self.replica = replica
+        self.session: ClientSession | None = None
+        self.tools: list = []  # list of mcp Tool objects
+        self.status = "stopped"  # stopped/connecting/ready/failed
+        self.restarts = 0
+        self.next_restart_at = 0.0  # monotonic time before which no restart is attempted
+        self.backoff = 0.0
+        self.slots = asyncio.Semaphore(config.get("max_inflight", settings.MCP_REPLICA_MAX_INFLIGHT))
+        self.pending = 0  # Calls queued for or running on this replica
+        self.calls = 0
+        self.queue_wait_ms = 0.0  # Total time calls spent waiting for a slot
+        self._task: asyncio.Task | None = None
+        self._ready = asyncio.Event()
+        self._stop = asyncio.Event()
+        self._error: BaseException | None = None
+
+    @property
+    def alive(self) -> bool:
+        return self.session is not None and self._task is not None and not self._task.done()
+
+    async def start(self, timeout: float):
+        """Spawn the server and wait until its tools are listed, or raise."""
+        self._ready = asyncio.Event()
+        self._stop = asyncio.Event()
+        self._error = None
+        self.status = "connecting"
+        self._task = asyncio.create_task(self._run(), name=f"mcp-{self.name}-{self.replica}")
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except TimeoutError:
+            await self.stop()
+            self.status = "failed"
+            raise TimeoutError(f"MCP server '{self.name}' replica {self.replica} did not start within {timeout}s")
+        if self._error:
+            raise self._error
+
+    async def _run(self):
+        try:
+            async with AsyncExitStack() as stack:
+                read_stream, write_stream = await self._open_transport(stack)
+                session = await stack.enter_async_context(ClientSession(read_stream, write_stream))
+                await session.initialize()
+
+                # List available tools
+                tools_result = await session.list_tools()
+                self.tools = tools_result.tools
+                self.session = session
+                self.status = "ready"
+                self._ready.set()
+
+                await self._stop.wait()
+        except Exception as e:
+            self._error = e
+            self.status = "failed"
+        finally:
+            self.session = None
+            if self.status != "failed":
+                self.status = "stopped"
+            self._ready.set()
+
+    @property
+    def transport(self) -> str:
+        return self.config.get("transport", "http" if "url" in self.config else "stdio")
+
+    async def _open_transport(self, stack: AsyncExitStack):
+        """Enter the configured client transport and return its (read, write) streams."""
+        transport = self.transport
+        if transport == "stdio":
+            params = StdioServerParameters(
+                command=self.config["command"],
+                args=self.config.get("args", []),
+                env=self.config.get("env"),
+            )
+            return await stack.enter_async_context(stdio_client(params))
+        if transport == "http":
+            # Keep-alive pool sized to the replica's concurrent calls
+            max_inflight = self.config.get("max_inflight", settings.MCP_REPLICA_MAX_INFLIGHT)
+            http_client = await stack.enter_async_context(httpx.AsyncClient(
+                headers=self.config.get("headers"),
+                timeout=httpx.Timeout(30.0, read=300.0),
+                limits=httpx.Limits(max_connections=max_inflight + 1, max_keepalive_connections=max_inflight + 1),
+                follow_redirects=True,
+            ))
+            read_stream, write_stream, _ = await stack.enter_async_context(
+                streamable_http_client(self.config["url"], http_client=http_client)
+            )
+            return read_stream, write_stream
+        if transport == "sse":
+            return await stack.enter_async_context(
+                sse_client(self.config["url"], headers=self.config.get("headers"))
+            )
+        raise ValueError(f"Unknown MCP transport '{transport}' for server '{self.name}'")
+
+    async def stop(self):
+        if not self._task:
+            return
+        self._stop.set()
+        try:
+            await asyncio.wait_for(self._task, timeout=5)
+        except TimeoutError:
+            self._task.cancel()
+        except Exception:
+            pass
+        self._task = None
+
+    async def ping(self, timeout: float) -> bool:
+        if not self.alive:
+            return False
+        try:
+            await asyncio.wait_for(self.session.send_ping(), timeout)
+            return True
+        except Exception:
+            return False
 
-    def __init__(self, name: str, session: ClientSession, tools: list):
+    def stats(self) -> dict:
+        return {
+            "replica": self.replica,
+            "status": self.status,
+            "restarts": self.restarts,
+            "pending": self.pending,
+            "calls": self.calls,
+            "avg_queue_wait_ms": round(self.queue_wait_ms / self.calls, 1) if self.calls else None,
+        }
+
+
+class MCPServerPool:
+    """One configured MCP server, run as `replicas` identical processes (or, for
+    remote servers, `replicas` sessions to the same URL).
+
+    Calls go to the live replica with the fewest pending calls and wait there
+    for one of its `max_inflight` slots.
+    """
+
+    def __init__(self, name: str, config: dict):
         self.name = name
-        self.session = session
-        self.tools = tools  # list of mcp Tool objects
+        self.config = config
+        self.replicas = [
+            MCPServerConnection(name, config, replica=i) for i in range(max(config.get("replicas", 1), 1))
+        ]
+
+    @property
+    def lazy(self) -> bool:
+        return bool(self.config.get("lazy"))
+
+    @property
+    def started(self) -> bool:
+        return any(c.status != "stopped" or c.restarts for c in self.replicas)
+
+    @property
+    def tools(self) -> list:
+        # Fall back to the last listed tools while every replica is down
+        for conn in sorted(self.replicas, key=lambda c: not c.alive):
+            if conn.tools:
+                return conn.tools
+        return []
+
+    @asynccontextmanager
+    async def acquire(self):
+        """Yield the least-loaded live replica once it has a free slot."""
+        live = [c for c in self.replicas if c.alive]
+        if not live:
+            raise ToolError(f"Error: MCP server '{self.name}' is not available")
+        conn = min(live, key=lambda c: c.pending)
+        conn.pending += 1
+        queued_at = time.perf_counter()
+        try:
+            async with conn.slots:
+                conn.calls += 1
+                conn.queue_wait_ms += (time.perf_counter() - queued_at) * 1000
+                yield conn
+        finally:
+            conn.pending -= 1
+
+    def stats(self) -> dict:
+        return {"replicas": [c.stats() for c in self.replicas]}
+
+
+@dataclass(frozen=True)
+class ToolSchemaSnapshot:
+    """An immutable build of the MCP tool schemas. Treat `tools` as read-only."""
+
+    version: int = 0
+    tools: tuple[dict, ...] = ()  # OpenAI function calling format
+    json: str = "[]"  # `tools` serialized once, for hashing and size accounting
+
+    @cached_property
+    def names(self) -> frozenset[str]:
+        return frozenset(t["function"]["name"] for t in self.tools)
 
 
 class ToolManager:
     """Manages MCP server connections and tool execution."""
 
     def __init__(self):
-        self._exit_stack: AsyncExitStack | None = None
-        self._servers: dict[str, MCPServerConnection] = {}
-        self._tool_map: dict[str, MCPServerConnection] = {}  # tool_name -> server
+        self._servers: dict[str, MCPServerPool] = {}
+        self._tool_map: dict[str, MCPServerPool] = {}  # tool_name -> server
+        self._schema = ToolSchemaSnapshot()
+        self._internal_schemas: tuple[dict, ...] | None = None
+        self._tool_options: dict[str, dict] = {}  # tool_name -> tool_options from config
+        self._lazy_lock = asyncio.Lock()
+        self._reload_lock = asyncio.Lock()
+        self._config_mtime: float | None = None
+        self._health_task: asyncio.Task | None = None
+        self._watch_task: asyncio.Task | None = None
 
     async def initialize(self):
-        """Start all MCP servers from config file."""
+        """Start all MCP servers from config file, concurrently."""
+        if cassette.replaying:
+            try:
+                tools = cassette.lookup("tools.schema", {})["response"]["tools"]
+            except CassetteMiss:
+                tools = []
+            self._set_schema(tuple(tools))
+            logger.info("tools.replaying", tools=len(tools))
+            return
+
+        servers = self._read_config()
+        if servers:
+            await self._apply_config(servers)
+            logger.info(
+                "tools.initialized",
+                servers=sum(1 for p in self._servers.values() if p.started),
+                lazy=sum(1 for p in self._servers.values() if not p.started),
+                tools=len(self._tool_map),
+            )
+        elif servers is not None:
+            logger.info("tools.no_servers_configured")
+
+        if cassette.recording:
+            cassette.record("tools.schema", {}, response={"tools": self.get_tools_schema()})
+
+        if tool_cache.persist:
+            try:
+                purged = await tool_cache.purge_expired()
+                logger.info("tools.cache_purged", rows=purged)
+            except Exception:
+                logger.exception("tools.cache_purge_failed")
+
+        if settings.MCP_HEALTH_CHECK_INTERVAL > 0:
+            self._health_task = asyncio.create_task(self._health_loop(), name="mcp-health")
+        if settings.MCP_CONFIG_WATCH_INTERVAL > 0 and not cassette.recording:
+            self._watch_task = asyncio.create_task(self._watch_config(), name="mcp-config-watch")
+
+    def _read_config(self) -> list[dict] | None:
+        """Server entries from MCP_SERVERS_CONFIG, or None if the file is missing or invalid."""
         config_path = Path(settings.MCP_SERVERS_CONFIG)
         if not config_path.exists():
             logger.info("tools.no_config", path=str(config_path))
-            return
+            return None
 
         try:
+            self._config_mtime = config_path.stat().st_mtime
             config = json.loads(config_path.read_text())
         except Exception:
             logger.exception("tools.config_parse_failed", path=str(config_path))
-            return
+            return None
+        return config.get("servers", [])
 
-        servers = config.get("servers", [])
-        if not servers:
-            logger.info("tools.no_servers_configured")
-            return
+    async def reload(self) -> dict:
+        """Re-read mcp_servers.json: start added servers, stop removed ones and restart changed ones."""
+        async with self._reload_lock:
+            servers = self._read_config()
+            if servers is None:
+                return {"error": "config missing or invalid", "version": self._schema.version}
+            changes = await self._apply_config(servers)
+        logger.info("tools.reloaded", **changes)
+        return changes
+
+    async def _apply_config(self, servers: list[dict]) -> dict:
+        configs = {c.get("name", "unknown"): c for c in servers}
+        removed = [name for name in self._servers if name not in configs]
+        changed = [name for name, pool in self._servers.items() if name in configs and configs[name] != pool.config]
+        added = [name for name in configs if name not in self._servers]
+
+        for name in removed + changed:
+            pool = self._servers.pop(name)
+            await asyncio.gather(*(conn.stop() for conn in pool.replicas))
+            self._unregister_tools(pool)
 
-        self._exit_stack = AsyncExitStack()
+        pools = [MCPServerPool(name, configs[name]) for name in added + changed]
+        self._servers.update((pool.name, pool) for pool in pools)
+        self._tool_options = {
+            tool: options
+            for pool in self._servers.values()
+            for tool, options in pool.config.get("tool_options", {}).items()
+        }
+        # Recording needs the full tool schema up front, so nothing is lazy then
+        eager = [p for p in pools if not p.lazy or cassette.recording]
+        await asyncio.gather(*(self._start_pool(pool) for pool in eager))
+        return {"added": added, "removed": removed, "changed": changed, "version": self._schema.version}
 
-        for server_config in servers:
-            name = server_config.get("name", "unknown")
+    async def _watch_config(self):
+        """Reload mcp_servers.json when its modification time changes."""
+        config_path = Path(settings.MCP_SERVERS_CONFIG)
+        while True:
+            await asyncio.sleep(settings.MCP_CONFIG_WATCH_INTERVAL)
             try:
-                await self._connect_server(name, server_config)
-            except Exception:
-                logger.exception("tools.server_connect_failed", server=name)
+                mtime = config_path.stat().st_mtime
+            except OSError:
+                continue
+            if mtime != self._config_mtime:
+                try:
+                    await self.reload()
+                except Exception:
+                    logger.exception("tools.reload_failed")
+
+    async def ensure_connected(self):
+        """Connect lazy servers on first use. Cheap no-op once they have been started."""
+        pending = [p for p in self._servers.values() if not p.started]
+        if not pending:
+            return
+        async with self._lazy_lock:
+            pending = [p for p in pending if not p.started]
+            await asyncio.gather(*(self._start_pool(pool) for pool in pending))
 
-        tool_count = len(self._tool_map)
-        logger.info("tools.initialized", servers=len(self._servers), tools=tool_count)
+    async def _start_pool(self, pool: MCPServerPool):
+        await asyncio.gather(*(self._start_server(pool, conn) for conn in pool.replicas))
 
-    async def _connect_server(self, name: str, config: dict):
-        """Connect to a single MCP server via stdio."""
-        params = StdioServerParameters(
-            command=config["command"],
-            args=config.get("args", []),
-            env=config.get("env"),
-        )
+    async def _start_server(self, pool: MCPServerPool, conn: MCPServerConnection) -> bool:
+        timeout = conn.config.get("connect_timeout", settings.MCP_CONNECT_TIMEOUT)
+        start = time.perf_counter()
+        try:
+            await conn.start(timeout)
+        except Exception:
+            logger.exception("tools.server_connect_failed", server=conn.name, replica=conn.replica)
+            return False
 
-        read_stream, write_stream = await self._exit_stack.enter_async_context(
-            stdio_client(params)
-        )
-        session = await self._exit_stack.enter_async_context(
-            ClientSession(read_stream, write_stream)
-        )
-        await session.initialize()
+        if self._servers.get(pool.name) is not pool:
+            # Removed by a config reload while starting
+            await conn.stop()
+            return False
 
-        # List available tools
-        tools_result = await session.list_tools()
-        tools = tools_result.tools
+        self._register_tools(pool)
+        logger.info(
+            "tools.server_connected",
+            server=conn.name,
+            replica=conn.replica,
+            tools=len(conn.tools),
+            startup_ms=int((time.perf_counter() - start) * 1000),
+        )
+        await tool_selector.index(self._schema.tools)
+        return True
 
-        conn = MCPServerConnection(name=name, session=session, tools=tools)
-        self._servers[name] = conn
+    def _register_tools(self, pool: MCPServerPool):
+        """(Re-)register a server's tools in _tool_map, dropping any it no longer lists."""
+        registered = {t for t, p in self._tool_map.items() if p is pool}
+        tools = pool.tools
+        for tool_name in registered - {t.name for t in tools}:
+            del self._tool_map[tool_name]
 
         for tool in tools:
+            if tool.name in registered:
+                continue
             if tool.name in self._tool_map:
                 existing = self._tool_map[tool.name].name
                 logger.warning(
                     "tools.name_collision",
                     tool=tool.name,
                     existing_server=existing,
-                    new_server=name,
+                    new_server=pool.name,
                 )
-            self._tool_map[tool.name] = conn
-            logger.info("tools.registered", server=name, tool=tool.name)
+            self._tool_map[tool.name] = pool
+            logger.info("tools.registered", server=pool.name, tool=tool.name)
+        self._rebuild_schema()
 
-    def get_tools_schema(self) -> list[dict]:
-        """Return MCP tools in OpenAI function calling format (excludes internal tools)."""
+    def _unregister_tools(self, pool: MCPServerPool):
+        for tool_name in [t for t, p in self._tool_map.items() if p is pool]:
+            del self._tool_map[tool_name]
+        self._rebuild_schema()
+
+    def _rebuild_schema(self):
+        """Rebuild the schema snapshot from _tool_map; bumps the version only if it changed."""
+        by_pool: dict[int, dict] = {}
         tools = []
-        for tool_name, conn in self._tool_map.items():
-            for tool in conn.tools:
-                if tool.name == tool_name:
-                    tools.append({
-                        "type": "function",
-                        "function": {
-                            "name": tool.name,
-                            "description": tool.description or "",
-                            "parameters": tool.inputSchema,
-                        },
-                    })
-        return tools
-
-    def get_all_tools_schema(self) -> list[dict]:
-        """Return all tools (MCP + internal) in OpenAI function calling format."""
-        from app.core.internal_tools import get_internal_tools_schemas
+        for tool_name, pool in self._tool_map.items():
+            pool_tools = by_pool.setdefault(id(pool), {t.name: t for t in pool.tools})
+            tool = pool_tools.get(tool_name)
+            if tool:
+                tools.append({
+                    "type": "function",
+                    "function": {
+                        "name": tool.name,
+                        "description": tool.description or "",
+                        "parameters": tool.inputSchema,
+                    },
+                })
+        if tuple(tools) != self._schema.tools:
+            self._set_schema(tuple(tools))
+
+    def _set_schema(self, tools: tuple[dict, ...]):
+        self._schema = ToolSchemaSnapshot(
+            version=self._schema.version + 1,
+            tools=tools,
+            json=json.dumps(tools, ensure_ascii=False, separators=(",", ":")),
+        )
+        logger.info("tools.schema_updated", version=self._schema.version, tools=len(tools))
 
-        tools = self.get_tools_schema()
-        tools.extend(get_internal_tools_schemas())
-        return tools
+    async def _health_loop(self):
+        """Ping running servers and restart dead ones with exponential backoff."""
+        interval = settings.MCP_HEALTH_CHECK_INTERVAL
+        while True:
+            await asyncio.sleep(interval)
+            for pool in list(self._servers.values()):
+                if not pool.started:
+                    continue  # Lazy and not used yet
+                for conn in pool.replicas:
+                    if await conn.ping(timeout=interval / 2):
+                        conn.backoff = 0.0
+                        continue
+                    if time.monotonic() < conn.next_restart_at:
+                        continue
+                    await self._restart_server(pool, conn)
+
+    async def _restart_server(self, pool: MCPServerPool, conn: MCPServerConnection):
+        logger.warning(
+            "tools.server_restarting",
+            server=conn.name,
+            replica=conn.replica,
+            status=conn.status,
+            restarts=conn.restarts,
+        )
+        conn.restarts += 1
+        await conn.stop()
+        if await self._start_server(pool, conn):
+            conn.backoff = 0.0
+            return
+        conn.backoff = min(
+            max(conn.backoff * 2, settings.MCP_HEALTH_CHECK_INTERVAL), settings.MCP_RESTART_MAX_BACKOFF
+        )
+        conn.next_restart_at = time.monotonic() + conn.backoff
+        logger.warning("tools.server_restart_failed", server=conn.name, replica=conn.replica, retry_in=conn.backoff)
+
+    @property
+    def schema(self) -> ToolSchemaSnapshot:
+        """Current MCP tool schema snapshot; compare `version` to detect changes."""
+        return self._schema
+
+    def get_tools_schema(self) -> tuple[dict, ...]:
+        """Return MCP tools in OpenAI function calling format (excludes internal tools)."""
+        return self._schema.tools
+
+    def get_tool_options(self, name: str) -> dict:
+        """The tool's `tool_options` entry from mcp_servers.json ({} if none)."""
+        return self._tool_options.get(name, {})
+
+    def get_internal_tools_schema(self) -> tuple[dict, ...]:
+        """Internal tool schemas; they depend only on settings, so they are built once."""
+        if self._internal_schemas is None:
+            from app.core.internal_tools import get_internal_tools_schemas
+
+            self._internal_schemas = tuple(get_internal_tools_schemas())
+        return self._internal_schemas
+
+    def get_all_tools_schema(self) -> tuple[dict, ...]:
+        """Return all tools (MCP + internal) in OpenAI function calling format."""
+        return self._schema.tools + self.get_internal_tools_schema()
 
     async def execute_tool(self, name: str, arguments: dict) -> str:
         """Execute a tool by name and return text result."""
-        conn = self._tool_map.get(name)
-        if not conn:
+        if cassette.mode == "off":
+            return await self._execute_tool(name, arguments)
+
+        request = {"name": name, "arguments": arguments}
+        if cassette.replaying:
+            entry = cassette.lookup("tool", request)
+            if cassette.replay_timing and entry.get("latency_ms"):
+                await asyncio.sleep(entry["latency_ms"] / 1000)
+            return entry["response"]["text"]
+
+        start = time.perf_counter()
+        text = await self._execute_tool(name, arguments)
+        latency_ms = int((time.perf_counter() - start) * 1000)
+        cassette.record("tool", request, response={"text": text}, latency_ms=latency_ms)
+        return text
+
+    async def _execute_tool(self, name: str, arguments: dict) -> str:
+        pool = self._tool_map.get(name)
+        if not pool:
             return f"Error: Unknown tool '{name}'"
 
+        options = self._tool_options.get(name, {})
+
+        def call():
+            return tool_guard.run(
+                name, options, lambda: self._call_tool(pool, name, arguments), tool_errors=(ToolError,)
+            )
+
         try:
-            result = await conn.session.call_tool(name, arguments)
-            # Extract text content from result blocks
-            text_parts = []
-            for block in result.content:
-                if hasattr(block, "text"):
-                    text_parts.append(block.text)
-            return "\n".join(text_parts) if text_parts else "Tool returned no text output."
+            if options.get("cache_ttl"):
+                return await tool_cache.get_or_call(name, arguments, options["cache_ttl"], call)
+            return await call()
+        except (ToolError, ToolUnavailable) as e:
+            return str(e)
         except Exception:
             logger.exception("tools.execute_failed", tool=name)
             return f"Error executing tool '{name}'"
 
+    async def _call_tool(self, pool: MCPServerPool, name: str, arguments: dict) -> str:
+        async with pool.acquire() as conn:
+            result = await conn.session.call_tool(name, arguments)
+        # Extract text content from result blocks
+        text_parts = []
+        for block in result.content:
+            if hasattr(block, "text"):
+                text_parts.append(block.text)
+        text = "\n".join(text_parts) if text_parts else "Tool returned no text output."
+        if result.isError:
+            raise ToolError(text)
+        return text
+
     @property
     def has_tools(self) -> bool:
-        return len(self._tool_map) > 0
+        return bool(self._schema.tools)
 
     @property
     def has_any_tools(self) -> bool:
         """Check if any tools (MCP or internal) are available."""
-        if self.has_tools:
-            return True
-        from app.core.internal_tools import get_internal_tools_schemas
-        return len(get_internal_tools_schemas()) > 0
+        return self.has_tools or bool(self.get_internal_tools_schema())
+
+    def stats(self) -> dict:
+        """Per-server replica status and queueing metrics."""
+        return {name: pool.stats() for name, pool in self._servers.items()}
 
     async def shutdown(self):
         """Close all MCP server connections."""
-        if self._exit_stack:
-            await self._exit_stack.aclose()
+        for task in (self._health_task, self._watch_task):
+            if task:
+                task.cancel()
+        self._health_task = self._watch_task = None
+        if self._servers:
+            await asyncio.gather(*(c.stop() for pool in self._servers.values() for c in pool.replicas))
             self._servers.clear()
             self._tool_map.clear()
             logger.info("tools.shutdown")
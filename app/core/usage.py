@@ -0,0 +1,184 @@
+"""
+Usage ledger: one `usage_events` row per LLM call, plus aggregate queries.
+
+Rows are added to the caller's session and committed together with the
+chat turn or task execution they belong to.
+"""
+
+import uuid
+from datetime import datetime
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.conversation import Conversation
+from app.models.message import Message
+from app.models.usage_event import UsageEvent
+
+# USD per 1M tokens: (input, output, cache read, cache write), keyed by LiteLLM model_name
+MODEL_PRICES = {
+    "claude-sonnet": (3.0, 15.0, 0.30, 3.75),
+    "claude-haiku": (1.0, 5.0, 0.10, 1.25),
+    "claude-opus": (15.0, 75.0, 1.50, 18.75),
+}
+
+GROUP_BY_COLUMNS = {
+    "user": UsageEvent.user_id,
+    "model": UsageEvent.model,
+    "conversation": UsageEvent.conversation_id,
+    "task": UsageEvent.task_id,
+}
+
+
+def estimate_cost(model: str, usage: dict) -> float | None:
+    """Estimate the USD cost of one call from MODEL_PRICES, or None if the model isn't priced."""
+    prices = MODEL_PRICES.get(model)
+    if not prices:
+        return None
+    input_price, output_price, cache_read_price, cache_write_price = prices
+    cache_read = usage.get("cache_read_tokens", 0)
+    cache_write = usage.get("cache_write_tokens", 0)
+    # prompt_tokens includes cached tokens in the OpenAI format
+    uncached = max(usage.get("prompt_tokens", 0) - cache_read - cache_write, 0)
+    return (
+        uncached * input_price
+        + usage.get("completion_tokens", 0) * output_price
+        + cache_read * cache_read_price
+        + cache_write * cache_write_price
+    ) / 1_000_000
+
+
+def record_usage(
+    db: AsyncSession,
+    *,
+    user_id: uuid.UUID,
+    model: str,
+    kind: str,
+    usage: dict,
+    latency_ms: int | None = None,
+    ttft_ms: int | None = None,
+    conversation_id: uuid.UUID | None = None,
+    task_id: uuid.UUID | None = None,
+    execution_id: uuid.UUID | None = None,
+) -> UsageEvent:
+    """Add a ledger row for one LLM call to the session (no flush)."""
+    event = UsageEvent(
+        user_id=user_id,
+        conversation_id=conversation_id,
+        task_id=task_id,
+        execution_id=execution_id,
+        kind=kind,
+        model=model,
+        prompt_tokens=usage.get("prompt_tokens", 0),
+        completion_tokens=usage.get("completion_tokens", 0),
+        cache_read_tokens=usage.get("cache_read_tokens", 0),
+        cache_write_tokens=usage.get("cache_write_tokens", 0),
+        total_tokens=usage.get("total_tokens", 0),
+        latency_ms=latency_ms,
+        ttft_ms=ttft_ms,
+        cost_usd=estimate_cost(model, usage),
+    )
+    db.add(event)
+    return event
+
+
+async def summarize_usage(
+    db: AsyncSession,
+    user_id: uuid.UUID,
+    group_by: str,
+    since: datetime | None = None,
+    until: datetime | None = None,
+) -> list[dict]:
+    """Aggregate a user's usage events by user, model, conversation or task."""
+    key = GROUP_BY_COLUMNS[group_by]
+    stmt = (
+        select(
+            key.label("key"),
+            func.count().label("calls"),
+            func.sum(UsageEvent.prompt_tokens).label("prompt_tokens"),
+            func.sum(UsageEvent.completion_tokens).label("completion_tokens"),
+            func.sum(UsageEvent.cache_read_tokens).label("cache_read_tokens"),
+            func.sum(UsageEvent.cache_write_tokens).label("cache_write_tokens"),
+            func.sum(UsageEvent.total_tokens).label("total_tokens"),
+            func.avg(UsageEvent.latency_ms).label("avg_latency_ms"),
+            func.avg(UsageEvent.ttft_ms).label("avg_ttft_ms"),
+            func.sum(UsageEvent.cost_usd).label("cost_usd"),
+        )
+        .where(UsageEvent.user_id == user_id)
+        .group_by(key)
+        .order_by(func.sum(UsageEvent.total_tokens).desc())
+    )
+    if since:
+        stmt = stmt.where(UsageEvent.created_at >= since)
+    if until:
+        stmt = stmt.where(UsageEvent.created_at < until)
+
+    result = await db.execute(stmt)
+    return [
+        {
+            **row._asdict(),
+            "key": str(row.key) if row.key is not None else None,
+            "avg_latency_ms": float(row.avg_latency_ms) if row.avg_latency_ms is not None else None,
+            "avg_ttft_ms": float(row.avg_ttft_ms) if row.avg_ttft_ms is not None else None,
+        }
+        for row in result
+    ]
+
+
+async def summarize_conversations(
+    db: AsyncSession,
+    user_id: uuid.UUID,
+    fast_model: str,
+    since: datetime | None = None,
+    until: datetime | None = None,
+) -> list[dict]:
+    """Per-conversation turn metrics: user-perceived TTFT, cascade hit rate and spend.
+
+    Compare two time windows (since/until) to measure a change such as enabling the cascade.
+    """
+    turns = (
+        select(
+            Message.conversation_id.label("conversation_id"),
+            func.count().label("turns"),
+            func.avg(Message.ttft_ms).label("avg_ttft_ms"),
+            func.count().filter(Message.model == fast_model).label("fast_model_turns"),
+        )
+        .join(Conversation, Conversation.id == Message.conversation_id)
+        .where(Conversation.user_id == user_id, Message.role == "assistant")
+        .group_by(Message.conversation_id)
+    )
+    spend = (
+        select(
+            UsageEvent.conversation_id.label("conversation_id"),
+            func.sum(UsageEvent.cost_usd).label("cost_usd"),
+            func.sum(UsageEvent.total_tokens).label("total_tokens"),
+        )
+        .where(UsageEvent.user_id == user_id, UsageEvent.conversation_id.is_not(None))
+        .group_by(UsageEvent.conversation_id)
+    )
+    if since:
+        turns = turns.where(Message.created_at >= since)
+        spend = spend.where(UsageEvent.created_at >= since)
+    if until:
+        turns = turns.where(Message.created_at < until)
+        spend = spend.where(UsageEvent.created_at < until)
+
+    turns = turns.subquery()
+    spend = spend.subquery()
+    result = await db.execute(
+        select(turns, spend.c.cost_usd, spend.c.total_tokens)
+        .outerjoin(spend, spend.c.conversation_id == turns.c.conversation_id)
+        .order_by(turns.c.turns.desc())
+    )
+    return [
+        {
+            "conversation_id": str(row.conversation_id),
+            "turns": row.turns,
+            "fast_model_turns": row.fast_model_turns,
+            "avg_ttft_ms": float(row.avg_ttft_ms) if row.avg_ttft_ms is not None else None,
+            "total_tokens": row.total_tokens or 0,
+            "cost_usd": row.cost_usd,
+            "avg_cost_per_turn_usd": row.cost_usd / row.turns if row.cost_usd is not None else None,
+        }
+        for row in result
+    ]
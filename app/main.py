@@ -7,7 +7,10 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
 from app.api.chat import router as chat_router
+from app.api.scheduler import router as scheduler_router
 from app.api.tasks import router as tasks_router
+from app.api.tools import router as tools_router
+from app.api.usage import router as usage_router
 from app.config import settings
 from app.core.memory import memory_manager
 from app.core.tools import tool_manager
@@ -17,6 +20,8 @@ from app.feishu.ws_listener import feishu_ws_listener
 from app.middleware.error_handler import global_exception_handler
 from app.middleware.logging import LoggingMiddleware
 from app.scheduler.engine import scheduler_engine
+from app.scheduler.leader import scheduler_leader
+from app.scheduler.queue import task_worker
 
 
 logger = structlog.get_logger()
@@ -43,21 +48,12 @@ def configure_logging():
     )
 
 
-async def _sync_scheduler_tasks():
-    """Restore active tasks from DB into the scheduler after restart."""
-    from sqlalchemy import select
-    from app.db.session import async_session
-    from app.models.scheduled_task import ScheduledTask
+async def _on_scheduler_elected():
+    await scheduler_engine.start()
 
-    async with async_session() as db:
-        result = await db.execute(
-            select(ScheduledTask).where(ScheduledTask.is_active.is_(True))
-        )
-        tasks = result.scalars().all()
-        for task in tasks:
-            scheduler_engine.add_task(task.id, task.cron_expression, task.timezone)
-        if tasks:
-            logger.info("scheduler.synced_tasks", count=len(tasks))
+
+async def _on_scheduler_demoted():
+    await scheduler_engine.shutdown()
 
 
 @asynccontextmanager
@@ -71,9 +67,10 @@ async def lifespan(app: FastAPI):
 
     # Initialize Phase 3: Scheduler
     if settings.SCHEDULER_ENABLED:
-        scheduler_engine.start()
-        # Sync active tasks from DB to scheduler
-        await _sync_scheduler_tasks()
+        # Only the elected leader runs the trigger loop
+        await scheduler_leader.start(on_elected=_on_scheduler_elected, on_demoted=_on_scheduler_demoted)
+    if settings.TASK_QUEUE_WORKERS > 0:
+        await task_worker.start()
 
     # Initialize Phase 4: Feishu
     if settings.FEISHU_ENABLED:
@@ -87,7 +84,9 @@ async def lifespan(app: FastAPI):
         await feishu_ws_listener.shutdown()
         await feishu_client.shutdown()
     if settings.SCHEDULER_ENABLED:
-        scheduler_engine.shutdown()
+        await scheduler_leader.stop()
+    if settings.TASK_QUEUE_WORKERS > 0:
+        await task_worker.stop()
     await tool_manager.shutdown()
     logger.info("app.shutdown")
 
@@ -110,6 +109,9 @@ app.add_exception_handler(Exception, global_exception_handler)
 # Routes
 app.include_router(chat_router)
 app.include_router(tasks_router)
+app.include_router(tools_router)
+app.include_router(scheduler_router)
+app.include_router(usage_router)
 app.include_router(feishu_router)
 
 # Serve static files (built frontend) if available
@@ -120,4 +122,4 @@ if static_dir.is_dir():
 
 @app.get("/health")
 async def health():
-    return {"status": "ok"}
+    return {"status": "ok", "mcp_servers": tool_manager.stats()}
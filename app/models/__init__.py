@@ -2,6 +2,20 @@ from app.models.conversation import Conversation
 from app.models.message import Message
 from app.models.scheduled_task import ScheduledTask
 from app.models.task_execution import TaskExecution
+from app.models.task_execution_payload import TaskExecutionPayload
+from app.models.task_queue_item import TaskQueueItem
+from app.models.tool_cache_entry import ToolCacheEntry
+from app.models.usage_event import UsageEvent
 from app.models.user import User
 
-__all__ = ["User", "Conversation", "Message", "ScheduledTask", "TaskExecution"]
+__all__ = [
+    "User",
+    "Conversation",
+    "Message",
+    "ScheduledTask",
+    "TaskExecution",
+    "TaskExecutionPayload",
+    "TaskQueueItem",
+    "ToolCacheEntry",
+    "UsageEvent",
+]
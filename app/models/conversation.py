@@ -1,6 +1,6 @@
 import uuid
 
-from sqlalchemy import ForeignKey, String
+from sqlalchemy import ForeignKey, Integer, String
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -12,6 +12,8 @@ class Conversation(Base, UUIDPrimaryKeyMixin, TimestampMixin):
 
     title: Mapped[str | None] = mapped_column(String(200), nullable=True)
     model: Mapped[str] = mapped_column(String(100))
+    # Running sum of messages.token_count
+    token_total: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
     user_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE")
     )
@@ -17,6 +17,10 @@ class Message(Base, UUIDPrimaryKeyMixin, TimestampMixin):
     content: Mapped[str] = mapped_column(Text)
     model: Mapped[str | None] = mapped_column(String(100), nullable=True)
     token_usage: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    # Approximate prompt cost of this message (app.core.tokens), computed at write time
+    token_count: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    # Streamed assistant replies: time from request to first content delta
+    ttft_ms: Mapped[int | None] = mapped_column(Integer, nullable=True)
 
     conversation: Mapped["Conversation"] = relationship(  # noqa: F821
         back_populates="messages"
@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, String, Text
+from sqlalchemy import Boolean, DateTime, ForeignKey, Index, String, Text, text
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -10,6 +10,8 @@ from app.db.base import Base, TimestampMixin, UUIDPrimaryKeyMixin
 
 class ScheduledTask(Base, UUIDPrimaryKeyMixin, TimestampMixin):
     __tablename__ = "scheduled_tasks"
+    # The scheduler's due-task query, see app.scheduler.engine
+    __table_args__ = (Index("ix_scheduled_tasks_due", "next_run_at", postgresql_where=text("is_active")),)
 
     user_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE")
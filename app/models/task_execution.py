@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import DateTime, ForeignKey, Integer, String, Text, func
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String, Text, func
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -14,7 +14,8 @@ class TaskExecution(Base, UUIDPrimaryKeyMixin):
     task_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), ForeignKey("scheduled_tasks.id", ondelete="CASCADE")
     )
-    status: Mapped[str] = mapped_column(String(20), default="pending")  # pending/running/success/failed
+    # pending/running/success/unchanged/failed
+    status: Mapped[str] = mapped_column(String(20), default="pending")
     started_at: Mapped[datetime | None] = mapped_column(
         DateTime(timezone=True), nullable=True
     )
@@ -22,16 +23,33 @@ class TaskExecution(Base, UUIDPrimaryKeyMixin):
         DateTime(timezone=True), nullable=True
     )
 
-    # Execution details
-    llm_messages: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
+    # Execution details; the LLM message log is in task_execution_payloads
     tool_calls_log: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
     result: Mapped[str | None] = mapped_column(Text, nullable=True)
     error: Mapped[str | None] = mapped_column(Text, nullable=True)
     token_usage: Mapped[int | None] = mapped_column(Integer, nullable=True)
     output_status: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
+    # Hash of the first round of tool results, for task_config.skip_if_unchanged
+    input_fingerprint: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    # Time between the run becoming due (after jitter/catch-up spacing) and a worker claiming it
+    queue_wait_ms: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    # Hash of model, tools and initial messages; executions with the same key share work (app.scheduler.shared_work)
+    work_key: Mapped[str | None] = mapped_column(String(64), nullable=True, index=True)
+    shared_from_id: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("task_executions.id", ondelete="SET NULL"), nullable=True
+    )
 
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now()
     )
 
     task: Mapped["ScheduledTask"] = relationship(back_populates="executions")  # noqa: F821
+
+
+# Execution history of a task, newest first (keyset pagination on created_at, id)
+Index(
+    "ix_task_executions_task_id_created_at",
+    TaskExecution.task_id,
+    TaskExecution.created_at.desc(),
+    TaskExecution.id.desc(),
+)
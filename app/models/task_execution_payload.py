@@ -0,0 +1,29 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Integer, LargeBinary, func
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class TaskExecutionPayload(Base):
+    """Compressed LLM message log of a task execution, see app.scheduler.execution_log.
+
+    Partitioned by month on created_at (partitions are created and dropped by the scheduler leader),
+    so the partition key is part of the primary key. This table is partitioned rather than
+    task_executions, whose id is the target of several foreign keys.
+    """
+
+    __tablename__ = "task_execution_payloads"
+    __table_args__ = {"postgresql_partition_by": "RANGE (created_at)"}
+
+    execution_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("task_executions.id", ondelete="CASCADE"), primary_key=True
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), primary_key=True, server_default=func.now()
+    )
+    llm_messages: Mapped[bytes] = mapped_column(LargeBinary)  # zlib-compressed JSON
+    raw_bytes: Mapped[int] = mapped_column(Integer)  # Size of the JSON before compression
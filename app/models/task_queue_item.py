@@ -0,0 +1,32 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String, Text, func
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base, TimestampMixin, UUIDPrimaryKeyMixin
+
+
+class TaskQueueItem(Base, UUIDPrimaryKeyMixin, TimestampMixin):
+    """One pending or claimed run of a scheduled task, see app.scheduler.queue."""
+
+    __tablename__ = "task_queue"
+    __table_args__ = (Index("ix_task_queue_claim", "status", "available_at"),)
+
+    task_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("scheduled_tasks.id", ondelete="CASCADE"), index=True
+    )
+    # Set for cron runs so replicas firing the same schedule enqueue it once
+    dedupe_key: Mapped[str | None] = mapped_column(String(100), unique=True, nullable=True)
+    status: Mapped[str] = mapped_column(String(20), default="queued")  # queued / running / done / failed
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    max_attempts: Mapped[int] = mapped_column(Integer)
+    available_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    locked_by: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    lease_expires_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Execution filled in by run_task: created by a manual trigger, or on the first claim of a cron run
+    execution_id: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("task_executions.id", ondelete="CASCADE"), nullable=True
+    )
@@ -0,0 +1,20 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, String, Text, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class ToolCacheEntry(Base):
+    """Shared MCP tool result, see app.core.tool_cache."""
+
+    __tablename__ = "tool_cache"
+
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)  # sha256 of tool + arguments
+    tool_name: Mapped[str] = mapped_column(String(100))
+    result: Mapped[str] = mapped_column(Text)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), index=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
@@ -1,112 +1,274 @@
 """
-Scheduler engine: APScheduler with PostgreSQL persistence.
+Scheduler engine: a native asyncio trigger loop over `scheduled_tasks.next_run_at`.
 
-Uses AsyncIOScheduler with SQLAlchemyJobStore for crash-resilient scheduling.
-Jobs survive process restarts because they're persisted in the DB.
+The next fire time is computed whenever a task is written (`reschedule`), and
+the write sends a NOTIFY on the `scheduled_tasks_changed` channel when its
+transaction commits. The loop runs only on the elected leader
+(app.scheduler.leader). It claims due rows with FOR UPDATE SKIP LOCKED, enqueues
+one run per row in the task queue (app.scheduler.queue) and advances
+next_run_at in the same transaction. Then it sleeps until the earliest
+next_run_at or a notification. Missed runs are coalesced into one; runs more
+than MISFIRE_GRACE late are skipped.
+
+To keep popular schedules (everyone's `0 9 * * *`) from hitting the LLM, Mem0
+and MCP servers at once, each run can be delayed by a stable offset within its
+task's jitter window (task_config.jitter_seconds), and runs that are already
+late when fired, e.g. after downtime, are released at SCHEDULER_CATCHUP_RATE.
+
+The leader also runs the hourly partition and retention pass of task execution
+logs (app.scheduler.execution_log).
 """
 
-import uuid
-from datetime import datetime, timezone
+import asyncio
+import hashlib
+import time
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 
 import structlog
-from apscheduler.events import EVENT_JOB_ERROR, EVENT_JOB_EXECUTED
-from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from sqlalchemy import func, or_, select, text, update
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
 
 from app.config import settings
+from app.db.session import async_session
+from app.models.scheduled_task import ScheduledTask
+from app.scheduler import execution_log
+from app.scheduler.queue import enqueue_statement, scheduled_run_key
 
 logger = structlog.get_logger()
 
+NOTIFY_CHANNEL = "scheduled_tasks_changed"
+MISFIRE_GRACE = timedelta(hours=1)
+DUE_BATCH = 100
+CATCHUP_AFTER = timedelta(minutes=1)  # Later than this when fired counts as catch-up
+
+
+@lru_cache(maxsize=4096)
+def _cron_trigger(cron_expression: str, timezone_str: str) -> CronTrigger:
+    return CronTrigger.from_crontab(cron_expression, timezone=timezone_str)
+
+
+def next_fire_time(cron_expression: str, timezone_str: str, after: datetime | None = None) -> datetime | None:
+    """First fire time of a 5-field cron schedule strictly after `after` (default: now).
+
+    Raises ValueError for an invalid expression and KeyError for an unknown timezone.
+    """
+    after = after or datetime.now(timezone.utc)
+    return _cron_trigger(cron_expression, timezone_str).get_next_fire_time(None, after + timedelta(microseconds=1))
 
-def _sync_db_url() -> str:
-    """Convert async DB URL to sync for APScheduler's jobstore."""
-    return settings.DATABASE_URL.replace("postgresql+asyncpg://", "postgresql+psycopg://")
+
+def jitter_offset(key: str, window: float) -> float:
+    """Stable pseudo-random delay in [0, window) seconds for a run, so retries of the same fire agree."""
+    if window <= 0:
+        return 0.0
+    return int.from_bytes(hashlib.sha256(key.encode()).digest()[:8]) / 2**64 * window
+
+
+def plan_next_runs(rows, after: datetime) -> tuple[list[dict], list]:
+    """Next run for each (id, cron_expression, timezone) row, computed once per distinct schedule.
+
+    Returns (bulk update parameters, ids with an invalid schedule); invalid ones get next_run_at None.
+    """
+    memo: dict[tuple[str, str], datetime | None] = {}
+    updates, invalid = [], []
+    for task_id, cron_expression, timezone_str in rows:
+        key = (cron_expression, timezone_str)
+        if key not in memo:
+            try:
+                memo[key] = next_fire_time(cron_expression, timezone_str, after=after)
+            except (ValueError, KeyError):
+                memo[key] = None
+        if memo[key] is None:
+            invalid.append(task_id)
+        updates.append({"id": task_id, "next_run_at": memo[key]})
+    return updates, invalid
 
 
 class SchedulerEngine:
     def __init__(self):
-        self._scheduler: AsyncIOScheduler | None = None
+        self._task: asyncio.Task | None = None
+        self._wake = asyncio.Event()
+        self._listen_engine = None
+        self._listen_conn: AsyncConnection | None = None
+        self._listener = None  # asyncpg connection with the LISTEN
+        self.last_reconcile: dict | None = None
+        self._catchup_next: datetime | None = None  # Earliest slot for the next late run
+        self.last_maintenance: dict | None = None
+        self._next_maintenance = 0.0
 
-    def start(self):
-        """Initialize and start the scheduler."""
-        jobstores = {
-            "default": SQLAlchemyJobStore(url=_sync_db_url())
-        }
-        self._scheduler = AsyncIOScheduler(
-            jobstores=jobstores,
-            job_defaults={
-                "coalesce": True,  # Combine missed runs into one
-                "max_instances": 1,  # Prevent overlapping executions
-                "misfire_grace_time": 3600,  # 1h grace for misfired jobs
-            },
-        )
-        self._scheduler.add_listener(self._on_job_event, EVENT_JOB_EXECUTED | EVENT_JOB_ERROR)
-        self._scheduler.start()
-        logger.info("scheduler.started", job_count=len(self._scheduler.get_jobs()))
-
-    def shutdown(self):
-        """Gracefully shutdown the scheduler."""
-        if self._scheduler:
-            self._scheduler.shutdown(wait=False)
-            logger.info("scheduler.shutdown")
+    async def reschedule(self, db: AsyncSession, task: ScheduledTask):
+        """Recompute a task's next_run_at after it was created or changed, and wake the trigger loop on commit."""
+        task.next_run_at = next_fire_time(task.cron_expression, task.timezone) if task.is_active else None
+        await db.execute(text(f"NOTIFY {NOTIFY_CHANNEL}"))
 
-    def add_task(self, task_id: uuid.UUID, cron_expression: str, timezone_str: str = "Asia/Shanghai"):
-        """Register a scheduled task as a cron job."""
-        if not self._scheduler:
-            logger.warning("scheduler.not_started")
+    async def start(self):
+        """Start the trigger loop (leader only)."""
+        if self._task:
             return
+        self._task = asyncio.create_task(self._run(), name="scheduler")
+        logger.info("scheduler.started")
+
+    async def shutdown(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+            logger.info("scheduler.shutdown")
+        await self._unlisten()
+
+    def wakeup(self):
+        self._wake.set()
+
+    async def _run(self):
+        reconciled = False
+        while True:
+            self._wake.clear()
+            try:
+                if not reconciled:
+                    await self.reconcile()
+                    reconciled = True
+                await self._ensure_listening()
+                delay = await self._fire_due()
+                await self._maybe_maintain()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("scheduler.loop_error")
+                await self._unlisten()
+                delay = settings.SCHEDULER_LEADER_INTERVAL
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), delay)
+                except TimeoutError:
+                    pass
+
+    async def _fire_due(self) -> float:
+        """Enqueue every due task and advance its next_run_at. Returns seconds until the next one is due."""
+        now = datetime.now(timezone.utc)
+        async with async_session() as db:
+            due = (await db.execute(
+                select(ScheduledTask)
+                .where(ScheduledTask.is_active.is_(True), ScheduledTask.next_run_at <= now)
+                .order_by(ScheduledTask.next_run_at)
+                .limit(DUE_BATCH)
+                .with_for_update(skip_locked=True)
+            )).scalars().all()
+
+            for task in due:
+                fire_time = task.next_run_at
+                if now - fire_time > MISFIRE_GRACE:
+                    logger.warning("scheduler.misfire_skipped", task_id=str(task.id), scheduled=fire_time.isoformat())
+                else:
+                    key = scheduled_run_key(str(task.id), fire_time)
+                    run_at = self._run_at(task, key, fire_time, now)
+                    await db.execute(enqueue_statement(task.id, key, available_at=run_at))
+                    logger.info(
+                        "scheduler.task_fired",
+                        task_id=str(task.id),
+                        scheduled=fire_time.isoformat(),
+                        run_at=run_at.isoformat(),
+                    )
+                try:
+                    task.next_run_at = next_fire_time(task.cron_expression, task.timezone, after=now)
+                except (ValueError, KeyError):
+                    logger.exception("scheduler.invalid_schedule", task_id=str(task.id))
+                    task.next_run_at = None
+
+            next_due = await db.scalar(
+                select(func.min(ScheduledTask.next_run_at)).where(ScheduledTask.is_active.is_(True))
+            )
+            await db.commit()
+
+        if len(due) == DUE_BATCH:
+            return 0
+        if next_due is None:
+            return settings.SCHEDULER_MAX_SLEEP
+        wait = (next_due - datetime.now(timezone.utc)).total_seconds()
+        return min(max(wait, 0), settings.SCHEDULER_MAX_SLEEP)
 
-        trigger = CronTrigger.from_crontab(cron_expression, timezone=timezone_str)
-        # Import here to avoid circular imports
-        from app.scheduler.task_runner import run_task
-
-        self._scheduler.add_job(
-            run_task,
-            trigger=trigger,
-            args=[str(task_id)],
-            id=str(task_id),
-            replace_existing=True,
-            name=f"task-{task_id}",
-        )
-        logger.info("scheduler.task_added", task_id=str(task_id), cron=cron_expression)
-
-    def remove_task(self, task_id: uuid.UUID):
-        """Remove a scheduled task."""
-        if not self._scheduler:
+    async def _maybe_maintain(self):
+        now = time.monotonic()
+        if now < self._next_maintenance:
             return
-        job_id = str(task_id)
-        if self._scheduler.get_job(job_id):
-            self._scheduler.remove_job(job_id)
-            logger.info("scheduler.task_removed", task_id=job_id)
-
-    def update_task(self, task_id: uuid.UUID, cron_expression: str, timezone_str: str = "Asia/Shanghai"):
-        """Update schedule for an existing task."""
-        if not self._scheduler:
+        self._next_maintenance = now + execution_log.MAINTENANCE_INTERVAL
+        try:
+            self.last_maintenance = await execution_log.maintain()
+        except Exception:
+            # Retention can wait for the next pass; firing triggers can't
+            logger.exception("scheduler.maintenance_failed")
+
+    def _run_at(self, task: ScheduledTask, key: str, fire_time: datetime, now: datetime) -> datetime:
+        """When a fired run becomes claimable: its jittered fire time, or a later catch-up slot."""
+        jitter = (task.task_config or {}).get("jitter_seconds", settings.SCHEDULER_DEFAULT_JITTER)
+        run_at = fire_time + timedelta(seconds=jitter_offset(key, float(jitter)))
+        rate = settings.SCHEDULER_CATCHUP_RATE
+        if rate > 0 and now - fire_time > CATCHUP_AFTER:
+            slot = max(now, self._catchup_next or now)
+            self._catchup_next = slot + timedelta(seconds=1 / rate)
+            run_at = max(run_at, slot)
+        return run_at
+
+    async def reconcile(self) -> dict:
+        """Bring next_run_at in line with every task's is_active and cron in one pass.
+
+        Clears it on paused tasks and recomputes it for active tasks that have none (e.g. created
+        before this loop existed) or that are too late to run, with one bulk UPDATE.
+        """
+        started = time.perf_counter()
+        now = datetime.now(timezone.utc)
+        async with async_session() as db:
+            cleared = (await db.execute(
+                update(ScheduledTask)
+                .where(ScheduledTask.is_active.is_(False), ScheduledTask.next_run_at.is_not(None))
+                .values(next_run_at=None)
+            )).rowcount
+            rows = (await db.execute(
+                select(ScheduledTask.id, ScheduledTask.cron_expression, ScheduledTask.timezone).where(
+                    ScheduledTask.is_active.is_(True),
+                    or_(ScheduledTask.next_run_at.is_(None), ScheduledTask.next_run_at < now - MISFIRE_GRACE),
+                )
+            )).all()
+            updates, invalid = plan_next_runs(rows, after=now)
+            if updates:
+                await db.execute(update(ScheduledTask), updates)
+            await db.commit()
+
+        self.last_reconcile = {
+            "at": now.isoformat(),
+            "cleared": cleared,
+            "rescheduled": len(updates) - len(invalid),
+            "invalid": [str(task_id) for task_id in invalid],
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+        if invalid:
+            logger.warning("scheduler.invalid_schedules", task_ids=self.last_reconcile["invalid"])
+        logger.info("scheduler.reconciled", **{k: v for k, v in self.last_reconcile.items() if k != "invalid"})
+        return self.last_reconcile
+
+    async def _ensure_listening(self):
+        if self._listener is not None and not self._listener.is_closed():
             return
-        job_id = str(task_id)
-        job = self._scheduler.get_job(job_id)
-        if job:
-            trigger = CronTrigger.from_crontab(cron_expression, timezone=timezone_str)
-            self._scheduler.reschedule_job(job_id, trigger=trigger)
-            logger.info("scheduler.task_updated", task_id=job_id, cron=cron_expression)
-        else:
-            # Job not in scheduler (e.g. after restart), re-add it
-            self.add_task(task_id, cron_expression, timezone_str)
-
-    def get_next_run_time(self, task_id: uuid.UUID) -> datetime | None:
-        """Get the next scheduled run time for a task."""
-        if not self._scheduler:
-            return None
-        job = self._scheduler.get_job(str(task_id))
-        return job.next_run_time if job else None
-
-    def _on_job_event(self, event):
-        """Log job execution results."""
-        if event.exception:
-            logger.error("scheduler.job_failed", job_id=event.job_id, error=str(event.exception))
-        else:
-            logger.info("scheduler.job_executed", job_id=event.job_id)
+        await self._unlisten()
+        if self._listen_engine is None:
+            self._listen_engine = create_async_engine(settings.DATABASE_URL, poolclass=NullPool)
+        self._listen_conn = await self._listen_engine.connect()
+        raw = await self._listen_conn.get_raw_connection()
+        self._listener = raw.driver_connection
+        await self._listener.add_listener(NOTIFY_CHANNEL, lambda *_: self._wake.set())
+
+    async def _unlisten(self):
+        self._listener = None
+        conn, self._listen_conn = self._listen_conn, None
+        if conn is not None:
+            try:
+                await conn.close()
+            except Exception:
+                await conn.invalidate()
+        if self._listen_engine is not None:
+            await self._listen_engine.dispose()
+            self._listen_engine = None
 
 
 scheduler_engine = SchedulerEngine()
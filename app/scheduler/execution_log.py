@@ -0,0 +1,186 @@
+"""
+Storage and retention of task execution logs.
+
+The LLM message log of a run, with every prompt and tool result, is most of
+an execution's size. It is stored zlib-compressed in `task_execution_payloads`
+rather than as JSONB on `task_executions`. That table is range-partitioned by
+month on created_at. The scheduler leader runs `maintain()` every
+MAINTENANCE_INTERVAL. It creates the partitions for the next months and drops
+whole partitions older than TASK_MESSAGES_RETENTION_DAYS, which needs no row
+deletes or vacuum. It also deletes executions older than their task's retention
+(task_config.retention_days, default TASK_EXECUTION_RETENTION_DAYS; 0 keeps them)
+in batches. `storage_stats` reports the compression ratio and table sizes.
+
+`task_executions` itself is deliberately not partitioned. On a partitioned
+table the primary key must include the partition column. Its `id` is
+referenced by task_queue, task_execution_payloads and its own shared_from_id,
+and foreign keys can't point at (id) alone. Once the message logs are moved
+out, its rows are small, so pruning them with batched deletes is cheap. The
+bulk of the data, the logs, is dropped by partition with no row deletes.
+"""
+
+import json
+import zlib
+from collections.abc import Iterable
+from datetime import date, datetime, timedelta, timezone
+
+import structlog
+from sqlalchemy import Integer, delete, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.db.session import async_session
+from app.models.scheduled_task import ScheduledTask
+from app.models.task_execution import TaskExecution
+from app.models.task_execution_payload import TaskExecutionPayload
+
+logger = structlog.get_logger()
+
+PARTITION_PREFIX = "task_execution_payloads_"
+PARTITIONS_AHEAD = 2  # Months after the current one that always have a partition
+MAINTENANCE_INTERVAL = 3600.0
+DELETE_BATCH = 5000
+COMPRESSION_LEVEL = 6
+
+PARTITIONS_QUERY = text("""
+    SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = 'task_execution_payloads'::regclass
+""")
+SIZES_QUERY = text("""
+    SELECT pg_total_relation_size('task_executions'),
+           (SELECT coalesce(sum(pg_total_relation_size(inhrelid)), 0)
+            FROM pg_inherits WHERE inhparent = 'task_execution_payloads'::regclass)
+""")
+
+
+def pack_messages(messages: list[dict]) -> tuple[bytes, int]:
+    """Compressed JSON of a message log, and its uncompressed size in bytes."""
+    raw = json.dumps(messages, ensure_ascii=False, separators=(",", ":")).encode()
+    return zlib.compress(raw, COMPRESSION_LEVEL), len(raw)
+
+
+def unpack_messages(data: bytes) -> list[dict]:
+    return json.loads(zlib.decompress(data))
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARTITION_PREFIX}{month:%Y_%m}"
+
+
+def partition_ddl(month: date) -> str:
+    """CREATE TABLE for the partition holding one UTC calendar month."""
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF task_execution_payloads "
+        f"FOR VALUES FROM ('{month} 00:00+00') TO ('{add_months(month, 1)} 00:00+00')"
+    )
+
+
+def expired_partitions(names: Iterable[str], cutoff: datetime) -> list[str]:
+    """Partitions whose whole month ended before `cutoff`."""
+    expired = []
+    for name in names:
+        try:
+            month = datetime.strptime(name.removeprefix(PARTITION_PREFIX), "%Y_%m").date()
+        except ValueError:
+            continue
+        end = add_months(month, 1)
+        if datetime(end.year, end.month, end.day, tzinfo=timezone.utc) <= cutoff:
+            expired.append(name)
+    return sorted(expired)
+
+
+async def store_messages(db: AsyncSession, execution: TaskExecution, messages: list[dict]):
+    """Add the compressed message log of a flushed execution.
+
+    Written in a savepoint: if it fails (e.g. no partition for this month yet), only the log is lost.
+    """
+    data, raw_bytes = pack_messages(messages)
+    try:
+        async with db.begin_nested():
+            db.add(TaskExecutionPayload(execution_id=execution.id, llm_messages=data, raw_bytes=raw_bytes))
+    except Exception:
+        logger.exception("execution_log.store_failed", execution_id=str(execution.id))
+
+
+async def load_messages(db: AsyncSession, execution_id) -> list[dict] | None:
+    """The message log of an execution, or None if it was never stored or has expired."""
+    data = await db.scalar(
+        select(TaskExecutionPayload.llm_messages)
+        .where(TaskExecutionPayload.execution_id == execution_id)
+        .order_by(TaskExecutionPayload.created_at.desc())
+        .limit(1)
+    )
+    return unpack_messages(data) if data is not None else None
+
+
+def expired_executions_query(default_days: int, limit: int):
+    """Ids of finished executions older than their task's retention_days (0 keeps them forever)."""
+    retention = func.coalesce(ScheduledTask.task_config["retention_days"].astext.cast(Integer), default_days)
+    return (
+        select(TaskExecution.id)
+        .join(ScheduledTask, ScheduledTask.id == TaskExecution.task_id)
+        .where(
+            retention > 0,
+            TaskExecution.status.not_in(("pending", "running")),
+            TaskExecution.created_at < func.now() - func.make_interval(0, 0, 0, retention),
+        )
+        .limit(limit)
+    )
+
+
+async def prune_executions() -> int:
+    """Delete expired executions in batches, so no single transaction holds many row locks."""
+    deleted = 0
+    while True:
+        async with async_session() as db:
+            batch = expired_executions_query(settings.TASK_EXECUTION_RETENTION_DAYS, DELETE_BATCH).scalar_subquery()
+            result = await db.execute(delete(TaskExecution).where(TaskExecution.id.in_(batch)))
+            await db.commit()
+        deleted += result.rowcount
+        if result.rowcount < DELETE_BATCH:
+            return deleted
+
+
+async def maintain() -> dict:
+    """Create upcoming payload partitions, drop expired ones and prune expired executions."""
+    now = datetime.now(timezone.utc)
+    current = date(now.year, now.month, 1)
+    dropped = []
+    async with async_session() as db:
+        for months in range(PARTITIONS_AHEAD + 1):
+            await db.execute(text(partition_ddl(add_months(current, months))))
+        if settings.TASK_MESSAGES_RETENTION_DAYS > 0:
+            names = (await db.execute(PARTITIONS_QUERY)).scalars().all()
+            for name in expired_partitions(names, now - timedelta(days=settings.TASK_MESSAGES_RETENTION_DAYS)):
+                await db.execute(text(f"DROP TABLE IF EXISTS {name}"))
+                dropped.append(name)
+        await db.commit()
+
+    summary = {"at": now.isoformat(), "dropped_partitions": dropped, "deleted_executions": await prune_executions()}
+    logger.info("execution_log.maintained", **summary)
+    return summary
+
+
+async def storage_stats(db: AsyncSession) -> dict:
+    """Message log sizes before and after compression, and the on-disk size of both tables."""
+    payloads, raw_bytes, stored_bytes = (await db.execute(
+        select(
+            func.count(),
+            func.coalesce(func.sum(TaskExecutionPayload.raw_bytes), 0),
+            func.coalesce(func.sum(func.octet_length(TaskExecutionPayload.llm_messages)), 0),
+        )
+    )).one()
+    executions_disk, payloads_disk = (await db.execute(SIZES_QUERY)).one()
+    return {
+        "payloads": payloads,
+        "raw_bytes": raw_bytes,
+        "stored_bytes": stored_bytes,
+        "compression_ratio": round(raw_bytes / stored_bytes, 2) if stored_bytes else None,
+        "task_executions_disk_bytes": executions_disk,
+        "payloads_disk_bytes": payloads_disk,
+    }
@@ -0,0 +1,158 @@
+"""
+Leader election for the scheduler trigger loop.
+
+Only the process holding a PostgreSQL session-level advisory lock runs the
+trigger loop (app.scheduler.engine). The lock lives on a dedicated
+connection, so Postgres releases it as soon as the leader exits or its
+connection drops. Followers try to take it every SCHEDULER_LEADER_INTERVAL
+seconds, which bounds failover time. The leader pings its connection on the
+same interval and steps down if a ping fails or stalls, so it never keeps
+firing triggers after it may have lost the lock.
+
+The leader connection's application_name identifies the holder, which lets any
+replica report the current leader from pg_locks / pg_stat_activity.
+"""
+
+import asyncio
+import os
+import socket
+from collections.abc import Awaitable, Callable
+
+import structlog
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.config import settings
+from app.db.session import async_session
+
+logger = structlog.get_logger()
+
+SCHEDULER_LOCK_KEY = 0x6B5F7363  # "k_sc"
+
+LEADER_QUERY = text("""
+    SELECT a.application_name, a.pid, a.backend_start, a.state_change, now() AS now
+    FROM pg_locks l JOIN pg_stat_activity a ON a.pid = l.pid
+    WHERE l.locktype = 'advisory' AND l.granted AND l.classid = 0 AND l.objid = :key AND l.objsubid = 1
+""")
+
+
+class LeaderElection:
+    def __init__(self, lock_key: int, interval: float, instance_id: str | None = None):
+        self.lock_key = lock_key
+        self.interval = interval
+        self.instance_id = instance_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.is_leader = False
+        self._conn: AsyncConnection | None = None
+        self._engine = None
+        self._task: asyncio.Task | None = None
+        self._on_elected: Callable[[], Awaitable[None]] | None = None
+        self._on_demoted: Callable[[], Awaitable[None]] | None = None
+        self._on_heartbeat: Callable[[], None] | None = None
+
+    async def start(
+        self,
+        on_elected: Callable[[], Awaitable[None]],
+        on_demoted: Callable[[], Awaitable[None]],
+        on_heartbeat: Callable[[], None] | None = None,
+    ):
+        self._on_elected = on_elected
+        self._on_demoted = on_demoted
+        self._on_heartbeat = on_heartbeat
+        self._task = asyncio.create_task(self._run(), name="leader-election")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self._step_down("shutdown")
+        if self._engine:
+            await self._engine.dispose()
+            self._engine = None
+
+    async def _run(self):
+        while True:
+            try:
+                if not self.is_leader:
+                    if await self._try_acquire():
+                        self.is_leader = True
+                        logger.info("scheduler.leader_elected", instance=self.instance_id)
+                        await self._on_elected()
+                elif await self._heartbeat():
+                    if self._on_heartbeat:
+                        self._on_heartbeat()
+                else:
+                    await self._step_down("heartbeat_failed")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("scheduler.leader_election_error", instance=self.instance_id)
+                await self._step_down("error")
+            await asyncio.sleep(self.interval)
+
+    async def _try_acquire(self) -> bool:
+        """Open a connection and try the lock on it; the connection is kept only if the lock was taken."""
+        if self._engine is None:
+            self._engine = create_async_engine(
+                settings.DATABASE_URL,
+                poolclass=NullPool,
+                isolation_level="AUTOCOMMIT",
+                connect_args={"server_settings": {"application_name": f"scheduler {self.instance_id}"[:63]}},
+            )
+        conn = await self._engine.connect()
+        try:
+            result = await conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": self.lock_key})
+            acquired = bool(result.scalar())
+        except BaseException:
+            await conn.close()
+            raise
+        if acquired:
+            self._conn = conn
+        else:
+            await conn.close()
+        return acquired
+
+    async def _heartbeat(self) -> bool:
+        try:
+            async with asyncio.timeout(self.interval):
+                await self._conn.execute(text("SELECT 1"))
+            return True
+        except Exception:
+            logger.warning("scheduler.leader_heartbeat_failed", instance=self.instance_id)
+            return False
+
+    async def _step_down(self, reason: str):
+        was_leader, self.is_leader = self.is_leader, False
+        if was_leader:
+            logger.warning("scheduler.leader_demoted", instance=self.instance_id, reason=reason)
+            try:
+                await self._on_demoted()
+            except Exception:
+                logger.exception("scheduler.on_demoted_failed")
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            # Closing the session releases the advisory lock
+            try:
+                async with asyncio.timeout(self.interval):
+                    await conn.close()
+            except Exception:
+                await conn.invalidate()
+
+    async def status(self) -> dict:
+        """Current lock holder as seen by Postgres, with how long it has held the lock and its last heartbeat."""
+        async with async_session() as db:
+            row = (await db.execute(LEADER_QUERY, {"key": self.lock_key})).first()
+        leader = None
+        if row:
+            leader = {
+                "id": row.application_name.removeprefix("scheduler "),
+                "pid": row.pid,
+                "since": row.backend_start.isoformat(),
+                "lease_age_s": round((row.now - row.backend_start).total_seconds(), 1),
+                "heartbeat_age_s": round((row.now - row.state_change).total_seconds(), 1),
+            }
+        return {"instance": self.instance_id, "is_leader": self.is_leader, "leader": leader}
+
+
+scheduler_leader = LeaderElection(SCHEDULER_LOCK_KEY, settings.SCHEDULER_LEADER_INTERVAL)
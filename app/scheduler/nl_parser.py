@@ -1,19 +1,33 @@
 """
 Natural language to scheduled task parser.
 
-Uses LLM function calling to extract cron expression and task config
-from user's natural language description.
+Common schedules ("每天早上9点…", "every Monday at 8:30") are parsed locally
+by app.scheduler.schedule_grammar; the rest of the description becomes the
+task prompt. Anything the grammar doesn't cover goes through LLM function
+calling. Results are cached by normalized description (and available tools),
+so creating the same kind of task twice doesn't call the LLM again.
 """
 
 import json
+import re
+import unicodedata
+from collections import OrderedDict
 
 import structlog
 
 from app.core.llm import llm_client
 from app.config import settings
+from app.scheduler.schedule_grammar import parse_schedule
 
 logger = structlog.get_logger()
 
+PARSE_CACHE_SIZE = 512
+LOCAL_NAME_MAX_CHARS = 50
+# Descriptions that ask for fresh information get the search tools
+SEARCH_HINTS = ("搜索", "查找", "新闻", "最新", "资讯", "search", "news", "latest", "look up")
+
+_parse_cache: OrderedDict[tuple[str, tuple[str, ...]], dict] = OrderedDict()
+
 SCHEDULE_TOOL = {
     "type": "function",
     "function": {
@@ -32,7 +46,8 @@ SCHEDULE_TOOL = {
                         "5-field cron expression for the schedule. "
                         "Format: minute hour day_of_month month day_of_week. "
                         "The cron should be in the user's local timezone (not UTC). "
-                        "Examples: '0 9 * * 1' = every Monday 9am, '30 8 * * *' = every day 8:30am"
+                        "Use day names for day_of_week. "
+                        "Examples: '0 9 * * mon' = every Monday 9am, '30 8 * * *' = every day 8:30am"
                     ),
                 },
                 "prompt": {
@@ -55,16 +70,73 @@ SCHEDULE_TOOL = {
 }
 
 
+def normalize_description(description: str) -> str:
+    """Cache key form of a description: NFKC (full-width to ASCII), case-folded, whitespace collapsed."""
+    return " ".join(unicodedata.normalize("NFKC", description).casefold().split())
+
+
+def _local_tools(description: str, available_tools: list[str]) -> list[str]:
+    """Tools named in the description, plus the search tools if it asks for fresh information."""
+    text = normalize_description(description)
+    wants_search = any(hint in text for hint in SEARCH_HINTS)
+    return [
+        name for name in available_tools
+        if name.lower() in text or name.lower().replace("_", " ") in text or (wants_search and "search" in name.lower())
+    ]
+
+
+def _local_name(prompt: str) -> str:
+    """First sentence of the prompt, shortened."""
+    name = re.split(r"[。!！?？\n]|\.(?:\s|$)", prompt, maxsplit=1)[0].strip() or prompt
+    if len(name) > LOCAL_NAME_MAX_CHARS:
+        name = name[: LOCAL_NAME_MAX_CHARS - 1].rstrip() + "…"
+    return name[:1].upper() + name[1:]
+
+
+def parse_locally(description: str, available_tools: list[str] | None = None) -> dict | None:
+    """Task config from the schedule grammar, or None if the description needs the LLM."""
+    match = parse_schedule(description)
+    if match is None:
+        return None
+    return {
+        "name": _local_name(match.remainder),
+        "cron_expression": match.cron_expression,
+        "prompt": match.remainder,
+        "tools": _local_tools(description, available_tools or []),
+        "model": settings.DEFAULT_MODEL,
+    }
+
+
 async def parse_task_description(
     description: str,
     timezone: str = "Asia/Shanghai",
     available_tools: list[str] | None = None,
 ) -> dict:
     """
-    Parse natural language into structured task config using LLM function calling.
+    Parse natural language into structured task config: locally when the schedule grammar matches,
+    otherwise with LLM function calling. The cron expression is in the task's own timezone, so
+    results are cached regardless of `timezone`.
 
     Returns dict with keys: name, cron_expression, prompt, tools, model
     """
+    key = (normalize_description(description), tuple(sorted(available_tools or ())))
+    result = _parse_cache.get(key)
+    if result is not None:
+        _parse_cache.move_to_end(key)
+        logger.info("nl_parser.cache_hit", cron=result["cron_expression"])
+    else:
+        result = parse_locally(description, available_tools)
+        if result is not None:
+            logger.info("nl_parser.parsed", source="rules", cron=result["cron_expression"], tools=result["tools"])
+        else:
+            result = await _parse_with_llm(description, timezone, available_tools)
+        _parse_cache[key] = result
+        while len(_parse_cache) > PARSE_CACHE_SIZE:
+            _parse_cache.popitem(last=False)
+    return {**result, "tools": list(result["tools"])}
+
+
+async def _parse_with_llm(description: str, timezone: str, available_tools: list[str] | None) -> dict:
     tools_hint = ""
     if available_tools:
         tools_hint = f"\nAvailable tools: {', '.join(available_tools)}"
@@ -78,7 +150,7 @@ async def parse_task_description(
                 "The cron expression should be in the user's local timezone. "
                 "Be precise with the schedule - if user says 'every morning' use 9:00, "
                 "'every evening' use 18:00. "
-                f"For 'every weekday' use day_of_week 1-5.{tools_hint}"
+                f"For 'every weekday' use day_of_week mon-fri.{tools_hint}"
             ),
         },
         {"role": "user", "content": description},
@@ -112,6 +184,7 @@ async def parse_task_description(
 
     logger.info(
         "nl_parser.parsed",
+        source="llm",
         name=result["name"],
         cron=result["cron_expression"],
         tools=result["tools"],
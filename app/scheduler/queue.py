@@ -0,0 +1,344 @@
+"""
+Durable task queue on PostgreSQL.
+
+The scheduler's trigger loop only inserts a row into `task_queue`; workers
+claim rows with SELECT ... FOR UPDATE SKIP LOCKED, so each run executes on
+exactly one worker and task throughput scales with the number of workers
+(TASK_QUEUE_WORKERS per process, or `python -m app.scheduler.worker`). A
+claimed row carries a lease that the worker renews while the task runs; if
+the worker dies, the lease expires and another worker picks the run up
+again. Failed runs are retried with exponential backoff until they reach
+max_attempts; every attempt fills in the same TaskExecution, which is
+created on the first claim and recorded on the run. TASK_QUEUE_MAX_RUNNING
+caps concurrent runs across all workers, so a burst of due tasks drains at
+a steady pace.
+"""
+
+import asyncio
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import NamedTuple
+
+import structlog
+from sqlalchemy import and_, delete, func, or_, select, text, update
+from sqlalchemy.dialects.postgresql import insert
+
+from app.config import settings
+from app.db.session import async_session
+from app.models.scheduled_task import ScheduledTask
+from app.models.task_execution import TaskExecution
+from app.models.task_queue_item import TaskQueueItem
+
+logger = structlog.get_logger()
+
+PURGE_INTERVAL = 3600.0
+CLAIM_LOCK_KEY = 0x6B5F7471  # "k_tq", serializes claims when TASK_QUEUE_MAX_RUNNING is set
+
+
+class ClaimedRun(NamedTuple):
+    id: uuid.UUID
+    task_id: uuid.UUID
+    attempts: int
+    max_attempts: int
+    queue_wait_ms: float  # From available_at to the claim
+    execution_id: uuid.UUID | None  # Pre-created by a manual trigger, or by an earlier attempt
+    manual: bool  # No dedupe key: queued by a manual trigger, not by the schedule
+
+
+def scheduled_run_key(task_id: str, fire_time: datetime) -> str:
+    """Dedupe key for a cron run, so a fire time is never enqueued twice (e.g. across a leader failover)."""
+    return f"{task_id}@{fire_time.astimezone(timezone.utc):%Y-%m-%dT%H:%M}"
+
+
+def retry_delay(attempts: int) -> float:
+    """Seconds to wait before retrying a run that has failed `attempts` times."""
+    return min(settings.TASK_QUEUE_RETRY_BASE * 2 ** (attempts - 1), settings.TASK_QUEUE_RETRY_MAX)
+
+
+def enqueue_statement(
+    task_id: str | uuid.UUID,
+    dedupe_key: str | None = None,
+    available_at: datetime | None = None,
+    execution_id: uuid.UUID | None = None,
+):
+    """INSERT of a queued run, claimable from `available_at` (default now).
+
+    With a dedupe key, a run that already exists is left alone. `execution_id` is the pending
+    TaskExecution the run should fill in (manual triggers); otherwise the first claim creates one.
+    """
+    values = {}
+    if available_at is not None:
+        values["available_at"] = available_at
+    stmt = insert(TaskQueueItem).values(
+        id=uuid.uuid4(),
+        task_id=uuid.UUID(str(task_id)),
+        dedupe_key=dedupe_key,
+        status="queued",
+        attempts=0,
+        max_attempts=settings.TASK_QUEUE_MAX_ATTEMPTS,
+        execution_id=execution_id,
+        **values,
+    )
+    if dedupe_key:
+        stmt = stmt.on_conflict_do_nothing(index_elements=["dedupe_key"])
+    return stmt
+
+
+async def enqueue(task_id: str | uuid.UUID, dedupe_key: str | None = None) -> bool:
+    """Queue a run of a task. Returns False if a run with the same dedupe key already exists."""
+    async with async_session() as db:
+        result = await db.execute(enqueue_statement(task_id, dedupe_key))
+        await db.commit()
+    queued = result.rowcount > 0
+    logger.info("task_queue.enqueued" if queued else "task_queue.duplicate", task_id=str(task_id), key=dedupe_key)
+    return queued
+
+
+def claim_statement(worker_id: str, lease_seconds: float, max_running: int = 0):
+    """UPDATE ... RETURNING that claims the oldest available run, skipping rows other workers hold.
+
+    With max_running, nothing is claimed while that many runs hold a live lease.
+    """
+    now = func.now()
+    candidate = select(TaskQueueItem.id).where(or_(
+        and_(TaskQueueItem.status == "queued", TaskQueueItem.available_at <= now),
+        # Lease ran out: the worker holding it is gone
+        and_(TaskQueueItem.status == "running", TaskQueueItem.lease_expires_at < now),
+    ))
+    if max_running > 0:
+        running = (
+            select(func.count())
+            .where(TaskQueueItem.status == "running", TaskQueueItem.lease_expires_at >= now)
+            .scalar_subquery()
+        )
+        candidate = candidate.where(running < max_running)
+    candidate = (
+        candidate
+        .order_by(TaskQueueItem.available_at)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    return (
+        update(TaskQueueItem)
+        .where(TaskQueueItem.id == candidate)
+        .values(
+            status="running",
+            attempts=TaskQueueItem.attempts + 1,
+            locked_by=worker_id,
+            lease_expires_at=now + timedelta(seconds=lease_seconds),
+            updated_at=now,
+        )
+        .returning(
+            TaskQueueItem.id,
+            TaskQueueItem.task_id,
+            TaskQueueItem.attempts,
+            TaskQueueItem.max_attempts,
+            func.extract("epoch", now - TaskQueueItem.available_at) * 1000,
+            TaskQueueItem.execution_id,
+            TaskQueueItem.dedupe_key.is_(None),
+        )
+    )
+
+
+async def claim(worker_id: str) -> ClaimedRun | None:
+    max_running = settings.TASK_QUEUE_MAX_RUNNING
+    async with async_session() as db:
+        if max_running > 0:
+            # Count-then-claim must not interleave between workers, or the cap could be overshot
+            await db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": CLAIM_LOCK_KEY})
+        stmt = claim_statement(worker_id, settings.TASK_QUEUE_LEASE_SECONDS, max_running)
+        row = (await db.execute(stmt)).first()
+        await db.commit()
+    return ClaimedRun(*row) if row else None
+
+
+async def _update_claimed(run: ClaimedRun, worker_id: str, **values) -> bool:
+    """Update a run this worker still holds; False if its lease was lost to another worker."""
+    async with async_session() as db:
+        result = await db.execute(
+            update(TaskQueueItem)
+            .where(TaskQueueItem.id == run.id, TaskQueueItem.locked_by == worker_id)
+            .values(updated_at=func.now(), **values)
+        )
+        await db.commit()
+    return result.rowcount > 0
+
+
+async def _attach_execution(run: ClaimedRun, worker_id: str) -> uuid.UUID | None:
+    """Create the pending execution of a scheduled run and record it on the run, so retries fill in the same one.
+
+    None if the task is gone or paused (run_task then skips it) or the lease was lost.
+    """
+    async with async_session() as db:
+        active = await db.scalar(select(ScheduledTask.is_active).where(ScheduledTask.id == run.task_id))
+        if not active:
+            return None
+        execution = TaskExecution(task_id=run.task_id, status="pending")
+        db.add(execution)
+        await db.flush()
+        execution_id = execution.id
+        result = await db.execute(
+            update(TaskQueueItem)
+            .where(TaskQueueItem.id == run.id, TaskQueueItem.locked_by == worker_id)
+            .values(execution_id=execution_id, updated_at=func.now())
+        )
+        if result.rowcount == 0:
+            await db.rollback()
+            return None
+        await db.commit()
+    return execution_id
+
+
+async def _fail_execution(execution_id: uuid.UUID, error: str):
+    """Mark a run's execution failed, unless an attempt already finished it."""
+    async with async_session() as db:
+        await db.execute(
+            update(TaskExecution)
+            .where(TaskExecution.id == execution_id, TaskExecution.status.in_(("pending", "running")))
+            .values(status="failed", error=error, finished_at=func.now())
+        )
+        await db.commit()
+
+
+async def purge_finished(older_than: timedelta) -> int:
+    async with async_session() as db:
+        result = await db.execute(
+            delete(TaskQueueItem).where(
+                TaskQueueItem.status.in_(("done", "failed")),
+                TaskQueueItem.updated_at < func.now() - older_than,
+            )
+        )
+        await db.commit()
+    return result.rowcount
+
+
+class TaskWorker:
+    """Claims queued runs and executes them with run_task, `concurrency` at a time."""
+
+    def __init__(self, concurrency: int, worker_id: str | None = None):
+        self.concurrency = concurrency
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self._loops: list[asyncio.Task] = []
+        self._stopping = asyncio.Event()
+        self._last_purge = 0.0
+
+    async def start(self):
+        self._stopping.clear()
+        self._loops = [
+            asyncio.create_task(self._loop(i), name=f"task-worker-{i}") for i in range(self.concurrency)
+        ]
+        logger.info("task_queue.worker_started", worker=self.worker_id, concurrency=self.concurrency)
+
+    async def stop(self):
+        """Stop claiming and cancel runs in progress; those are put back on the queue."""
+        self._stopping.set()
+        for loop in self._loops:
+            loop.cancel()
+        await asyncio.gather(*self._loops, return_exceptions=True)
+        self._loops = []
+        logger.info("task_queue.worker_stopped", worker=self.worker_id)
+
+    async def _loop(self, index: int):
+        worker_id = f"{self.worker_id}/{index}"
+        while not self._stopping.is_set():
+            try:
+                run = await claim(worker_id)
+                if run:
+                    await self._process(run, worker_id)
+                    continue
+                if index == 0:
+                    await self._maybe_purge()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("task_queue.loop_error", worker=worker_id)
+            try:
+                await asyncio.wait_for(self._stopping.wait(), settings.TASK_QUEUE_POLL_INTERVAL)
+            except TimeoutError:
+                pass
+
+    async def _process(self, run: ClaimedRun, worker_id: str):
+        from app.scheduler.task_runner import run_task
+
+        log = logger.bind(task_id=str(run.task_id), run_id=str(run.id), attempt=run.attempts, worker=worker_id)
+        if run.attempts > run.max_attempts:
+            # Reclaimed after its last attempt's worker died
+            error = "Lease expired on the last attempt"
+            await _update_claimed(run, worker_id, status="failed", last_error=error)
+            if run.execution_id:
+                await _fail_execution(run.execution_id, error)
+            log.error("task_queue.abandoned")
+            return
+
+        execution_id = run.execution_id or await _attach_execution(run, worker_id)
+        heartbeat = asyncio.create_task(self._heartbeat(run, worker_id))
+        try:
+            status = await run_task(
+                str(run.task_id),
+                queue_wait_ms=max(int(run.queue_wait_ms), 0),
+                execution_id=execution_id,
+                manual=run.manual,
+                final_attempt=run.attempts >= run.max_attempts,
+            )
+            error = "Task execution failed" if status == "failed" else None
+        except asyncio.CancelledError:
+            # Shutting down: hand the run to another worker without using up an attempt.
+            # run_task has put the execution back to pending for it.
+            await asyncio.shield(_update_claimed(
+                run, worker_id, status="queued", attempts=run.attempts - 1, locked_by=None, lease_expires_at=None
+            ))
+            raise
+        except Exception as e:
+            log.exception("task_queue.run_error")
+            error = f"{type(e).__name__}: {e}"
+        finally:
+            heartbeat.cancel()
+
+        if error is None:
+            await _update_claimed(run, worker_id, status="done", lease_expires_at=None)
+            log.info("task_queue.done", status=status)
+        elif run.attempts < run.max_attempts:
+            delay = retry_delay(run.attempts)
+            await _update_claimed(
+                run,
+                worker_id,
+                status="queued",
+                last_error=error,
+                locked_by=None,
+                lease_expires_at=None,
+                available_at=func.now() + timedelta(seconds=delay),
+            )
+            log.warning("task_queue.retry", error=error, retry_in=delay)
+        else:
+            await _update_claimed(run, worker_id, status="failed", last_error=error, lease_expires_at=None)
+            log.error("task_queue.failed", error=error)
+
+    async def _heartbeat(self, run: ClaimedRun, worker_id: str):
+        lease = settings.TASK_QUEUE_LEASE_SECONDS
+        while True:
+            await asyncio.sleep(lease / 3)
+            try:
+                held = await _update_claimed(
+                    run, worker_id, lease_expires_at=func.now() + timedelta(seconds=lease)
+                )
+            except Exception:
+                logger.exception("task_queue.heartbeat_failed", run_id=str(run.id))
+                continue
+            if not held:
+                logger.warning("task_queue.lease_lost", run_id=str(run.id), worker=worker_id)
+                return
+
+    async def _maybe_purge(self):
+        now = asyncio.get_running_loop().time()
+        if now - self._last_purge < PURGE_INTERVAL:
+            return
+        self._last_purge = now
+        purged = await purge_finished(timedelta(days=settings.TASK_QUEUE_RETENTION_DAYS))
+        if purged:
+            logger.info("task_queue.purged", count=purged)
+
+
+task_worker = TaskWorker(settings.TASK_QUEUE_WORKERS)
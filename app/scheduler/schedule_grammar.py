@@ -0,0 +1,291 @@
+"""
+Rule-based parsing of common schedule phrases into cron expressions.
+
+Covers Chinese and English phrasings of minute and hour intervals, and of
+daily, weekday, weekend, weekly and monthly schedules at a time of day. For
+example: "每天早上9点", "每周一、三下午3点半", "每月1号10:00",
+"every Monday at 8:30", "weekdays at 6pm". Anything else returns None and is
+left to the LLM (app.scheduler.nl_parser): one-off times, several times a day,
+"every other week", ambiguous English hours ("every Friday at 5"), or leftover
+text that still looks like a schedule.
+
+Day-of-week fields use names (mon-fri). APScheduler's from_crontab reads
+numeric days with Monday as 0, unlike standard cron, but reads names the same way.
+"""
+
+import re
+import unicodedata
+from typing import NamedTuple
+
+DAY_NAMES = ["sun", "mon", "tue", "wed", "thu", "fri", "sat"]  # Index = cron day of week
+
+_CN_DIGITS = {
+    "零": 0, "〇": 0, "一": 1, "二": 2, "两": 2, "三": 3, "四": 4, "五": 5, "六": 6, "七": 7, "八": 8, "九": 9,
+}
+_CN_WEEKDAYS = {"一": 1, "二": 2, "三": 3, "四": 4, "五": 5, "六": 6, "日": 0, "天": 0, "7": 0}
+_CN_WEEKDAYS.update({str(day): day for day in range(1, 7)})
+
+_CN_NUM = r"[0-9零〇一二两三四五六七八九十]{1,3}"
+_CN_WEEK = r"(?:周|星期|礼拜)"
+_CN_WEEKDAY = r"[一二三四五六日天1-7]"
+_CN_RANGE = r"到|至|-|~"
+_CN_SCHEDULE = re.compile(
+    rf"每隔?\s*(?P<every_minutes>{_CN_NUM})\s*分钟"
+    rf"|(?P<hourly>每隔?\s*(?:(?P<every_hours>{_CN_NUM})\s*个?)?\s*小时)"
+    r"|(?:"
+    r"(?P<daily>每天|每日|天天)|(?P<daily_am>每早)|(?P<daily_pm>每晚)"
+    rf"|(?P<weekdays>每个?工作日|工作日|每个?{_CN_WEEK}一\s*(?:{_CN_RANGE})\s*{_CN_WEEK}?五)"
+    r"|(?P<weekend>每个?周末)"
+    rf"|每个?{_CN_WEEK}(?P<days>{_CN_WEEKDAY}(?:\s*(?:、|,|和|及|与|{_CN_RANGE})\s*{_CN_WEEK}?{_CN_WEEKDAY})*)"
+    rf"|每个?月\s*(?P<dom>{_CN_NUM})\s*[号日]"
+    r")\s*的?\s*"
+    r"(?P<period>早上|早晨|清晨|上午|中午|下午|傍晚|晚上|夜里|夜间|凌晨)?\s*"
+    rf"(?:(?P<hour>{_CN_NUM})\s*(?:点|时|:)\s*(?:(?P<minute>半|一刻|三刻|{_CN_NUM})\s*分?|整)?)?"
+)
+_CN_PERIOD_DEFAULTS = {"早上": 9, "早晨": 9, "清晨": 9, "上午": 9, "傍晚": 18, "晚上": 18}
+_CN_PM = {"下午", "傍晚", "晚上", "夜里", "夜间"}
+_CN_NIGHT = {"晚上", "夜里", "夜间", "凌晨"}  # 12点 is midnight
+
+_EN_DAY = (
+    r"(?:mon(?:day)?|tue(?:s|sday)?|wed(?:nesday)?|thu(?:r|rs|rsday)?|fri(?:day)?|sat(?:urday)?|sun(?:day)?)s?"
+)
+_EN_SCHEDULE = re.compile(
+    r"\b(?:"
+    r"every\s+(?P<every_minutes>\d+)\s+min(?:ute)?s?"
+    r"|(?P<hourly>every\s+(?:(?P<every_hours>\d+)\s+)?hours?|hourly)"
+    r"|(?P<daily>every\s*day|each\s+day|daily)"
+    r"|(?:every|each)\s+(?P<daily_period>morning|evening|night)"
+    r"|(?P<weekdays>(?:(?:every|each|on)\s+)?weekdays?|(?:every|each)\s+working\s+day"
+    r"|mon(?:day)?\s*(?:to|through|thru|-)\s*fri(?:day)?)"
+    r"|(?P<weekend>(?:(?:every|each|on)\s+)?weekends?)"
+    rf"|(?:every|each|on)\s+(?P<days>{_EN_DAY}(?:\s*(?:,|and|&|to|through|-)\s*{_EN_DAY})*)"
+    r"|(?:(?:every|each)\s+month|monthly)\s+on\s+the\s+(?P<dom>\d{1,2})(?:st|nd|rd|th)?"
+    r"|on\s+the\s+(?P<dom_of>\d{1,2})(?:st|nd|rd|th)?\s+(?:day\s+)?of\s+(?:every|each|the)\s+month"
+    r")\b",
+    re.IGNORECASE,
+)
+_EN_TIME = (
+    r"(?:(?P<at>at|@)\s*)?"
+    r"(?:(?P<noon>noon|midday)|(?P<midnight>midnight)"
+    r"|(?P<hour>\d{1,2})(?:[:.](?P<minute>\d{2}))?(?:\s*(?P<ampm>[ap]\.?m\b\.?))?(?:\s*o'?clock)?)"
+    r"(?:\s+(?:in\s+the\s+)?(?P<period>morning|afternoon|evening|night))?"
+)
+_EN_TIME_AFTER = re.compile(r"[\s,]*" + _EN_TIME + r"\b", re.IGNORECASE)
+_EN_TIME_BEFORE = re.compile(_EN_TIME + r"[\s,]*\Z", re.IGNORECASE)
+_EN_PERIOD_DEFAULTS = {"morning": 9, "evening": 18, "night": 18}
+
+# Schedule-like text left after the match: several times, one-off dates... the LLM must decide
+_LEFTOVER = re.compile(
+    r"[0-9零〇一二两三四五六七八九十]\s*(?:点|时|号)|每|周[一二三四五六日天]|星期"
+    r"|明天|后天|今晚|下周"
+    r"|\d\s*[ap]\.?m\b|\d:\d\d"
+    r"|早上|早晨|清晨|上午|中午|下午|傍晚|晚上|夜里|凌晨"
+    r"|\bat\s*\d|\b(?:in\s+the\s+)?(?:morning|afternoon|evening)\b|\bat\s+night\b"
+    r"|\b(?:every|daily|weekly|monthly|hourly|tomorrow|tonight|noon|midnight|o'?clock)\b",
+    re.IGNORECASE,
+)
+# A further time right after the schedule ("at 9 and 18", "9点和18点")
+_TRAILING_TIME = re.compile(r"[\s,，、]*(?:(?:and|or|then|&|和|及|与)\s*)?(?:at\s*)?\d", re.IGNORECASE)
+_EDGE = " ,，。.、;；:：!！"
+_LEADING_CONNECTOR = re.compile(r"^(?:(?:and|then|please)\b|[,，])\s*", re.IGNORECASE)
+
+
+class ScheduleMatch(NamedTuple):
+    cron_expression: str
+    remainder: str  # The description without the schedule phrase
+
+
+def _number(token: str) -> int:
+    """Arabic or Chinese numeral below 100 ("9", "十二", "二十五"); ValueError otherwise."""
+    if token.isdigit():
+        return int(token)
+    tens, ten, ones = token.partition("十")
+    if not ten:
+        return _cn_digit(token)
+    return (_cn_digit(tens) if tens else 1) * 10 + (_cn_digit(ones) if ones else 0)
+
+
+def _cn_digit(token: str) -> int:
+    if token not in _CN_DIGITS:
+        raise ValueError(f"Not a numeral: {token}")
+    return _CN_DIGITS[token]
+
+
+def _day_field(days: list[int]) -> str:
+    unique = sorted(set(days), key=lambda day: (day - 1) % 7)  # Monday first
+    if unique == [1, 2, 3, 4, 5]:
+        return "mon-fri"
+    return ",".join(DAY_NAMES[day] for day in unique)
+
+
+def _expand_days(tokens: list[tuple[int | None, bool]]) -> list[int]:
+    """Days from (day, is_range_separator) tokens; "一到三" covers 1, 2 and 3 (wrapping past Sunday)."""
+    days: list[int] = []
+    in_range = False
+    for day, is_range in tokens:
+        if is_range:
+            in_range = bool(days)
+        elif in_range:
+            start = days[-1]
+            days.extend((start + offset) % 7 for offset in range(1, (day - start) % 7 + 1))
+            in_range = False
+        else:
+            days.append(day)
+    return days
+
+
+def _cron(minute: int, hour: int, day_of_month: str = "*", day_of_week: str = "*") -> str | None:
+    if not (0 <= minute <= 59 and 0 <= hour <= 23):
+        return None
+    return f"{minute} {hour} {day_of_month} * {day_of_week}"
+
+
+def _interval_cron(m: re.Match) -> str | None:
+    """Cron for "every N minutes/hours", if N divides the hour/day evenly (else the runs would drift)."""
+    if m["every_minutes"]:
+        every = _number(m["every_minutes"])
+        return f"*/{every} * * * *" if 1 <= every <= 30 and 60 % every == 0 else None
+    every = _number(m["every_hours"]) if m["every_hours"] else 1
+    if every == 1:
+        return "0 * * * *"
+    return f"0 */{every} * * *" if 1 < every <= 12 and 24 % every == 0 else None
+
+
+def _parse_chinese(text: str) -> tuple[str, int, int] | None:
+    for m in _CN_SCHEDULE.finditer(text):
+        try:
+            cron = _chinese_cron(m)
+        except ValueError:
+            cron = None
+        if cron:
+            return cron, m.start(), m.end()
+    return None
+
+
+def _chinese_cron(m: re.Match) -> str | None:
+    if m["every_minutes"] or m["hourly"]:
+        return _interval_cron(m)
+
+    period = m["period"] or ("早上" if m["daily_am"] else "晚上" if m["daily_pm"] else None)
+    if m["hour"] is None:
+        if period not in _CN_PERIOD_DEFAULTS:
+            return None
+        hour, minute = _CN_PERIOD_DEFAULTS[period], 0
+    else:
+        hour = _number(m["hour"])
+        minute = {"半": 30, "一刻": 15, "三刻": 45}.get(m["minute"]) if m["minute"] else 0
+        if minute is None:
+            minute = _number(m["minute"])
+        if period in _CN_NIGHT and hour == 12:
+            hour = 0
+        elif period in _CN_PM and hour < 12 or period == "中午" and hour < 6:
+            hour += 12
+
+    if m["daily"] or m["daily_am"] or m["daily_pm"]:
+        return _cron(minute, hour)
+    if m["weekdays"]:
+        return _cron(minute, hour, day_of_week="mon-fri")
+    if m["weekend"]:
+        return _cron(minute, hour, day_of_week="sat,sun")
+    if m["days"]:
+        tokens = [
+            (None, True) if token in ("到", "至", "-", "~") else (_CN_WEEKDAYS[token], False)
+            for token in re.findall(rf"{_CN_WEEKDAY}|{_CN_RANGE}", re.sub(_CN_WEEK, "", m["days"]))
+        ]
+        return _cron(minute, hour, day_of_week=_day_field(_expand_days(tokens)))
+    day_of_month = _number(m["dom"])
+    return _cron(minute, hour, day_of_month=str(day_of_month)) if 1 <= day_of_month <= 31 else None
+
+
+def _english_time(m: re.Match | None, day_period: str | None = None) -> tuple[int, int] | None:
+    """(hour, minute) of a time match, if it is clearly a time ("at 17", "9:30", "9pm", not a bare "9").
+
+    `day_period` is the part of day named by the schedule itself ("every evening"), for times that don't say.
+    A whole hour from 1 to 11 with neither am/pm nor a part of day ("at 5") could be either, so it's None.
+    """
+    if m is None:
+        return None
+    if m["noon"]:
+        return 12, 0
+    if m["midnight"]:
+        return 0, 0
+    if not (m["at"] or m["minute"] or m["ampm"] or m["period"]):
+        return None
+    hour, minute = int(m["hour"]), int(m["minute"] or 0)
+    ampm = (m["ampm"] or "").lower()[:1]
+    period = (m["period"] or day_period or "").lower()
+    if ampm and not 1 <= hour <= 12:
+        return None
+    if not (ampm or period or m["minute"]) and 1 <= hour <= 11:
+        return None
+    if ampm == "a" and hour == 12 or not ampm and period in ("evening", "night") and hour == 12:
+        hour = 0
+    elif (ampm == "p" or not ampm and period in ("afternoon", "evening", "night")) and hour < 12:
+        hour += 12
+    return hour, minute
+
+
+def _parse_english(text: str) -> tuple[str, int, int] | None:
+    for m in _EN_SCHEDULE.finditer(text):
+        start, end = m.start(), m.end()
+        if m["every_minutes"] or m["hourly"]:
+            interval = _interval_cron(m)
+            if interval:
+                return interval, start, end
+            continue
+
+        after = _EN_TIME_AFTER.match(text, end)
+        before = _EN_TIME_BEFORE.search(text, 0, start)
+        time = _english_time(after, m["daily_period"])
+        if time:
+            end = after.end()
+        else:
+            time = _english_time(before, m["daily_period"])
+            if time:
+                start = before.start()
+            elif m["daily_period"]:
+                time = _EN_PERIOD_DEFAULTS[m["daily_period"].lower()], 0
+            else:
+                continue
+        hour, minute = time
+
+        if m["daily"] or m["daily_period"]:
+            cron = _cron(minute, hour)
+        elif m["weekdays"]:
+            cron = _cron(minute, hour, day_of_week="mon-fri")
+        elif m["weekend"]:
+            cron = _cron(minute, hour, day_of_week="sat,sun")
+        elif m["days"]:
+            tokens = [
+                (None, True) if token.lower() in ("to", "through", "-") else (DAY_NAMES.index(token[:3].lower()), False)
+                for token in re.findall(rf"{_EN_DAY}|\bto\b|\bthrough\b|-", m["days"], re.IGNORECASE)
+            ]
+            cron = _cron(minute, hour, day_of_week=_day_field(_expand_days(tokens)))
+        else:
+            day_of_month = int(m["dom"] or m["dom_of"])
+            cron = _cron(minute, hour, day_of_month=str(day_of_month)) if 1 <= day_of_month <= 31 else None
+        if cron:
+            return cron, start, end
+    return None
+
+
+def parse_schedule(description: str) -> ScheduleMatch | None:
+    """Cron expression of the schedule in a description, and the description without it.
+
+    None when no supported schedule is found, when nothing but the schedule is left, or when the rest
+    still mentions times or dates.
+    """
+    text = unicodedata.normalize("NFKC", description).strip()
+    for parse, joiner in ((_parse_chinese, ""), (_parse_english, " ")):
+        found = parse(text)
+        if found is None:
+            continue
+        cron, start, end = found
+        if _TRAILING_TIME.match(text, end):
+            return None
+        remainder = " ".join(f"{text[:start].strip()}{joiner}{text[end:].strip()}".split()).strip(_EDGE)
+        remainder = _LEADING_CONNECTOR.sub("", remainder).strip(_EDGE)
+        if not remainder or _LEFTOVER.search(remainder):
+            return None
+        return ScheduleMatch(cron, remainder)
+    return None
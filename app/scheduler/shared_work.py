@@ -0,0 +1,136 @@
+"""
+Shared execution of identical scheduled task work.
+
+Different users' tasks often ask for the same thing (same prompt, tools and
+model) at the same time. run_task hashes everything that determines the LLM
+and tool work, including the task's memory context, into a work key. The first
+execution with a key does the work while holding a PostgreSQL advisory lock on
+it. Scheduled executions of other tasks with the same key wait for the lock
+and then reuse the result if it finished within TASK_SHARE_WINDOW seconds; each
+still records its own TaskExecution (`shared_from_id` points at the one that
+did the work) and sends to its own output targets. A task never reuses its own
+earlier run, and manual runs always do the work.
+
+The lock is taken on a dedicated connection outside the application's pool.
+Waiters poll with a fresh connection each time, so they hold none between polls.
+"""
+
+import asyncio
+import hashlib
+import json
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+
+import structlog
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.config import settings
+from app.models.task_execution import TaskExecution
+
+logger = structlog.get_logger()
+
+LOCK_POLL_INTERVAL = 1.0
+
+# Closing a connection of this engine disconnects it, which releases its session-level locks
+_lock_engine = create_async_engine(settings.DATABASE_URL, poolclass=NullPool, isolation_level="AUTOCOMMIT")
+
+
+def work_key(model: str, tools: list[dict] | None, messages: list[dict]) -> str:
+    """sha256 of the canonical model, tool names and initial messages of a run."""
+    canonical = json.dumps(
+        {
+            "model": model,
+            "tools": sorted(t["function"]["name"] for t in tools or []),
+            "messages": messages,
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def _lock_id(key: str) -> int:
+    return int.from_bytes(bytes.fromhex(key[:16]), signed=True)
+
+
+async def _try_lock(lock_id: int) -> AsyncConnection | None:
+    """A new connection holding the advisory lock, or None (and no connection) if it is taken."""
+    conn = await _lock_engine.connect()
+    try:
+        if (await conn.execute(text("SELECT pg_try_advisory_lock(:id)"), {"id": lock_id})).scalar():
+            return conn
+    except BaseException:
+        await conn.close()
+        raise
+    await conn.close()
+    return None
+
+
+@asynccontextmanager
+async def work_lock(key: str | None) -> AsyncIterator[None]:
+    """Hold the advisory lock for a work key; no-op without a key.
+
+    The holder keeps one connection outside the application pool; waiters reconnect for each
+    pg_try_advisory_lock poll and hold no connection while they sleep.
+    """
+    if key is None:
+        yield
+        return
+    waited = False
+    while (conn := await _try_lock(_lock_id(key))) is None:
+        waited = True
+        await asyncio.sleep(LOCK_POLL_INTERVAL)
+    if waited:
+        logger.info("shared_work.waited", key=key[:12])
+    try:
+        yield
+    finally:
+        await conn.close()
+
+
+def shared_query(execution: TaskExecution, since: datetime):
+    """Latest successful execution of the same work by another task, finished since `since`."""
+    return (
+        select(TaskExecution)
+        .where(
+            TaskExecution.work_key == execution.work_key,
+            TaskExecution.task_id != execution.task_id,
+            TaskExecution.status == "success",
+            TaskExecution.shared_from_id.is_(None),
+            TaskExecution.finished_at >= since,
+        )
+        .order_by(TaskExecution.finished_at.desc())
+        .limit(1)
+    )
+
+
+async def find_shared(db: AsyncSession, execution: TaskExecution) -> TaskExecution | None:
+    """Another task's execution of the same work that finished within the share window."""
+    since = datetime.now(timezone.utc) - timedelta(seconds=settings.TASK_SHARE_WINDOW)
+    return (await db.execute(shared_query(execution, since))).scalar_one_or_none()
+
+
+async def sharing_stats(db: AsyncSession, since: datetime) -> dict:
+    """How many executions since `since` reused another's work, and the tokens that saved."""
+    source = TaskExecution.__table__.alias("source")
+    executions, shared, tokens_saved = (await db.execute(
+        select(
+            func.count(TaskExecution.id),
+            func.count(TaskExecution.shared_from_id),
+            func.coalesce(func.sum(source.c.token_usage), 0),
+        )
+        .select_from(TaskExecution)
+        .outerjoin(source, source.c.id == TaskExecution.shared_from_id)
+        .where(TaskExecution.created_at >= since, TaskExecution.status.in_(("success", "unchanged", "failed")))
+    )).one()
+    return {
+        "since": since.isoformat(),
+        "executions": executions,
+        "shared": shared,
+        "dedup_ratio": round(shared / executions, 4) if executions else 0.0,
+        "tokens_saved": tokens_saved,
+    }
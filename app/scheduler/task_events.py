@@ -0,0 +1,137 @@
+"""
+Live events of a task execution, for streaming manually triggered runs.
+
+The run may execute on any worker or replica, so events travel over
+PostgreSQL NOTIFY on one channel, tagged with the execution id. LLM deltas are
+batched (at most every DELTA_FLUSH_INTERVAL seconds) to keep notifications few,
+and payloads are cut to fit NOTIFY's 8000-byte limit. Subscribers only see
+events sent after they started listening; the final `done` event carries the
+whole result. A failed attempt that the queue will retry sends `retrying`
+instead, and the stream goes on with the next attempt.
+
+Event names match the chat stream: `status`, `message` ({"content": delta}),
+`tool_call`, `tool_result` and `done`, plus `retrying` ({"error": ...}).
+"""
+
+import asyncio
+import json
+import time
+import uuid
+from collections.abc import AsyncIterator
+
+import structlog
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.config import settings
+from app.db.session import engine
+
+logger = structlog.get_logger()
+
+CHANNEL = "task_execution_events"
+DELTA_FLUSH_INTERVAL = 0.2
+MAX_PAYLOAD_BYTES = 7500  # NOTIFY payloads must be under 8000 bytes
+MAX_DELTA_CHARS = 1000  # Even at 6 bytes per escaped character, a delta fits MAX_PAYLOAD_BYTES
+KEEPALIVE_INTERVAL = 15.0  # Subscribers get a `keepalive` after this long without events
+
+
+def _json_size(value) -> int:
+    return len(json.dumps(value, ensure_ascii=False).encode())
+
+
+def _clip(message: dict) -> dict:
+    """Cut the largest fields of `message["data"]` until the encoded message fits MAX_PAYLOAD_BYTES.
+
+    Non-string values that must be cut (e.g. tool arguments) are sent as truncated JSON text.
+    """
+    data = dict(message["data"])
+    while (excess := _json_size(message | {"data": data}) - MAX_PAYLOAD_BYTES) > 0:
+        key = max(data, key=lambda k: _json_size(data[k]), default=None)
+        value = data.get(key)
+        raw = (value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)).encode()
+        # Escaping never shrinks text, so dropping `excess` raw bytes (plus room for the "…") is enough
+        clipped = raw[:max(len(raw) - excess - 8, 0)].decode(errors="ignore") + "…"
+        if clipped == value:
+            break  # Nothing left to cut
+        data[key] = clipped
+    return message | {"data": data}
+
+
+class TaskEventPublisher:
+    def __init__(self, execution_id: uuid.UUID):
+        self.execution_id = str(execution_id)
+        self._conn = None
+        self._delta = ""
+        self._last_flush = time.monotonic()
+
+    async def emit(self, event: str, data: dict):
+        await self._flush_delta()
+        await self._notify(event, data)
+
+    async def delta(self, content: str):
+        self._delta += content
+        if time.monotonic() - self._last_flush >= DELTA_FLUSH_INTERVAL or len(self._delta) >= MAX_DELTA_CHARS:
+            await self._flush_delta()
+
+    async def close(self):
+        await self._flush_delta()
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+
+    async def _flush_delta(self):
+        self._last_flush = time.monotonic()
+        while self._delta:
+            chunk, self._delta = self._delta[:MAX_DELTA_CHARS], self._delta[MAX_DELTA_CHARS:]
+            await self._notify("message", {"content": chunk})
+
+    async def _notify(self, event: str, data: dict):
+        payload = json.dumps(
+            _clip({"execution_id": self.execution_id, "event": event, "data": data}), ensure_ascii=False
+        )
+        try:
+            if self._conn is None:
+                self._conn = await engine.connect()
+                await self._conn.execution_options(isolation_level="AUTOCOMMIT")
+            await self._conn.execute(
+                text("SELECT pg_notify(:channel, :payload)"), {"channel": CHANNEL, "payload": payload}
+            )
+        except Exception:
+            # Live progress is best effort; the run itself must not fail because of it
+            logger.warning("task_events.notify_failed", execution_id=self.execution_id, event=event)
+
+
+async def subscribe(execution_id: uuid.UUID) -> AsyncIterator[tuple[str, dict]]:
+    """Yield (event, data) for one execution until its `done` event.
+
+    The first item is a local `listening` event, sent once LISTEN is active: a caller that checks the
+    execution's status after it can't miss a run that finishes in between. A local `keepalive` follows
+    every KEEPALIVE_INTERVAL seconds without events, so callers can re-check the status in case `done`
+    was lost (e.g. the worker died) and keep idle connections open.
+    """
+    listen_engine = create_async_engine(settings.DATABASE_URL, poolclass=NullPool)
+    queue: asyncio.Queue[tuple[str, dict]] = asyncio.Queue()
+    wanted = str(execution_id)
+
+    def on_notify(_conn, _pid, _channel, payload: str):
+        message = json.loads(payload)
+        if message["execution_id"] == wanted:
+            queue.put_nowait((message["event"], message["data"]))
+
+    try:
+        async with listen_engine.connect() as conn:
+            raw = (await conn.get_raw_connection()).driver_connection
+            await raw.add_listener(CHANNEL, on_notify)
+            yield "listening", {}
+            while True:
+                try:
+                    event, data = await asyncio.wait_for(queue.get(), KEEPALIVE_INTERVAL)
+                except TimeoutError:
+                    event, data = "keepalive", {}
+                yield event, data
+                if event == "done":
+                    break
+            await raw.remove_listener(CHANNEL, on_notify)
+    finally:
+        await listen_engine.dispose()
@@ -1,5 +1,5 @@
 """
-Task runner: executes scheduled tasks when triggered by APScheduler.
+Task runner: executes scheduled tasks claimed from the task queue.
 
 Flow:
 1. Load task_config from DB
@@ -7,24 +7,38 @@ Flow:
 3. Build prompt with context
 4. Call LLM (with tool execution loop)
 5. Record execution log
+
+With task_config.skip_if_unchanged, the first round of tool results is
+fingerprinted; if it matches the previous run, the execution is recorded as
+`unchanged` without the summarization call or output dispatch. Otherwise,
+identical work by other tasks is run once and shared (app.scheduler.shared_work).
 """
 
+import asyncio
+import hashlib
 import json
 import uuid
+from contextlib import AsyncExitStack
 from dataclasses import asdict
 from datetime import datetime, timezone
 
 import structlog
 from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
-from app.core.llm import LLMResponse, llm_client
+from app.core.llm import LLMResponse, StreamUsage, ToolCall, llm_client, merge_usage
 from app.core.memory import memory_manager
+from app.core.tool_output import compact_tool_result, digest_tool_results
 from app.core.tools import tool_manager
+from app.core.usage import record_usage
 from app.db.session import async_session
 from app.models.scheduled_task import ScheduledTask
 from app.models.task_execution import TaskExecution
 from app.output.router import dispatch
+from app.scheduler.execution_log import load_messages, store_messages
+from app.scheduler.shared_work import find_shared, work_key, work_lock
+from app.scheduler.task_events import TaskEventPublisher
 
 logger = structlog.get_logger()
 
@@ -37,16 +51,183 @@ TASK_SYSTEM_PROMPT = (
 MAX_TOOL_ROUNDS = 10
 
 
-async def run_task(task_id: str):
+def _record_llm_call(
+    db: AsyncSession, task: ScheduledTask, execution: TaskExecution, model: str, response: LLMResponse
+):
+    """Add a usage ledger row for one LLM call of a task execution."""
+    record_usage(
+        db,
+        user_id=task.user_id,
+        model=model,
+        kind="task",
+        usage=response.usage,
+        latency_ms=response.latency_ms,
+        task_id=task.id,
+        execution_id=execution.id,
+    )
+
+
+def fingerprint_tool_results(results: list[tuple[str, str]]) -> str:
+    """Hash (tool name, result) pairs, ignoring whitespace, line order and repeated lines."""
+    normalized = sorted(
+        f"{name}\x00{line}"
+        for name, text in results
+        for line in {" ".join(raw.split()) for raw in text.splitlines()}
+        if line
+    )
+    return hashlib.sha256("\n".join(normalized).encode()).hexdigest()
+
+
+async def _previous_run_with_fingerprint(db: AsyncSession, execution: TaskExecution) -> TaskExecution | None:
+    """The task's latest earlier run, if it completed with the same input fingerprint."""
+    previous = (await db.execute(
+        select(TaskExecution)
+        .where(
+            TaskExecution.task_id == execution.task_id,
+            TaskExecution.id != execution.id,
+            TaskExecution.status.in_(("success", "unchanged")),
+        )
+        .order_by(TaskExecution.created_at.desc())
+        .limit(1)
+    )).scalar_one_or_none()
+    if previous and previous.input_fingerprint == execution.input_fingerprint:
+        return previous
+    return None
+
+
+async def _complete(
+    messages: list[dict], model: str, tools: list[dict] | None, events: TaskEventPublisher | None
+) -> LLMResponse:
+    """One LLM call; streamed when someone is watching the run, so they see the text as it's written."""
+    if events is None:
+        return await llm_client.complete(messages, model, tools=tools)
+    response = LLMResponse()
+    async for item in llm_client.stream(messages, model, tools=tools):
+        if isinstance(item, str):
+            response.content += item
+            await events.delta(item)
+        elif isinstance(item, ToolCall):
+            response.tool_calls.append(item)
+        elif isinstance(item, StreamUsage):
+            response.usage = item.usage
+            response.latency_ms = item.latency_ms
+    return response
+
+
+async def _run_tool_loop(
+    db: AsyncSession,
+    task: ScheduledTask,
+    execution: TaskExecution,
+    messages: list[dict],
+    model: str,
+    tools: list[dict] | None,
+    skip_if_unchanged: bool,
+    events: TaskEventPublisher | None = None,
+) -> tuple[LLMResponse, list[dict], dict, TaskExecution | None]:
+    """Call the LLM and execute its tool calls until it answers, appending to `messages`.
+
+    Returns (final response, tool calls log, total usage, previous run if the inputs were unchanged).
+    """
+    tool_calls_log = []
+    unchanged_since: TaskExecution | None = None
+    response = await _complete(messages, model, tools, events)
+    _record_llm_call(db, task, execution, model, response)
+    total_usage = response.usage
+
+    for round_index in range(MAX_TOOL_ROUNDS):
+        if not response.has_tool_calls:
+            break
+
+        # Append assistant message
+        messages.append({
+            "role": "assistant",
+            "content": response.content or None,
+            "tool_calls": [
+                {
+                    "id": tc.id,
+                    "type": "function",
+                    "function": {"name": tc.name, "arguments": tc.arguments},
+                }
+                for tc in response.tool_calls
+            ],
+        })
+
+        # Execute tools
+        round_results = []
+        for tc in response.tool_calls:
+            try:
+                arguments = json.loads(tc.arguments)
+            except json.JSONDecodeError:
+                arguments = {}
+            if events:
+                await events.emit("tool_call", {"tool": tc.name, "arguments": arguments})
+            round_results.append((tc, arguments, await tool_manager.execute_tool(tc.name, arguments)))
+
+        # The first round's results are the task's inputs; stop here if they match the last run
+        if round_index == 0 and skip_if_unchanged:
+            execution.input_fingerprint = fingerprint_tool_results(
+                [(tc.name, result) for tc, _, result in round_results]
+            )
+            unchanged_since = await _previous_run_with_fingerprint(db, execution)
+
+        digest_tool_results(messages)
+        for tc, arguments, tool_result in round_results:
+            if not unchanged_since:  # The run stops after this round: no summaries needed
+                tool_result, summary = await compact_tool_result(
+                    tc.name, tool_result, tool_manager.get_tool_options(tc.name)
+                )
+                if summary:
+                    _record_llm_call(db, task, execution, settings.TOOL_SUMMARY_MODEL, summary)
+            messages.append({
+                "role": "tool",
+                "tool_call_id": tc.id,
+                "content": tool_result,
+            })
+            if events:
+                await events.emit("tool_result", {"tool": tc.name, "result": tool_result})
+            tool_calls_log.append({
+                "tool": tc.name,
+                "arguments": arguments,
+                "result": tool_result[:500],  # Truncate for log
+            })
+        if unchanged_since:
+            # Stop with the tool results answered, so the stored transcript stays valid
+            break
+
+        response = await _complete(messages, model, tools, events)
+        _record_llm_call(db, task, execution, model, response)
+        total_usage = merge_usage(total_usage, response.usage)
+    else:
+        if response.has_tool_calls:
+            response = await _complete(messages, model, None, events)
+            _record_llm_call(db, task, execution, model, response)
+            total_usage = merge_usage(total_usage, response.usage)
+
+    return response, tool_calls_log, total_usage, unchanged_since
+
+
+async def run_task(
+    task_id: str,
+    queue_wait_ms: int | None = None,
+    execution_id: uuid.UUID | None = None,
+    manual: bool = False,
+    final_attempt: bool = True,
+) -> str | None:
     """
-    Execute a scheduled task. Called by APScheduler.
+    Execute a scheduled task. Called by the task queue worker, with how long the run waited to be claimed.
+
+    `execution_id` is the execution to fill in (created by the API or an earlier attempt of the run).
+    Manual runs also run paused tasks, and their progress is published for
+    GET /api/tasks/{id}/executions/{id}/events. If cancelled, or failed with the queue still to retry
+    it (not `final_attempt`), the execution is put back to pending for the next attempt.
 
     This runs in a standalone context (no HTTP request), so we manage our own DB session.
+    Returns the execution status, or None if the task is missing or inactive.
     """
     log = logger.bind(task_id=task_id)
     log.info("task_runner.start")
 
-    async with async_session() as db:
+    async with AsyncExitStack() as stack, async_session() as db:
         # Load task from DB
         result = await db.execute(
             select(ScheduledTask).where(ScheduledTask.id == uuid.UUID(task_id))
@@ -54,24 +235,33 @@ async def run_task(task_id: str):
         task = result.scalar_one_or_none()
         if not task:
             log.error("task_runner.task_not_found")
-            return
-        if not task.is_active:
+            return None
+        if not task.is_active and not manual:
             log.info("task_runner.task_inactive")
-            return
+            return None
 
-        # Create execution record
-        execution = TaskExecution(
-            task_id=task.id,
-            status="running",
-            started_at=datetime.now(timezone.utc),
-        )
-        db.add(execution)
+        # Create execution record, or pick up the one the queued run carries
+        execution = await db.get(TaskExecution, execution_id) if execution_id else None
+        if execution is None:
+            execution = TaskExecution(task_id=task.id)
+            db.add(execution)
+        execution.status = "running"
+        execution.error = None
+        execution.started_at = datetime.now(timezone.utc)
+        execution.finished_at = None
+        execution.queue_wait_ms = queue_wait_ms
         await db.flush()
 
+        events = TaskEventPublisher(execution.id) if manual else None
+        if events:
+            stack.push_async_callback(events.close)
+            await events.emit("status", {"status": "running"})
+
         config = task.task_config or {}
         model = config.get("model", settings.DEFAULT_MODEL)
         prompt = config.get("prompt", task.description or "")
         tool_names = config.get("tools", [])
+        skip_if_unchanged = config.get("skip_if_unchanged", False)
 
         try:
             # Retrieve relevant memories
@@ -92,6 +282,8 @@ async def run_task(task_id: str):
 
             # Get tools schema if task uses tools
             tools = None
+            if tool_names:
+                await tool_manager.ensure_connected()
             if tool_names and tool_manager.has_tools:
                 all_tools = tool_manager.get_tools_schema()
                 if tool_names != ["*"]:
@@ -99,64 +291,49 @@ async def run_task(task_id: str):
                 else:
                     tools = all_tools
 
-            # Tool execution loop
-            tool_calls_log = []
-            response: LLMResponse = await llm_client.complete(messages, model, tools=tools)
-
-            for _ in range(MAX_TOOL_ROUNDS):
-                if not response.has_tool_calls:
-                    break
-
-                # Append assistant message
-                messages.append({
-                    "role": "assistant",
-                    "content": response.content or None,
-                    "tool_calls": [
-                        {
-                            "id": tc.id,
-                            "type": "function",
-                            "function": {"name": tc.name, "arguments": tc.arguments},
-                        }
-                        for tc in response.tool_calls
-                    ],
-                })
+            shared_from: TaskExecution | None = None
+            if settings.TASK_SHARE_WINDOW > 0 and not skip_if_unchanged:
+                execution.work_key = work_key(model, tools, messages)
+                # Held until after the final commit, so executions waiting on it see this one's result
+                await stack.enter_async_context(work_lock(execution.work_key))
+                if not manual:  # Someone asked for this run now: do the work, but let others share it
+                    shared_from = await find_shared(db, execution)
 
-                # Execute tools
-                for tc in response.tool_calls:
-                    try:
-                        arguments = json.loads(tc.arguments)
-                    except json.JSONDecodeError:
-                        arguments = {}
-
-                    tool_result = await tool_manager.execute_tool(tc.name, arguments)
-                    messages.append({
-                        "role": "tool",
-                        "tool_call_id": tc.id,
-                        "content": tool_result,
-                    })
-                    tool_calls_log.append({
-                        "tool": tc.name,
-                        "arguments": arguments,
-                        "result": tool_result[:500],  # Truncate for log
-                    })
-
-                response = await llm_client.complete(messages, model, tools=tools)
+            if shared_from:
+                # Identical work just ran for another task: reuse it, but send to this task's outputs
+                execution.shared_from_id = shared_from.id
+                messages = await load_messages(db, shared_from.id) or messages
+                tool_calls_log = shared_from.tool_calls_log or []
+                total_usage = {"total_tokens": 0}
+                content = shared_from.result
+                unchanged_since = None
+                log.info("task_runner.shared", source=str(shared_from.id))
             else:
-                if response.has_tool_calls:
-                    response = await llm_client.complete(messages, model, tools=None)
+                response, tool_calls_log, total_usage, unchanged_since = await _run_tool_loop(
+                    db, task, execution, messages, model, tools, skip_if_unchanged, events
+                )
+                content = response.content
+
+            execution.token_usage = total_usage.get("total_tokens")
+            await store_messages(db, execution, messages)
+            execution.tool_calls_log = tool_calls_log if tool_calls_log else None
+
+            if unchanged_since:
+                # Nothing new: keep the previous result and don't send it again
+                execution.status = "unchanged"
+                execution.result = unchanged_since.result
+                log.info("task_runner.unchanged", since=str(unchanged_since.id), tokens=execution.token_usage)
+                return execution.status
 
             # Update execution record
             execution.status = "success"
-            execution.result = response.content
-            execution.token_usage = response.usage.get("total_tokens")
-            execution.llm_messages = messages
-            execution.tool_calls_log = tool_calls_log if tool_calls_log else None
+            execution.result = content
 
             # Dispatch output if configured
             output_config = config.get("output")
             if output_config and execution.status == "success":
                 try:
-                    send_results = await dispatch(output_config, response.content)
+                    send_results = await dispatch(output_config, content)
                     execution.output_status = [asdict(r) for r in send_results]
                 except Exception:
                     log.exception("task_runner.output_failed")
@@ -168,7 +345,30 @@ async def run_task(task_id: str):
             execution.error = str(e)
             log.exception("task_runner.failed")
 
+        except asyncio.CancelledError:
+            # The worker is shutting down and re-queues the run, which will fill in this execution
+            execution.status = "pending"
+            execution.started_at = None
+            log.warning("task_runner.interrupted")
+            raise
+
         finally:
-            execution.finished_at = datetime.now(timezone.utc)
-            task.last_run_at = execution.finished_at
+            outcome = execution.status
+            if outcome == "failed" and not final_attempt:
+                # Keeps the error; the queue's next attempt fills in this execution again
+                execution.status = "pending"
+            if execution.status != "pending":
+                execution.finished_at = datetime.now(timezone.utc)
+                task.last_run_at = execution.finished_at
             await db.commit()
+            if events and execution.status != "pending":
+                await events.emit("done", {
+                    "status": execution.status,
+                    "result": execution.result,
+                    "error": execution.error,
+                    "token_usage": execution.token_usage,
+                })
+            elif events and outcome == "failed":
+                await events.emit("retrying", {"error": execution.error})
+
+        return outcome
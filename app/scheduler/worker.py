@@ -0,0 +1,52 @@
+"""
+Standalone task worker: executes queued task runs without serving HTTP.
+
+    python -m app.scheduler.worker [--concurrency N]
+
+Run as many of these as needed next to API replicas started with
+TASK_QUEUE_WORKERS=0.
+"""
+
+import argparse
+import asyncio
+import signal
+
+import structlog
+
+from app.config import settings
+from app.core.memory import memory_manager
+from app.core.tools import tool_manager
+from app.feishu.client import feishu_client
+from app.main import configure_logging
+from app.scheduler.queue import TaskWorker
+
+logger = structlog.get_logger()
+
+
+async def main(concurrency: int):
+    configure_logging()
+    await memory_manager.initialize()
+    await tool_manager.initialize()
+    if settings.FEISHU_ENABLED:
+        await feishu_client.initialize()
+
+    worker = TaskWorker(concurrency)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    await worker.start()
+    await stop.wait()
+    await worker.stop()
+
+    if settings.FEISHU_ENABLED:
+        await feishu_client.shutdown()
+    await tool_manager.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Execute queued scheduled task runs.")
+    parser.add_argument("--concurrency", type=int, default=max(settings.TASK_QUEUE_WORKERS, 1))
+    args = parser.parse_args()
+    asyncio.run(main(args.concurrency))
@@ -18,6 +18,8 @@ class MessageOut(BaseModel):
     content: str
     model: str | None = None
     token_usage: int | None = None
+    token_count: int | None = None
+    ttft_ms: int | None = None
     created_at: datetime
 
 
@@ -27,6 +29,7 @@ class ConversationOut(BaseModel):
     id: uuid.UUID
     title: str | None = None
     model: str
+    token_total: int = 0
     created_at: datetime
     updated_at: datetime
 
@@ -50,5 +50,18 @@ class TaskExecutionOut(BaseModel):
     result: str | None = None
     error: str | None = None
     token_usage: int | None = None
+    queue_wait_ms: int | None = None
+    shared_from_id: uuid.UUID | None = None
     output_status: dict | None = None
     created_at: datetime
+
+
+class TaskExecutionDetailOut(TaskExecutionOut):
+    tool_calls_log: list[dict] | None = None
+    llm_messages: list[dict] | None = None  # None once the log has expired (TASK_MESSAGES_RETENTION_DAYS)
+    input_fingerprint: str | None = None
+
+
+class TaskExecutionPage(BaseModel):
+    items: list[TaskExecutionOut]
+    next_cursor: str | None = None  # Pass as `cursor` for the next, older page; None on the last page
@@ -0,0 +1,24 @@
+from pydantic import BaseModel
+
+
+class UsageSummaryOut(BaseModel):
+    key: str | None = None  # user/model/conversation/task id, depending on group_by
+    calls: int
+    prompt_tokens: int
+    completion_tokens: int
+    cache_read_tokens: int
+    cache_write_tokens: int
+    total_tokens: int
+    avg_latency_ms: float | None = None
+    avg_ttft_ms: float | None = None
+    cost_usd: float | None = None
+
+
+class ConversationUsageOut(BaseModel):
+    conversation_id: str
+    turns: int
+    fast_model_turns: int
+    avg_ttft_ms: float | None = None
+    total_tokens: int
+    cost_usd: float | None = None
+    avg_cost_per_turn_usd: float | None = None
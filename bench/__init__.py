@@ -0,0 +1 @@
+"""Load, latency and regression benchmarking tools (not imported by the app)."""
@@ -0,0 +1,268 @@
+"""
+Deterministic OpenAI-compatible LLM stand-in for load and latency testing.
+
+Point the app at it with LITELLM_BASE_URL=http://localhost:4001/v1.
+
+Usage:
+    python -m bench.fake_llm --port 4001 --ttft-ms 300 --tps 60 --script bench/script.json
+
+Script file (JSON list, first matching rule wins, matched against the last user message):
+    [
+      {"match": "news", "tool_call": {"name": "web_search", "arguments": {"query": "{message}"}}},
+      {"match": "hello", "reply": "Hi! How can I help?"}
+    ]
+
+A tool_call rule fires only if the request offers that tool. Once a tool result is the
+last message, the server answers with text, so the app's tool loop terminates.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import time
+import uuid
+from dataclasses import dataclass, field
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+_WORDS = (
+    "the assistant reviewed your request and prepared a concise answer with relevant "
+    "details context notes steps results summary data source update schedule task "
+    "search news model latency token stream memory tool"
+).split()
+
+
+@dataclass
+class FakeLLMConfig:
+    ttft_ms: float = 200.0
+    tokens_per_second: float = 50.0
+    reply_tokens: int = 40
+    error_rate: float = 0.0
+    error_status: int = 500
+    seed: int = 0
+    script: list[dict] = field(default_factory=list)
+
+
+def _count_tokens(text: str) -> int:
+    return max(1, len(text.split()))
+
+
+def _prompt_tokens(messages: list[dict]) -> int:
+    total = 0
+    for msg in messages:
+        total += 4 + _count_tokens(msg.get("content") or "")
+    return total
+
+
+def _last_user_message(messages: list[dict]) -> str:
+    for msg in reversed(messages):
+        if msg.get("role") == "user":
+            return msg.get("content") or ""
+    return ""
+
+
+def _fill_message(value, message: str):
+    """Replace "{message}" in every string of a scripted tool call's arguments."""
+    if isinstance(value, str):
+        return value.replace("{message}", message)
+    if isinstance(value, dict):
+        return {k: _fill_message(v, message) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_fill_message(v, message) for v in value]
+    return value
+
+
+def _tool_call_id(messages: list[dict], name: str) -> str:
+    """Same conversation, same tool call id, so replayed runs compare exactly."""
+    digest = hashlib.sha256(json.dumps([messages, name], sort_keys=True).encode()).hexdigest()
+    return f"call_{digest[:12]}"
+
+
+def _generated_reply(messages: list[dict], n_tokens: int) -> str:
+    """Pseudo-random but reproducible text: same conversation, same reply."""
+    digest = hashlib.sha256(json.dumps(messages, sort_keys=True).encode()).digest()
+    rng = random.Random(digest)
+    return " ".join(rng.choice(_WORDS) for _ in range(n_tokens))
+
+
+class FakeLLM:
+    """Decides what to answer and how fast, independent of the HTTP layer."""
+
+    def __init__(self, config: FakeLLMConfig):
+        self.config = config
+        self._rng = random.Random(config.seed)
+        self.requests = 0
+
+    def should_fail(self) -> bool:
+        self.requests += 1
+        return self.config.error_rate > 0 and self._rng.random() < self.config.error_rate
+
+    def respond(self, messages: list[dict], tools: list[dict] | None) -> tuple[str, list[dict]]:
+        """Return (content, tool_calls) for a request."""
+        tool_names = {t["function"]["name"] for t in tools or []}
+        last_is_tool = bool(messages) and messages[-1].get("role") == "tool"
+        user_message = _last_user_message(messages)
+
+        if not last_is_tool:
+            for rule in self.config.script:
+                if rule.get("match", "").lower() not in user_message.lower():
+                    continue
+                if "tool_call" in rule:
+                    call = rule["tool_call"]
+                    if call["name"] not in tool_names:
+                        continue
+                    arguments = _fill_message(call.get("arguments", {}), user_message)
+                    arguments = json.dumps(arguments, ensure_ascii=False)
+                    return "", [{
+                        "id": _tool_call_id(messages, call["name"]),
+                        "type": "function",
+                        "function": {"name": call["name"], "arguments": arguments},
+                    }]
+                if "reply" in rule:
+                    return rule["reply"], []
+
+        return _generated_reply(messages, self.config.reply_tokens), []
+
+    def token_delay(self) -> float:
+        return 1.0 / self.config.tokens_per_second if self.config.tokens_per_second > 0 else 0.0
+
+
+def _usage(messages: list[dict], content: str, tool_calls: list[dict]) -> dict:
+    prompt_tokens = _prompt_tokens(messages)
+    completion_tokens = _count_tokens(content) if content else 0
+    completion_tokens += sum(_count_tokens(tc["function"]["arguments"]) for tc in tool_calls)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+
+
+def _chunk(completion_id: str, model: str, delta: dict | None, finish_reason: str | None = None,
+           usage: dict | None = None) -> str:
+    payload = {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [] if delta is None else [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+    if usage is not None:
+        payload["usage"] = usage
+    return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+
+def create_app(config: FakeLLMConfig | None = None) -> FastAPI:
+    fake = FakeLLM(config or FakeLLMConfig())
+    app = FastAPI(title="Fake LLM")
+    app.state.fake = fake
+
+    @app.get("/v1/models")
+    async def list_models():
+        return {
+            "object": "list",
+            "data": [
+                {"id": name, "object": "model", "created": 0, "owned_by": "fake-llm"}
+                for name in ("claude-sonnet", "claude-haiku", "claude-opus")
+            ],
+        }
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        model = body.get("model", "fake")
+        messages = body.get("messages", [])
+
+        if fake.should_fail():
+            return JSONResponse(
+                status_code=fake.config.error_status,
+                content={"error": {"message": "Injected failure", "type": "fake_llm_error"}},
+            )
+
+        content, tool_calls = fake.respond(messages, body.get("tools"))
+        usage = _usage(messages, content, tool_calls)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:16]}"
+
+        if not body.get("stream"):
+            await asyncio.sleep(fake.config.ttft_ms / 1000 + fake.token_delay() * usage["completion_tokens"])
+            message = {"role": "assistant", "content": content or None}
+            if tool_calls:
+                message["tool_calls"] = tool_calls
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": message,
+                    "finish_reason": "tool_calls" if tool_calls else "stop",
+                }],
+                "usage": usage,
+            }
+
+        include_usage = (body.get("stream_options") or {}).get("include_usage", False)
+
+        async def generate():
+            await asyncio.sleep(fake.config.ttft_ms / 1000)
+            yield _chunk(completion_id, model, {"role": "assistant", "content": ""})
+            if content:
+                words = content.split(" ")
+                for i, word in enumerate(words):
+                    if i:
+                        await asyncio.sleep(fake.token_delay())
+                    yield _chunk(completion_id, model, {"content": word if i == 0 else f" {word}"})
+            for index, tc in enumerate(tool_calls):
+                yield _chunk(completion_id, model, {"tool_calls": [{
+                    "index": index,
+                    "id": tc["id"],
+                    "type": "function",
+                    "function": {"name": tc["function"]["name"], "arguments": tc["function"]["arguments"]},
+                }]})
+            yield _chunk(completion_id, model, {}, finish_reason="tool_calls" if tool_calls else "stop")
+            if include_usage:
+                yield _chunk(completion_id, model, None, usage=usage)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(generate(), media_type="text/event-stream")
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deterministic OpenAI-compatible LLM stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4001)
+    parser.add_argument("--ttft-ms", type=float, default=200.0, help="Delay before the first token")
+    parser.add_argument("--tps", type=float, default=50.0, help="Streamed tokens per second (0 = no delay)")
+    parser.add_argument("--reply-tokens", type=int, default=40, help="Length of generated replies")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests that fail")
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--script", help="JSON file with scripted replies and tool calls")
+    args = parser.parse_args()
+
+    script = []
+    if args.script:
+        with open(args.script, encoding="utf-8") as f:
+            script = json.load(f)
+
+    config = FakeLLMConfig(
+        ttft_ms=args.ttft_ms,
+        tokens_per_second=args.tps,
+        reply_tokens=args.reply_tokens,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        seed=args.seed,
+        script=script,
+    )
+
+    import uvicorn
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
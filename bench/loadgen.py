@@ -0,0 +1,157 @@
+"""
+Concurrent load generator for /api/chat/stream.
+
+Usage:
+    python -m bench.loadgen --base-url http://localhost:8000 --concurrency 20 --requests 200
+
+Reports TTFT (time to first `message` event) and total latency percentiles,
+throughput and error rate. Each request starts a new conversation unless
+--conversation-id is given.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import time
+from dataclasses import dataclass
+
+import httpx
+
+DEFAULT_MESSAGES = [
+    "你好",
+    "Summarize the latest AI news",
+    "What's a good name for a cat?",
+    "Explain what a cron expression is in one paragraph.",
+]
+
+
+@dataclass
+class RequestResult:
+    ttft_ms: float | None = None
+    latency_ms: float = 0.0
+    chunks: int = 0
+    tool_calls: int = 0
+    error: str | None = None
+
+
+def percentile(values: list[float], pct: float) -> float | None:
+    """Nearest-rank percentile; None for an empty sample."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+async def run_one(client: httpx.AsyncClient, message: str, conversation_id: str | None) -> RequestResult:
+    result = RequestResult()
+    payload = {"message": message}
+    if conversation_id:
+        payload["conversation_id"] = conversation_id
+
+    start = time.perf_counter()
+    event = None
+    try:
+        async with client.stream("POST", "/api/chat/stream", json=payload) as response:
+            if response.status_code != 200:
+                result.error = f"http_{response.status_code}"
+                return result
+            async for line in response.aiter_lines():
+                if line.startswith("event: "):
+                    event = line[len("event: "):]
+                elif line.startswith("data: "):
+                    if event == "message":
+                        if result.ttft_ms is None:
+                            result.ttft_ms = (time.perf_counter() - start) * 1000
+                        result.chunks += 1
+                    elif event == "tool_call":
+                        result.tool_calls += 1
+                    elif event == "error":
+                        result.error = json.loads(line[len("data: "):]).get("message", "stream_error")
+    except httpx.HTTPError as e:
+        result.error = type(e).__name__
+    finally:
+        result.latency_ms = (time.perf_counter() - start) * 1000
+    return result
+
+
+async def run_load(
+    base_url: str,
+    concurrency: int,
+    total: int,
+    messages: list[str],
+    conversation_id: str | None = None,
+    timeout: float = 120.0,
+) -> tuple[list[RequestResult], float]:
+    """Drive `total` requests with at most `concurrency` in flight. Returns (results, wall seconds)."""
+    queue: asyncio.Queue[int] = asyncio.Queue()
+    for i in range(total):
+        queue.put_nowait(i)
+    results: list[RequestResult] = []
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+
+        async def worker():
+            while True:
+                try:
+                    i = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                results.append(await run_one(client, messages[i % len(messages)], conversation_id))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        wall = time.perf_counter() - start
+
+    return results, wall
+
+
+def summarize(results: list[RequestResult], wall_seconds: float) -> dict:
+    ok = [r for r in results if r.error is None]
+    ttfts = [r.ttft_ms for r in ok if r.ttft_ms is not None]
+    latencies = [r.latency_ms for r in ok]
+    errors: dict[str, int] = {}
+    for r in results:
+        if r.error:
+            errors[r.error] = errors.get(r.error, 0) + 1
+
+    def _pcts(values: list[float]) -> dict:
+        return {f"p{p}": percentile(values, p) for p in (50, 95, 99)}
+
+    return {
+        "requests": len(results),
+        "wall_seconds": round(wall_seconds, 3),
+        "throughput_rps": round(len(ok) / wall_seconds, 2) if wall_seconds else None,
+        "chunks_per_second": round(sum(r.chunks for r in ok) / wall_seconds, 2) if wall_seconds else None,
+        "error_rate": round((len(results) - len(ok)) / len(results), 4) if results else 0.0,
+        "errors": errors,
+        "ttft_ms": _pcts(ttfts),
+        "latency_ms": _pcts(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generator for /api/chat/stream")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--messages-file", help="Text file, one message per line")
+    parser.add_argument("--conversation-id")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    args = parser.parse_args()
+
+    messages = DEFAULT_MESSAGES
+    if args.messages_file:
+        with open(args.messages_file, encoding="utf-8") as f:
+            messages = [line.strip() for line in f if line.strip()]
+
+    results, wall = asyncio.run(run_load(
+        args.base_url, args.concurrency, args.requests, messages, args.conversation_id, args.timeout
+    ))
+    print(json.dumps(summarize(results, wall), indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Latency regression benchmark from a recorded cassette.
+
+Re-issues every recorded LLM request against a live endpoint and compares TTFT
+and latency with the recording:
+
+    python -m bench.replay cassettes/default.jsonl.gz --base-url http://localhost:4000/v1
+
+With --summary, only prints the recorded timings (no network).
+
+To re-run a recorded conversation or scheduled task fully offline instead, start
+the app with CASSETTE_MODE=replay (and CASSETTE_REPLAY_TIMING=true to keep the
+recorded latencies).
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from openai import AsyncOpenAI
+
+from app.config import settings
+from app.core.cassette import load_interactions
+from app.core.llm import LLMClient, StreamUsage
+from bench.loadgen import percentile
+
+LLM_KINDS = ("llm.complete", "llm.stream")
+
+
+def recorded_timings(entry: dict) -> dict:
+    ttft_ms = None
+    if entry["kind"] == "llm.stream":
+        for offset_ms, data in entry["chunks"]:
+            if "text" in data or "tool_call" in data:
+                ttft_ms = offset_ms
+                break
+    return {"ttft_ms": ttft_ms, "latency_ms": entry.get("latency_ms")}
+
+
+async def measure(llm: LLMClient, entry: dict) -> dict:
+    request = entry["request"]
+    start = time.perf_counter()
+    if entry["kind"] == "llm.complete":
+        response = await llm._complete(request["messages"], request["model"], request["tools"])
+        return {"ttft_ms": None, "latency_ms": response.latency_ms}
+
+    ttft_ms = None
+    async for item in llm._stream(request["messages"], request["model"], request["tools"]):
+        if isinstance(item, StreamUsage):
+            ttft_ms = item.ttft_ms
+    return {"ttft_ms": ttft_ms, "latency_ms": int((time.perf_counter() - start) * 1000)}
+
+
+def _stats(values: list[float]) -> dict:
+    return {f"p{p}": percentile(values, p) for p in (50, 95, 99)}
+
+
+async def run(path: str, base_url: str | None, summary_only: bool) -> dict:
+    entries = [e for e in load_interactions(path) if e["kind"] in LLM_KINDS]
+    recorded = [recorded_timings(e) for e in entries]
+    report = {
+        "interactions": len(entries),
+        "recorded": {
+            "ttft_ms": _stats([r["ttft_ms"] for r in recorded if r["ttft_ms"] is not None]),
+            "latency_ms": _stats([r["latency_ms"] for r in recorded if r["latency_ms"] is not None]),
+        },
+    }
+    if summary_only:
+        return report
+
+    llm = LLMClient()
+    llm.client = AsyncOpenAI(base_url=base_url or settings.LITELLM_BASE_URL, api_key=settings.LITELLM_API_KEY)
+    live = []
+    for entry in entries:
+        live.append(await measure(llm, entry))
+
+    ratios = [
+        lv["latency_ms"] / rec["latency_ms"]
+        for lv, rec in zip(live, recorded)
+        if rec["latency_ms"] and lv["latency_ms"] is not None
+    ]
+    report["live"] = {
+        "ttft_ms": _stats([r["ttft_ms"] for r in live if r["ttft_ms"] is not None]),
+        "latency_ms": _stats([r["latency_ms"] for r in live if r["latency_ms"] is not None]),
+    }
+    report["latency_ratio"] = _stats(ratios)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a cassette's LLM requests and compare latency")
+    parser.add_argument("cassette", nargs="?", default=settings.CASSETTE_PATH)
+    parser.add_argument("--base-url", help="OpenAI-compatible endpoint (default: LITELLM_BASE_URL)")
+    parser.add_argument("--summary", action="store_true", help="Only print recorded timings")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args.cassette, args.base_url, args.summary))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Parsing benchmark for the web search MCP server.
+
+Usage:
+    python -m bench.search_parse --iterations 2000
+
+Runs the DuckDuckGo result parser and the page text extractor over the saved
+HTML in bench/fixtures/ and reports per-page latency percentiles, throughput
+and how many results / characters each fixture yields. Save more real pages
+into the fixtures directory (ddg_*.html for result pages) to widen coverage.
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+from bench.loadgen import percentile
+from mcp_servers.web_search import MAX_RESULTS, extract_main_text, parse_ddg_html
+
+FIXTURES = Path(__file__).with_name("fixtures")
+
+
+def bench_page(name: str, page: str, parse, iterations: int) -> dict:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        output = parse(page)
+        timings.append((time.perf_counter() - start) * 1_000_000)
+    total_s = sum(timings) / 1_000_000
+    return {
+        "fixture": name,
+        "bytes": len(page.encode()),
+        "output": output,
+        "us": {f"p{p}": round(percentile(timings, p), 1) for p in (50, 95, 99)},
+        "mb_per_s": round(len(page.encode()) * iterations / total_s / 1_000_000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark web search HTML parsing")
+    parser.add_argument("--fixtures", default=str(FIXTURES))
+    parser.add_argument("--iterations", type=int, default=1000)
+    args = parser.parse_args()
+
+    reports = []
+    for path in sorted(Path(args.fixtures).glob("*.html")):
+        page = path.read_text(encoding="utf-8")
+        if path.name.startswith("ddg_"):
+            report = bench_page(path.name, page, lambda p: parse_ddg_html(p, limit=MAX_RESULTS), args.iterations)
+            report["output"] = f"{len(report['output'])} results"
+        else:
+            report = bench_page(path.name, page, extract_main_text, args.iterations)
+            report["output"] = f"{len(report['output'][1])} chars"
+        reports.append(report)
+    print(json.dumps(reports, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
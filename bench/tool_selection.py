@@ -0,0 +1,95 @@
+"""
+Recall/latency benchmark for relevance-based tool selection.
+
+Usage:
+    python -m bench.tool_selection --top-k 4 8
+
+For each case in the catalog (a query and the tool(s) that can answer it),
+checks whether an expected tool is among the selected ones. Reports recall@k,
+per-query selection latency percentiles (embedding the query + ranking) and the
+estimated prompt tokens of the selected schemas versus sending every tool.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from pathlib import Path
+
+from app.config import settings
+from app.core.tokens import estimate_tokens
+from app.core.tool_selector import ToolSelector
+from bench.loadgen import percentile
+
+DEFAULT_CASES = Path(__file__).with_name("tool_selection_cases.json")
+
+
+def load_cases(path: str | Path) -> tuple[list[dict], list[dict]]:
+    data = json.loads(Path(path).read_text())
+    tools = [
+        {
+            "type": "function",
+            "function": {
+                "name": tool["name"],
+                "description": tool["description"],
+                "parameters": tool.get("parameters", {"type": "object", "properties": {}}),
+            },
+        }
+        for tool in data["tools"]
+    ]
+    return tools, data["cases"]
+
+
+def _schema_tokens(tools: list[dict]) -> int:
+    return estimate_tokens(json.dumps(tools, ensure_ascii=False))
+
+
+async def run(tools: list[dict], cases: list[dict], top_k: int, selector: ToolSelector) -> dict:
+    selector.top_k = top_k
+    start = time.perf_counter()
+    await selector.index(tools)
+    index_ms = (time.perf_counter() - start) * 1000
+
+    hits = 0
+    latencies = []
+    tokens = []
+    misses = []
+    for case in cases:
+        start = time.perf_counter()
+        selected = await selector.select(case["query"], tools)
+        latencies.append((time.perf_counter() - start) * 1000)
+        tokens.append(_schema_tokens(selected))
+        names = {t["function"]["name"] for t in selected}
+        if names & set(case["expected"]):
+            hits += 1
+        else:
+            misses.append(case["query"])
+
+    return {
+        "top_k": top_k,
+        "recall": round(hits / len(cases), 3),
+        "index_ms": round(index_ms, 1),
+        "select_ms": {f"p{p}": round(percentile(latencies, p), 2) for p in (50, 95, 99)},
+        "schema_tokens": round(sum(tokens) / len(tokens)),
+        "schema_tokens_all": _schema_tokens(tools),
+        "misses": misses,
+    }
+
+
+async def main_async(args):
+    tools, cases = load_cases(args.cases)
+    selector = ToolSelector(0, model_name=args.model)
+    for top_k in args.top_k:
+        print(json.dumps(await run(tools, cases, top_k, selector), indent=2, ensure_ascii=False))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall/latency benchmark for tool selection")
+    parser.add_argument("--cases", default=str(DEFAULT_CASES), help="JSON file with tools and cases")
+    parser.add_argument("--top-k", type=int, nargs="+", default=[settings.TOOL_SELECTION_TOP_K])
+    parser.add_argument("--model", default=settings.TOOL_EMBEDDING_MODEL)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,88 +1,265 @@
-"""MCP server providing web search via DuckDuckGo HTML."""
+"""MCP server providing web search via DuckDuckGo HTML, plus page fetching."""
+
+import asyncio
+import html
+import ipaddress
+import re
+import socket
+import time
+from collections import OrderedDict
+from urllib.parse import unquote, urlparse
 
 import httpx
 from mcp.server.fastmcp import FastMCP
 
 mcp = FastMCP("web-search")
 
+SEARCH_URL = "https://html.duckduckgo.com/html/"
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (compatible; K-Assistant/1.0)",
+}
+MAX_RESULTS = 5
+MAX_BATCH = 8
+CACHE_TTL = 600.0
+CACHE_MAX_ENTRIES = 512
+FETCH_MAX_BYTES = 2_000_000
+FETCH_MAX_CHARS = 20_000
+FETCH_MAX_REDIRECTS = 5
 
-@mcp.tool()
-async def web_search(query: str) -> str:
-    """Search the web using DuckDuckGo and return text results."""
-    url = "https://html.duckduckgo.com/html/"
-    headers = {
-        "User-Agent": "Mozilla/5.0 (compatible; K-Assistant/1.0)",
-    }
+# One pass over the page: result titles (with their link) and snippets, in document order
+_RESULT_RE = re.compile(
+    r'class="result__(?:a"[^>]*?href="(?P<url>[^"]*)"[^>]*>(?P<title>.*?)</a>'
+    r'|snippet"[^>]*>(?P<snippet>.*?)</(?:a|div|td)>)',
+    re.S,
+)
+_TAG_RE = re.compile(r"<[^>]+>")
+_SPACE_RE = re.compile(r"[ \t\r\f\v]+")
+_BLANK_LINES_RE = re.compile(r"\n\s*\n+")
+_NOISE_RE = re.compile(
+    r"<(script|style|noscript|svg|nav|header|footer|aside|form|iframe|template)\b.*?</\1\s*>|<!--.*?-->",
+    re.S | re.I,
+)
+_MAIN_RE = re.compile(r"<(article|main)\b[^>]*>(.*)</\1\s*>", re.S | re.I)
+_BODY_RE = re.compile(r"<body\b[^>]*>(.*)</body\s*>", re.S | re.I)
+_TITLE_RE = re.compile(r"<title\b[^>]*>(.*?)</title\s*>", re.S | re.I)
+_BLOCK_RE = re.compile(r"</?(p|div|br|li|tr|h[1-6]|ul|ol|table|section|blockquote|pre)\b[^>]*>", re.I)
+
+_client: httpx.AsyncClient | None = None
+_cache: OrderedDict[str, tuple[float, str]] = OrderedDict()  # key -> (expires_at, text)
+_inflight: dict[str, asyncio.Task] = {}
+
+
+def _get_client() -> httpx.AsyncClient:
+    """Shared client so connections to DuckDuckGo and fetched sites are reused across calls."""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            headers=HEADERS,
+            follow_redirects=True,
+            timeout=httpx.Timeout(15.0, connect=5.0),
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+        )
+    return _client
+
+
+async def _cached(key: str, fetch) -> str:
+    """Return a fresh cached result, or run `fetch` once (concurrent callers share it) and cache it."""
+    entry = _cache.get(key)
+    if entry and entry[0] > time.monotonic():
+        _cache.move_to_end(key)
+        return entry[1]
+
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(fetch())
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    text = await asyncio.shield(task)
+
+    _cache[key] = (time.monotonic() + CACHE_TTL, text)
+    _cache.move_to_end(key)
+    while len(_cache) > CACHE_MAX_ENTRIES:
+        _cache.popitem(last=False)
+    return text
 
-    async with httpx.AsyncClient(follow_redirects=True, timeout=15.0) as client:
-        response = await client.post(url, data={"q": query}, headers=headers)
-        response.raise_for_status()
 
-    # Parse results from HTML (simple extraction)
-    html = response.text
-    results = _parse_ddg_html(html)
+def _clean(fragment: str) -> str:
+    """Strip tags, decode entities and collapse whitespace in an inline HTML fragment."""
+    if "<" in fragment:
+        fragment = _TAG_RE.sub("", fragment)
+    if "&" in fragment:
+        fragment = html.unescape(fragment)
+    return " ".join(fragment.split())
 
+
+def _result_url(href: str) -> str:
+    """Unwrap DuckDuckGo's //duckduckgo.com/l/?uddg=<target> redirect links."""
+    _, found, target = href.partition("uddg=")
+    if found:
+        return unquote(target.split("&", 1)[0])
+    return html.unescape(href)
+
+
+def parse_ddg_html(page: str, limit: int | None = None) -> list[dict]:
+    """Extract up to `limit` search results (title, snippet, url) from a DuckDuckGo HTML results page."""
+    results = []
+    for match in _RESULT_RE.finditer(page):
+        if match.group("title") is not None:
+            if len(results) == limit:
+                break
+            title = _clean(match.group("title"))
+            if title:
+                results.append({"title": title, "snippet": "", "url": _result_url(match.group("url"))})
+        elif results and not results[-1]["snippet"]:
+            results[-1]["snippet"] = _clean(match.group("snippet"))
+    return results
+
+
+def extract_main_text(page: str) -> tuple[str, str]:
+    """Return (title, readable text) of an HTML page, preferring its <article>/<main> content."""
+    title_match = _TITLE_RE.search(page)
+    title = _clean(title_match.group(1)) if title_match else ""
+
+    content = _NOISE_RE.sub(" ", page)
+    main = _MAIN_RE.search(content) or _BODY_RE.search(content)
+    if main:
+        content = main.group(main.lastindex)
+    content = _BLOCK_RE.sub("\n", content)
+    text = html.unescape(_TAG_RE.sub("", content)).replace("\xa0", " ")
+    lines = (_SPACE_RE.sub(" ", line).strip() for line in text.split("\n"))
+    text = _BLANK_LINES_RE.sub("\n\n", "\n".join(lines)).strip()
+    return title, text
+
+
+def _format_results(query: str, results: list[dict]) -> str:
     if not results:
         return f"No results found for: {query}"
-
     output = f"Search results for: {query}\n\n"
-    for i, r in enumerate(results[:5], 1):
+    for i, r in enumerate(results, 1):
         output += f"{i}. {r['title']}\n   {r['snippet']}\n   {r['url']}\n\n"
     return output
 
 
-def _parse_ddg_html(html: str) -> list[dict]:
-    """Extract search results from DuckDuckGo HTML response."""
-    results = []
+async def _search(query: str, max_results: int) -> str:
+    async def fetch():
+        response = await _get_client().post(SEARCH_URL, data={"q": query})
+        response.raise_for_status()
+        return _format_results(query, parse_ddg_html(response.text, limit=max_results))
 
-    # Simple parsing: find result blocks
-    # DuckDuckGo HTML results have class="result__a" for titles and "result__snippet" for snippets
-    parts = html.split('class="result__a"')
-
-    for part in parts[1:]:  # Skip first part (before any results)
-        result = {}
-
-        # Extract URL
-        href_start = part.find('href="')
-        if href_start != -1:
-            href_end = part.find('"', href_start + 6)
-            result["url"] = part[href_start + 6 : href_end]
-
-        # Extract title (text between > and </a>)
-        tag_close = part.find(">")
-        title_end = part.find("</a>")
-        if tag_close != -1 and title_end != -1:
-            title = part[tag_close + 1 : title_end]
-            # Strip HTML tags
-            title = _strip_html(title)
-            result["title"] = title.strip()
-
-        # Extract snippet
-        snippet_marker = 'class="result__snippet"'
-        snippet_start = part.find(snippet_marker)
-        if snippet_start != -1:
-            snippet_tag_end = part.find(">", snippet_start + len(snippet_marker))
-            snippet_text_end = part.find("</", snippet_tag_end)
-            if snippet_tag_end != -1 and snippet_text_end != -1:
-                snippet = part[snippet_tag_end + 1 : snippet_text_end]
-                result["snippet"] = _strip_html(snippet).strip()
-
-        if result.get("title"):
-            results.append({
-                "title": result.get("title", ""),
-                "snippet": result.get("snippet", ""),
-                "url": result.get("url", ""),
-            })
+    return await _cached(f"search:{max_results}:{query}", fetch)
 
-    return results
+
+@mcp.tool()
+async def web_search(query: str) -> str:
+    """Search the web using DuckDuckGo and return text results."""
+    return await _search(query, MAX_RESULTS)
+
+
+@mcp.tool()
+async def web_search_batch(queries: list[str], max_results: int = MAX_RESULTS) -> str:
+    """Run several web searches at once (up to 8 queries) and return all results.
+
+    Prefer this over repeated web_search calls when you need to look up several things.
+    """
+    queries = list(dict.fromkeys(q.strip() for q in queries if q.strip()))[:MAX_BATCH]
+    max_results = max(1, min(max_results, 10))
+    if not queries:
+        return "No queries given."
+    results = await asyncio.gather(*(_search(q, max_results) for q in queries), return_exceptions=True)
+    return "\n".join(
+        f"Search failed for: {q} ({type(r).__name__}: {r})" if isinstance(r, Exception) else r
+        for q, r in zip(queries, results)
+    )
+
+
+async def _resolve(host: str) -> list[str]:
+    infos = await asyncio.get_running_loop().getaddrinfo(host, None, type=socket.SOCK_STREAM)
+    return [info[4][0] for info in infos]
 
 
-def _strip_html(text: str) -> str:
-    """Remove HTML tags from a string."""
-    import re
-    clean = re.sub(r"<[^>]+>", "", text)
-    return clean.replace("&amp;", "&").replace("&lt;", "<").replace("&gt;", ">").replace("&quot;", '"')
+async def _refuse_private(url: str) -> str | None:
+    """Why `url` must not be fetched, or None if it's an http(s) URL on public addresses only.
+
+    The URL comes from the LLM, so without this the tool could reach loopback, the private network or
+    cloud metadata endpoints (169.254.169.254).
+    """
+    parsed = urlparse(url)
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        return f"Unsupported URL: {url}"
+    try:
+        addresses = [parsed.hostname] if _is_ip(parsed.hostname) else await _resolve(parsed.hostname)
+    except OSError as e:
+        return f"Could not resolve {parsed.hostname}: {e}"
+    for address in addresses:
+        ip = ipaddress.ip_address(address.split("%")[0])
+        if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped:
+            ip = ip.ipv4_mapped
+        if not ip.is_global:
+            return f"Refused to fetch non-public address {ip}: {url}"
+    return None
+
+
+def _is_ip(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return True
+
+
+@mcp.tool()
+async def fetch_page(url: str, max_chars: int = 8000) -> str:
+    """Fetch a web page and return its main readable text (navigation, scripts and ads removed)."""
+    refused = await _refuse_private(url)
+    if refused:
+        return refused
+    max_chars = max(1, min(max_chars, FETCH_MAX_CHARS))
+
+    async def fetch():
+        # Redirects are followed by hand, so each target is checked like the original URL
+        target = url
+        for _ in range(FETCH_MAX_REDIRECTS + 1):
+            async with _get_client().stream("GET", target, follow_redirects=False) as response:
+                if response.is_redirect and response.next_request is not None:
+                    target = str(response.next_request.url)
+                    refused = await _refuse_private(target)
+                    if refused:
+                        return refused
+                    continue
+                response.raise_for_status()
+                content_type = response.headers.get("content-type", "")
+                if content_type and not content_type.startswith(("text/", "application/xhtml")):
+                    return f"Not a text page ({content_type}): {url}"
+                body = bytearray()
+                async for chunk in response.aiter_bytes():
+                    body += chunk
+                    if len(body) >= FETCH_MAX_BYTES:
+                        break
+                page = body[:FETCH_MAX_BYTES].decode(response.encoding or "utf-8", errors="replace")
+                break
+        else:
+            return f"Too many redirects: {url}"
+
+        if "html" not in content_type and "<html" not in page[:1000].lower():
+            return page
+        title, text = extract_main_text(page)
+        return f"{title}\n{url}\n\n{text}" if title else f"{url}\n\n{text}"
+
+    text = await _cached(f"page:{url}", fetch)
+    if len(text) > max_chars:
+        text = text[:max_chars] + f"\n\n[Truncated: {len(text) - max_chars} more characters]"
+    return text
 
 
 if __name__ == "__main__":
-    mcp.run()
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--transport", choices=["stdio", "sse", "streamable-http"], default="stdio")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    mcp.settings.host = args.host
+    mcp.settings.port = args.port
+    mcp.run(transport=args.transport)
@@ -1,7 +1,11 @@
+import httpx
 import pytest
 from httpx import ASGITransport, AsyncClient
+from openai import AsyncOpenAI
 
+from app.core.llm import LLMClient
 from app.main import app
+from bench.fake_llm import FakeLLMConfig, create_app
 
 
 @pytest.fixture
@@ -9,3 +13,20 @@ async def client():
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as ac:
         yield ac
+
+
+@pytest.fixture
+def make_llm():
+    """Build an LLMClient wired to an in-process fake LLM server."""
+
+    def _make(config: FakeLLMConfig) -> LLMClient:
+        llm = LLMClient()
+        llm.client = AsyncOpenAI(
+            base_url="http://fake/v1",
+            api_key="test",
+            max_retries=0,
+            http_client=httpx.AsyncClient(transport=ASGITransport(app=create_app(config))),
+        )
+        return llm
+
+    return _make
@@ -0,0 +1,73 @@
+import json
+import uuid
+
+from app.config import settings
+from app.core import chat
+from app.core.chat import _EscalationGate, _is_simple_turn
+from app.models.conversation import Conversation
+from app.models.message import Message
+
+
+def test_simple_turn_classifier():
+    assert _is_simple_turn("你好")
+    assert _is_simple_turn("thanks!")
+    assert not _is_simple_turn("search the latest AI news")
+    assert not _is_simple_turn("每天早上9点提醒我")
+    assert not _is_simple_turn("x" * 500)
+
+
+def test_gate_passes_normal_answer():
+    gate = _EscalationGate()
+    emitted = gate.feed("He") + gate.feed("llo there") + gate.finish()
+    assert emitted == "Hello there"
+    assert not gate.escalated
+
+
+def test_gate_holds_back_escalation():
+    gate = _EscalationGate()
+    emitted = gate.feed("ESC") + gate.feed("ALATE") + gate.finish()
+    assert emitted == ""
+    assert gate.escalated
+
+
+def test_gate_escalates_empty_answer():
+    gate = _EscalationGate()
+    assert gate.feed("  ") == ""
+    assert gate.finish() == ""
+    assert gate.escalated
+
+
+async def test_stream_metadata_names_the_model_that_answered(monkeypatch):
+    conversation = Conversation(id=uuid.uuid4(), model="claude-sonnet", title="t", messages=[])
+
+    async def get_conversation(db, user_id, conversation_id=None, model=None):
+        return conversation
+
+    async def add_message(db, conversation, role, content, **fields):
+        return Message(id=uuid.uuid4(), role=role, content=content, **fields)
+
+    async def no_tools(message):
+        return None
+
+    async def stream(messages, model, tools=None):
+        yield "Hello there"
+
+    class FakeDB:
+        async def flush(self):
+            pass
+
+        async def commit(self):
+            pass
+
+    monkeypatch.setattr(settings, "CASCADE_ENABLED", True)
+    monkeypatch.setattr(settings, "CASCADE_FAST_MODEL", "claude-haiku")
+    monkeypatch.setattr(chat, "get_or_create_conversation", get_conversation)
+    monkeypatch.setattr(chat, "_add_message", add_message)
+    monkeypatch.setattr(chat, "_get_tools", no_tools)
+    monkeypatch.setattr(chat, "_fire_and_forget", lambda coro: coro.close())
+    monkeypatch.setattr(chat.llm_client, "stream", stream)
+
+    events = [event async for event in chat.chat_stream(FakeDB(), uuid.uuid4(), "你好")]
+
+    assert events[0].startswith("event: metadata\n")
+    assert json.loads(events[0].split("data: ", 1)[1])["model"] == "claude-haiku"
@@ -0,0 +1,44 @@
+import pytest
+
+from app.core.cassette import CassetteMiss, cassette
+from app.core.llm import StreamUsage
+from bench.fake_llm import FakeLLMConfig
+
+
+@pytest.fixture
+def cassette_file(tmp_path, monkeypatch):
+    path = tmp_path / "test.jsonl.gz"
+    monkeypatch.setattr(cassette, "path", path)
+    monkeypatch.setattr(cassette, "_recorded", None)
+    return path
+
+
+@pytest.mark.asyncio
+async def test_record_then_replay(cassette_file, monkeypatch, make_llm):
+    messages = [{"role": "user", "content": "hello"}]
+    llm = make_llm(FakeLLMConfig(ttft_ms=0, tokens_per_second=0, reply_tokens=6))
+
+    monkeypatch.setattr(cassette, "mode", "record")
+    recorded = [item async for item in llm.stream(messages)]
+    recorded_complete = await llm.complete(messages)
+
+    # Replay must not reach the server: make every request fail
+    monkeypatch.setattr(cassette, "mode", "replay")
+    offline = make_llm(FakeLLMConfig(error_rate=1.0))
+    replayed = [item async for item in offline.stream(messages)]
+    replayed_complete = await offline.complete(messages)
+
+    assert replayed == recorded
+    assert isinstance(replayed[-1], StreamUsage)
+    assert replayed_complete == recorded_complete
+
+
+@pytest.mark.asyncio
+async def test_replay_miss(cassette_file, monkeypatch, make_llm):
+    llm = make_llm(FakeLLMConfig(ttft_ms=0, tokens_per_second=0))
+    monkeypatch.setattr(cassette, "mode", "record")
+    await llm.complete([{"role": "user", "content": "recorded"}])
+
+    monkeypatch.setattr(cassette, "mode", "replay")
+    with pytest.raises(CassetteMiss):
+        await llm.complete([{"role": "user", "content": "never recorded"}])
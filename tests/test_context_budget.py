@@ -0,0 +1,37 @@
+from datetime import datetime, timedelta, timezone
+
+from app.core.chat import _select_history
+from app.core.tokens import estimate_message_tokens, estimate_tokens
+from app.models.conversation import Conversation
+from app.models.message import Message
+
+
+def _conversation(contents: list[str]) -> Conversation:
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    messages = [
+        Message(
+            role="user" if i % 2 == 0 else "assistant",
+            content=content,
+            token_count=estimate_message_tokens(content),
+            created_at=start + timedelta(minutes=i),
+        )
+        for i, content in enumerate(contents)
+    ]
+    return Conversation(model="m", messages=messages, token_total=sum(m.token_count for m in messages))
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcd" * 10) == 10
+    assert estimate_tokens("每天早上") == 4
+
+
+def test_history_within_budget_is_kept():
+    conv = _conversation(["hello", "hi there"])
+    assert [m.content for m in _select_history(conv, budget=1000)] == ["hello", "hi there"]
+
+
+def test_history_trimmed_to_recent_turns():
+    conv = _conversation(["x" * 400, "y" * 400, "recent question", "recent answer"])
+    kept = _select_history(conv, budget=120)
+    assert [m.content for m in kept] == ["recent question", "recent answer"]
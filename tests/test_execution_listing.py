@@ -0,0 +1,21 @@
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.tasks import _decode_cursor, _encode_cursor
+from app.models.task_execution import TaskExecution
+
+
+def test_cursor_round_trips_created_at_and_id():
+    execution = TaskExecution(id=uuid.uuid4(), created_at=datetime(2026, 10, 19, 9, 0, 3, 517, tzinfo=timezone.utc))
+
+    assert _decode_cursor(_encode_cursor(execution)) == (execution.created_at, execution.id)
+
+
+@pytest.mark.parametrize("cursor", ["not-base64!", "bm90IGEgY3Vyc29y", "MjAyNi0xMC0xOXxub3QtYS11dWlk"])
+def test_invalid_cursor_is_a_client_error(cursor):
+    with pytest.raises(HTTPException) as excinfo:
+        _decode_cursor(cursor)
+    assert excinfo.value.status_code == 400
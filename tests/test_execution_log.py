@@ -0,0 +1,42 @@
+from datetime import date, datetime, timezone
+
+from app.scheduler.execution_log import (
+    add_months,
+    expired_partitions,
+    pack_messages,
+    partition_ddl,
+    partition_name,
+    unpack_messages,
+)
+
+SEARCH_RESULT = "\n".join(f"{i}. Headline number {i} about AI\n   https://news.example/{i}" for i in range(200))
+
+
+def test_messages_round_trip_compressed():
+    messages = [
+        {"role": "system", "content": "You are an AI assistant executing a scheduled task."},
+        {"role": "user", "content": "搜索AI领域最新新闻并总结"},
+        {"role": "tool", "tool_call_id": "call_1", "content": SEARCH_RESULT},
+    ]
+    data, raw_bytes = pack_messages(messages)
+
+    assert unpack_messages(data) == messages
+    assert len(data) * 4 < raw_bytes
+
+
+def test_monthly_partitions():
+    assert add_months(date(2026, 11, 1), 2) == date(2027, 1, 1)
+    assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+    assert partition_name(date(2026, 10, 1)) == "task_execution_payloads_2026_10"
+    assert "FROM ('2026-12-01 00:00+00') TO ('2027-01-01 00:00+00')" in partition_ddl(date(2026, 12, 1))
+
+
+def test_only_partitions_that_ended_before_the_cutoff_expire():
+    names = ["task_execution_payloads_2026_10", "task_execution_payloads_2026_08", "task_execution_payloads_2026_09"]
+    cutoff = datetime(2026, 10, 1, tzinfo=timezone.utc)
+
+    assert expired_partitions(names, cutoff) == ["task_execution_payloads_2026_08", "task_execution_payloads_2026_09"]
+    later_names = names + ["task_execution_payloads_default"]
+    assert expired_partitions(later_names, datetime(2026, 9, 30, tzinfo=timezone.utc)) == [
+        "task_execution_payloads_2026_08"
+    ]
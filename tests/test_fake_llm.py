@@ -0,0 +1,68 @@
+import json
+
+import pytest
+from openai import InternalServerError
+
+from app.core.llm import StreamUsage, ToolCall
+from bench.fake_llm import FakeLLM, FakeLLMConfig
+from bench.loadgen import percentile
+
+SEARCH_TOOL = {
+    "type": "function",
+    "function": {"name": "web_search", "description": "", "parameters": {"type": "object"}},
+}
+
+
+@pytest.mark.asyncio
+async def test_stream_reports_usage(make_llm):
+    llm = make_llm(FakeLLMConfig(ttft_ms=0, tokens_per_second=0, reply_tokens=5))
+    items = [item async for item in llm.stream([{"role": "user", "content": "hi"}])]
+
+    text = "".join(i for i in items if isinstance(i, str))
+    assert len(text.split()) == 5
+    assert isinstance(items[-1], StreamUsage)
+    assert items[-1].usage["completion_tokens"] == 5
+    assert items[-1].ttft_ms is not None
+
+
+@pytest.mark.asyncio
+async def test_scripted_tool_call_then_answer(make_llm):
+    script = [{"match": "news", "tool_call": {"name": "web_search", "arguments": {"query": "{message}"}}}]
+    llm = make_llm(FakeLLMConfig(ttft_ms=0, tokens_per_second=0, script=script))
+    messages = [{"role": "user", "content": "latest news"}]
+
+    items = [item async for item in llm.stream(messages, tools=[SEARCH_TOOL])]
+    calls = [i for i in items if isinstance(i, ToolCall)]
+    assert [c.name for c in calls] == ["web_search"]
+    assert "latest news" in calls[0].arguments
+
+    messages.append({"role": "tool", "tool_call_id": calls[0].id, "content": "results"})
+    response = await llm.complete(messages, tools=[SEARCH_TOOL])
+    assert not response.has_tool_calls
+    assert response.content
+
+
+def test_scripted_tool_call_arguments_are_valid_json_with_stable_ids():
+    script = [{"match": "news", "tool_call": {"name": "web_search", "arguments": {"query": "{message}"}}}]
+    message = 'news about "C:\\temp"\nand more'
+    messages = [{"role": "user", "content": message}]
+
+    _, calls = FakeLLM(FakeLLMConfig(script=script)).respond(messages, [SEARCH_TOOL])
+    _, replayed = FakeLLM(FakeLLMConfig(script=script)).respond(messages, [SEARCH_TOOL])
+
+    assert json.loads(calls[0]["function"]["arguments"]) == {"query": message}
+    assert calls == replayed
+
+
+@pytest.mark.asyncio
+async def test_error_injection(make_llm):
+    llm = make_llm(FakeLLMConfig(ttft_ms=0, error_rate=1.0))
+    with pytest.raises(InternalServerError):
+        await llm.complete([{"role": "user", "content": "hi"}])
+
+
+def test_percentile():
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([], 50) is None
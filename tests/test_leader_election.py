@@ -0,0 +1,37 @@
+import asyncio
+
+from app.scheduler.leader import LeaderElection
+
+
+class FakeLeaderElection(LeaderElection):
+    """Lock outcomes scripted in memory instead of a Postgres advisory lock."""
+
+    def __init__(self, acquire: list[bool], heartbeats: list[bool]):
+        super().__init__(lock_key=1, interval=0.01, instance_id="test")
+        self.acquire = acquire
+        self.heartbeats = heartbeats
+
+    async def _try_acquire(self) -> bool:
+        return self.acquire.pop(0) if self.acquire else False
+
+    async def _heartbeat(self) -> bool:
+        return self.heartbeats.pop(0) if self.heartbeats else True
+
+
+async def test_follower_takes_over_and_leader_steps_down_on_failed_heartbeat():
+    events = []
+
+    async def on_elected():
+        events.append("elected")
+
+    async def on_demoted():
+        events.append("demoted")
+
+    election = FakeLeaderElection(acquire=[False, False, True, True], heartbeats=[True, False])
+    await election.start(on_elected, on_demoted, on_heartbeat=lambda: events.append("heartbeat"))
+    await asyncio.sleep(0.2)
+    await election.stop()
+
+    assert events[:3] == ["elected", "heartbeat", "demoted"]
+    assert [e for e in events[3:] if e != "heartbeat"] == ["elected", "demoted"]
+    assert not election.is_leader
@@ -0,0 +1,157 @@
+import asyncio
+import json
+import socket
+import subprocess
+import sys
+
+import pytest
+
+from app.config import settings
+from app.core.tools import ToolManager
+
+ECHO_SERVER = """
+import sys
+
+from mcp.server.fastmcp import FastMCP
+
+mcp = FastMCP("echo", port=int(sys.argv[2]) if len(sys.argv) > 2 else 8000)
+
+
+@mcp.tool()
+def echo(text: str) -> str:
+    return text
+
+
+mcp.run(transport=sys.argv[1] if len(sys.argv) > 1 else "stdio")
+"""
+
+
+@pytest.fixture
+def servers_config(tmp_path, monkeypatch):
+    script = tmp_path / "echo_server.py"
+    script.write_text(ECHO_SERVER)
+
+    def write(*servers):
+        path = tmp_path / "mcp_servers.json"
+        path.write_text(json.dumps({"servers": [
+            {"name": name, "command": sys.executable, "args": [str(script)], **extra}
+            for name, extra in servers
+        ]}))
+        monkeypatch.setattr(settings, "MCP_SERVERS_CONFIG", str(path))
+        monkeypatch.setattr(settings, "MCP_HEALTH_CHECK_INTERVAL", 0)
+
+    write.script = script
+    return write
+
+
+@pytest.mark.asyncio
+async def test_failed_server_does_not_block_others(servers_config):
+    servers_config(("echo", {}), ("broken", {"command": "false", "connect_timeout": 5}))
+    manager = ToolManager()
+    await manager.initialize()
+    try:
+        assert manager._servers["broken"].replicas[0].status == "failed"
+        assert await manager.execute_tool("echo", {"text": "hi"}) == "hi"
+    finally:
+        await manager.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_lazy_server_connects_on_first_use(servers_config):
+    servers_config(("echo", {"lazy": True}))
+    manager = ToolManager()
+    await manager.initialize()
+    try:
+        assert not manager.has_tools
+        await manager.ensure_connected()
+        assert [t["function"]["name"] for t in manager.get_tools_schema()] == ["echo"]
+    finally:
+        await manager.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_restart_reregisters_tools(servers_config):
+    servers_config(("echo", {}))
+    manager = ToolManager()
+    await manager.initialize()
+    try:
+        pool = manager._servers["echo"]
+        conn = pool.replicas[0]
+        await conn.stop()
+        assert not await conn.ping(timeout=1)
+        assert await manager.execute_tool("echo", {"text": "hi"}) == "Error: MCP server 'echo' is not available"
+
+        await manager._restart_server(pool, conn)
+        assert conn.restarts == 1
+        assert await conn.ping(timeout=5)
+        assert await manager.execute_tool("echo", {"text": "back"}) == "back"
+    finally:
+        await manager.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_replicas_share_load(servers_config):
+    servers_config(("echo", {"replicas": 2, "max_inflight": 1}))
+    manager = ToolManager()
+    await manager.initialize()
+    try:
+        results = await asyncio.gather(*(manager.execute_tool("echo", {"text": str(i)}) for i in range(6)))
+        assert results == [str(i) for i in range(6)]
+        stats = manager.stats()["echo"]["replicas"]
+        assert [r["calls"] for r in stats] == [3, 3]
+        assert all(r["pending"] == 0 for r in stats)
+    finally:
+        await manager.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_streamable_http_server(servers_config):
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    servers_config(("echo", {"url": f"http://127.0.0.1:{port}/mcp", "replicas": 2}))
+    server = subprocess.Popen(
+        [sys.executable, str(servers_config.script), "streamable-http", str(port)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        for _ in range(50):
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+                break
+            except OSError:
+                await asyncio.sleep(0.1)
+
+        manager = ToolManager()
+        await manager.initialize()
+        try:
+            results = await asyncio.gather(*(manager.execute_tool("echo", {"text": str(i)}) for i in range(4)))
+            assert results == ["0", "1", "2", "3"]
+            assert all(r["status"] == "ready" for r in manager.stats()["echo"]["replicas"])
+        finally:
+            await manager.shutdown()
+    finally:
+        server.terminate()
+        server.wait()
+
+
+@pytest.mark.asyncio
+async def test_reload_applies_config_changes(servers_config):
+    servers_config(("echo", {}))
+    manager = ToolManager()
+    await manager.initialize()
+    try:
+        first = manager.schema
+        assert first.names == {"echo"}
+        assert manager.get_tools_schema() is first.tools  # Served from the snapshot, not rebuilt
+
+        servers_config(("echo-2", {}))
+        changes = await manager.reload()
+        assert changes["added"] == ["echo-2"] and changes["removed"] == ["echo"]
+        assert list(manager._servers) == ["echo-2"]
+        assert manager.schema.names == {"echo"}
+        assert manager.schema.version > first.version
+
+        assert await manager.reload() == {"added": [], "removed": [], "changed": [], "version": manager.schema.version}
+    finally:
+        await manager.shutdown()
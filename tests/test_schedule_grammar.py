@@ -0,0 +1,89 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from app.scheduler import nl_parser
+from app.scheduler.engine import next_fire_time
+from app.scheduler.nl_parser import normalize_description, parse_task_description
+from app.scheduler.schedule_grammar import parse_schedule
+
+
+@pytest.mark.parametrize(
+    ("description", "cron", "prompt"),
+    [
+        ("每天早上9点搜索AI领域最新新闻并总结", "0 9 * * *", "搜索AI领域最新新闻并总结"),
+        ("每天早上九点半，帮我总结GitHub trending", "30 9 * * *", "帮我总结GitHub trending"),
+        ("每晚十点总结今天的新闻", "0 22 * * *", "总结今天的新闻"),
+        ("每周一、三、五下午3点半检查服务器状态", "30 15 * * mon,wed,fri", "检查服务器状态"),
+        ("每周一到周五晚上8点提醒我写日报", "0 20 * * mon-fri", "提醒我写日报"),
+        ("工作日早上9：30汇总邮件", "30 9 * * mon-fri", "汇总邮件"),
+        ("每周末上午10点推荐电影", "0 10 * * sat,sun", "推荐电影"),
+        ("每月1号10:00生成月报", "0 10 1 * *", "生成月报"),
+        ("每2小时检查一次网站是否可用", "0 */2 * * *", "检查一次网站是否可用"),
+        ("每15分钟看一下比特币价格", "*/15 * * * *", "看一下比特币价格"),
+        ("every Monday at 8:30 summarize the week's tech news", "30 8 * * mon", "summarize the week's tech news"),
+        ("Summarize tech news every Monday at 8:30", "30 8 * * mon", "Summarize tech news"),
+        ("Check the weather daily at 7:15 pm", "15 19 * * *", "Check the weather"),
+        ("weekdays at 6pm, send me a standup reminder", "0 18 * * mon-fri", "send me a standup reminder"),
+        ("every Tuesday and Thursday at noon summarize arxiv", "0 12 * * tue,thu", "summarize arxiv"),
+        ("every morning, send me the news", "0 9 * * *", "send me the news"),
+        ("On the 1st of every month at 10am, create a report", "0 10 1 * *", "create a report"),
+        ("every 3 hours check the site", "0 */3 * * *", "check the site"),
+        ("every evening at 7 send a digest", "0 19 * * *", "send a digest"),
+        ("every Friday at 17 send the status report", "0 17 * * fri", "send the status report"),
+        ("every night at 10 back up the notes", "0 22 * * *", "back up the notes"),
+        ("every day at 7:30 in the evening post a summary", "30 19 * * *", "post a summary"),
+        ("每天晚上12点提醒我睡觉", "0 0 * * *", "提醒我睡觉"),
+        ("每天中午12点点外卖提醒", "0 12 * * *", "点外卖提醒"),
+    ],
+)
+def test_common_schedules_parse_locally(description, cron, prompt):
+    assert parse_schedule(description) == (cron, prompt)
+
+
+@pytest.mark.parametrize(
+    "description",
+    [
+        "每天搜索新闻",  # No time of day
+        "每天早上9点和晚上6点查天气",  # Twice a day
+        "每周一早上9点",  # Nothing to do
+        "Remind me tomorrow at 9am to call mom",  # One-off
+        "every Monday at 9 and Friday at 5pm send a report",
+        "every day check top 5 news",  # "5" is not a time
+        "every 45 minutes check the queue",  # Doesn't divide the hour
+        "every day at 9 and 18 send news",
+        "every day at 9, then at 18 report",
+        "每天9点和18点发新闻",
+        "every day at 9am, in the evening send a recap",
+        "every Friday at 5 send the status report",  # 5am or 5pm?
+    ],
+)
+def test_other_descriptions_are_left_to_the_llm(description):
+    assert parse_schedule(description) is None
+
+
+def test_day_names_fire_on_the_named_days():
+    monday = datetime(2026, 10, 19, tzinfo=timezone.utc)
+    cron, _ = parse_schedule("每周日晚上8点整理本周笔记")
+    assert next_fire_time(cron, "UTC", after=monday).strftime("%a %H:%M") == "Sun 20:00"
+
+
+async def test_simple_descriptions_skip_the_llm_and_are_cached(monkeypatch):
+    async def no_llm(*args, **kwargs):
+        raise AssertionError("LLM called")
+
+    monkeypatch.setattr(nl_parser.llm_client, "complete", no_llm)
+    monkeypatch.setattr(nl_parser, "_parse_cache", nl_parser.OrderedDict())
+
+    tools = ["web_search", "fetch"]
+    parsed = await parse_task_description("每天早上9点搜索AI领域最新新闻并总结", available_tools=tools)
+    assert parsed["cron_expression"] == "0 9 * * *"
+    assert parsed["prompt"] == "搜索AI领域最新新闻并总结"
+    assert parsed["tools"] == ["web_search"]
+
+    parsed["tools"].append("fetch")
+    again = await parse_task_description(" 每天早上９点搜索ＡＩ领域最新新闻并总结", available_tools=tools[::-1])
+    assert again["tools"] == ["web_search"]
+    assert list(nl_parser._parse_cache) == [
+        (normalize_description("每天早上9点搜索ai领域最新新闻并总结"), ("fetch", "web_search"))
+    ]
@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from app.config import settings
+from app.scheduler.engine import SchedulerEngine, jitter_offset, next_fire_time, plan_next_runs
+
+
+def test_next_fire_time_is_strictly_after_and_in_the_task_timezone():
+    # 09:00 Asia/Shanghai is 01:00 UTC
+    fired = datetime(2026, 10, 19, 1, 0, tzinfo=timezone.utc)
+
+    assert next_fire_time("0 9 * * *", "Asia/Shanghai", after=fired) == datetime(
+        2026, 10, 20, 1, 0, tzinfo=timezone.utc
+    )
+    assert next_fire_time("*/15 * * * *", "UTC", after=fired) == datetime(2026, 10, 19, 1, 15, tzinfo=timezone.utc)
+
+
+def test_next_fire_time_rejects_invalid_cron():
+    with pytest.raises(ValueError):
+        next_fire_time("61 * * * *", "UTC")
+
+
+def test_plan_next_runs_shares_schedules_and_flags_invalid_ones():
+    now = datetime(2026, 10, 19, 0, 30, tzinfo=timezone.utc)
+    rows = [(i, "0 9 * * *", "Asia/Shanghai") for i in range(1000)] + [("bad", "0 25 * * *", "UTC")]
+
+    updates, invalid = plan_next_runs(rows, after=now)
+
+    assert len(updates) == 1001
+    assert {u["next_run_at"] for u in updates[:1000]} == {datetime(2026, 10, 19, 1, 0, tzinfo=timezone.utc)}
+    assert updates[-1] == {"id": "bad", "next_run_at": None}
+    assert invalid == ["bad"]
+
+
+def test_jitter_offset_is_stable_and_within_the_window():
+    offsets = [jitter_offset(f"task-{i}@2026-10-19T01:00", 600) for i in range(200)]
+
+    assert all(0 <= o < 600 for o in offsets)
+    assert max(offsets) - min(offsets) > 300
+    assert jitter_offset("task-1@2026-10-19T01:00", 600) == offsets[1]
+    assert jitter_offset("task-1@2026-10-19T01:00", 0) == 0
+
+
+def test_late_runs_are_released_at_the_catchup_rate(monkeypatch):
+    monkeypatch.setattr(settings, "SCHEDULER_CATCHUP_RATE", 2.0)
+    engine = SchedulerEngine()
+    task = SimpleNamespace(task_config={})
+    now = datetime(2026, 10, 19, 1, 30, tzinfo=timezone.utc)
+    missed = now - timedelta(minutes=30)
+
+    slots = [engine._run_at(task, f"t{i}", missed, now) for i in range(3)]
+    assert slots == [now, now + timedelta(seconds=0.5), now + timedelta(seconds=1)]
+
+    # On-time runs are not held back by the catch-up backlog
+    assert engine._run_at(task, "on-time", now, now) == now
@@ -0,0 +1,67 @@
+import json
+import uuid
+
+from app.scheduler import task_events
+from app.scheduler.task_events import TaskEventPublisher
+
+
+class RecordingPublisher(TaskEventPublisher):
+    def __init__(self):
+        super().__init__(uuid.uuid4())
+        self.sent = []
+
+    async def _notify(self, event: str, data: dict):
+        self.sent.append((event, data))
+
+
+async def test_deltas_are_batched_and_flushed_before_other_events(monkeypatch):
+    monkeypatch.setattr(task_events, "DELTA_FLUSH_INTERVAL", 3600)
+    publisher = RecordingPublisher()
+
+    for word in ["The ", "answer ", "is "]:
+        await publisher.delta(word)
+    assert publisher.sent == []
+
+    await publisher.emit("tool_call", {"tool": "web_search", "arguments": {"query": "x"}})
+    await publisher.delta("42")
+    await publisher.close()
+
+    assert publisher.sent == [
+        ("message", {"content": "The answer is "}),
+        ("tool_call", {"tool": "web_search", "arguments": {"query": "x"}}),
+        ("message", {"content": "42"}),
+    ]
+
+
+async def test_long_deltas_are_split_to_fit_notify_payloads(monkeypatch):
+    monkeypatch.setattr(task_events, "DELTA_FLUSH_INTERVAL", 3600)
+    publisher = RecordingPublisher()
+
+    await publisher.delta("x" * (task_events.MAX_DELTA_CHARS * 2 + 10))
+    await publisher.close()
+
+    assert [len(data["content"]) for _, data in publisher.sent] == [task_events.MAX_DELTA_CHARS] * 2 + [10]
+
+
+def test_payloads_are_clipped_by_encoded_size():
+    message = {
+        "execution_id": str(uuid.uuid4()),
+        "event": "done",
+        "data": {"status": "failed", "result": "结果" * 3000, "error": "错误" * 3000, "token_usage": 1200},
+    }
+
+    clipped = task_events._clip(message)
+
+    assert len(json.dumps(clipped, ensure_ascii=False).encode()) <= task_events.MAX_PAYLOAD_BYTES
+    assert clipped["data"]["status"] == "failed"
+    assert clipped["data"]["token_usage"] == 1200
+    assert clipped["data"]["result"].endswith("…") and clipped["data"]["error"].endswith("…")
+
+
+def test_large_tool_arguments_are_sent_as_truncated_json():
+    message = {"execution_id": "x", "event": "tool_call", "data": {"tool": "t", "arguments": {"q": "\n" * 9000}}}
+
+    clipped = task_events._clip(message)
+
+    assert len(json.dumps(clipped, ensure_ascii=False).encode()) <= task_events.MAX_PAYLOAD_BYTES
+    assert clipped["data"]["arguments"].startswith('{"q": "\\n')
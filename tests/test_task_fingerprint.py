@@ -0,0 +1,79 @@
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy.dialects import postgresql
+
+from app.core.llm import LLMResponse, ToolCall
+from app.models.task_execution import TaskExecution
+from app.scheduler import task_runner
+from app.scheduler.shared_work import shared_query, work_key
+from app.scheduler.task_runner import fingerprint_tool_results
+
+RESULTS = "Search results for: ai news\n\n1. Model A released\n   https://a.example\n\n2. Chip B ships\n"
+
+
+def test_fingerprint_ignores_layout_but_not_content():
+    base = fingerprint_tool_results([("web_search", RESULTS)])
+
+    relaid = "Search results for:  ai news\n2. Chip B ships\n\n\n1. Model A released\n https://a.example  \n"
+    assert fingerprint_tool_results([("web_search", relaid)]) == base
+
+    assert fingerprint_tool_results([("web_search", RESULTS.replace("Chip B", "Chip C"))]) != base
+    assert fingerprint_tool_results([("fetch_page", RESULTS)]) != base
+
+
+def test_work_key_matches_identical_work_only():
+    tools = [{"function": {"name": "web_search"}}, {"function": {"name": "fetch_page"}}]
+    messages = [{"role": "system", "content": "You are..."}, {"role": "user", "content": "AI news"}]
+    base = work_key("claude-sonnet", tools, messages)
+
+    assert work_key("claude-sonnet", list(reversed(tools)), [dict(m) for m in messages]) == base
+    assert work_key("claude-haiku", tools, messages) != base
+    assert work_key("claude-sonnet", tools[:1], messages) != base
+    with_memory = [{"role": "system", "content": "You are...\n\nRelevant context from memory:\n- x"}, messages[1]]
+    assert work_key("claude-sonnet", tools, with_memory) != base
+
+
+def test_a_task_firing_twice_in_the_share_window_does_not_reuse_its_own_run():
+    task_id = uuid.uuid4()
+    second_fire = TaskExecution(id=uuid.uuid4(), task_id=task_id, work_key="k")
+
+    compiled = shared_query(second_fire, datetime(2026, 10, 19, tzinfo=timezone.utc)).compile(
+        dialect=postgresql.dialect()
+    )
+
+    # The first fire's execution has the same task_id and work key, so it never matches
+    assert "task_executions.task_id != %(task_id_1)s" in str(compiled)
+    assert compiled.params["task_id_1"] == task_id
+    assert compiled.params["work_key_1"] == "k"
+
+
+async def test_unchanged_run_stores_a_transcript_with_its_tool_results(monkeypatch):
+    previous = TaskExecution(status="success", result="Same as before")
+    calls = []
+
+    async def complete(messages, model, tools=None):
+        calls.append(model)
+        return LLMResponse(tool_calls=[ToolCall("call_1", "web_search", '{"query": "ai news"}')])
+
+    async def execute_tool(name, arguments):
+        return RESULTS
+
+    async def previous_run(db, execution):
+        return previous
+
+    monkeypatch.setattr(task_runner.llm_client, "complete", complete)
+    monkeypatch.setattr(task_runner.tool_manager, "execute_tool", execute_tool)
+    monkeypatch.setattr(task_runner, "_previous_run_with_fingerprint", previous_run)
+    monkeypatch.setattr(task_runner, "_record_llm_call", lambda *args: None)
+    messages = [{"role": "system", "content": "You are..."}, {"role": "user", "content": "AI news"}]
+
+    _, log, _, unchanged_since = await task_runner._run_tool_loop(
+        None, None, TaskExecution(), messages, "claude-sonnet", [], skip_if_unchanged=True
+    )
+
+    assert unchanged_since is previous
+    assert calls == ["claude-sonnet"]
+    assert [m["role"] for m in messages] == ["system", "user", "assistant", "tool"]
+    assert messages[-1] == {"role": "tool", "tool_call_id": "call_1", "content": RESULTS}
+    assert log == [{"tool": "web_search", "arguments": {"query": "ai news"}, "result": RESULTS}]
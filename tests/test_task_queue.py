@@ -0,0 +1,87 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.dialects import postgresql
+
+from app.config import settings
+from app.scheduler import queue, task_runner
+from app.scheduler.queue import ClaimedRun, TaskWorker, claim_statement, retry_delay, scheduled_run_key
+
+
+def test_claim_skips_locked_rows_and_reclaims_expired_leases():
+    sql = str(claim_statement("host:1/0", 300).compile(dialect=postgresql.dialect()))
+
+    assert "FOR UPDATE SKIP LOCKED" in sql
+    assert "task_queue.lease_expires_at < now()" in sql
+    assert "RETURNING" in sql
+    assert "task_queue.dedupe_key IS NULL" in sql
+    assert "count(*)" not in sql
+
+    capped = str(claim_statement("host:1/0", 300, max_running=4).compile(dialect=postgresql.dialect()))
+    assert "count(*)" in capped
+
+
+def test_scheduled_run_key_is_shared_within_a_minute():
+    fired = datetime(2026, 10, 19, 9, 0, 0, 120000, tzinfo=timezone.utc)
+    late = fired + timedelta(seconds=40)
+
+    assert scheduled_run_key("t", fired) == scheduled_run_key("t", late.astimezone(timezone(timedelta(hours=8))))
+    assert scheduled_run_key("t", fired) != scheduled_run_key("t", fired + timedelta(minutes=1))
+
+
+def test_retry_delay_backs_off_up_to_the_cap(monkeypatch):
+    monkeypatch.setattr(settings, "TASK_QUEUE_RETRY_BASE", 60.0)
+    monkeypatch.setattr(settings, "TASK_QUEUE_RETRY_MAX", 200.0)
+
+    assert [retry_delay(n) for n in (1, 2, 3, 4)] == [60.0, 120.0, 200.0, 200.0]
+
+
+async def test_scheduled_run_creates_its_execution_once_and_retries_fill_it_in(monkeypatch):
+    execution_id = uuid.uuid4()
+    attached, calls, updates = [], [], []
+
+    async def attach_execution(run, worker_id):
+        attached.append(run.id)
+        return execution_id
+
+    async def run_task(task_id, queue_wait_ms=None, execution_id=None, manual=False, final_attempt=True):
+        calls.append((execution_id, final_attempt))
+        return "failed"
+
+    async def update_claimed(run, worker_id, **values):
+        updates.append(values)
+        return True
+
+    monkeypatch.setattr(queue, "_attach_execution", attach_execution)
+    monkeypatch.setattr(queue, "_update_claimed", update_claimed)
+    monkeypatch.setattr(task_runner, "run_task", run_task)
+    worker = TaskWorker(1, "host:1")
+
+    first = ClaimedRun(uuid.uuid4(), uuid.uuid4(), 1, 2, 0.0, None, False)
+    await worker._process(first, "host:1/0")
+    # The retry is claimed with the execution the first attempt recorded
+    await worker._process(first._replace(attempts=2, execution_id=execution_id), "host:1/0")
+
+    assert attached == [first.id]
+    assert calls == [(execution_id, False), (execution_id, True)]
+    assert [u["status"] for u in updates] == ["queued", "failed"]
+
+
+async def test_run_abandoned_after_its_last_attempt_fails_its_execution(monkeypatch):
+    failed, updates = [], []
+
+    async def fail_execution(execution_id, error):
+        failed.append((execution_id, error))
+
+    async def update_claimed(run, worker_id, **values):
+        updates.append(values)
+        return True
+
+    monkeypatch.setattr(queue, "_fail_execution", fail_execution)
+    monkeypatch.setattr(queue, "_update_claimed", update_claimed)
+
+    run = ClaimedRun(uuid.uuid4(), uuid.uuid4(), 4, 3, 0.0, uuid.uuid4(), False)
+    await TaskWorker(1, "host:1")._process(run, "host:1/0")
+
+    assert updates == [{"status": "failed", "last_error": "Lease expired on the last attempt"}]
+    assert failed == [(run.execution_id, "Lease expired on the last attempt")]
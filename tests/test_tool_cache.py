@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+from app.core.tool_cache import ToolResultCache, make_key
+
+
+def test_key_ignores_argument_order():
+    assert make_key("web_search", {"q": "a", "n": 1}) == make_key("web_search", {"n": 1, "q": "a"})
+    assert make_key("web_search", {"q": "a"}) != make_key("other", {"q": "a"})
+
+
+@pytest.mark.asyncio
+async def test_hit_and_expiry():
+    cache = ToolResultCache(max_entries=10, max_bytes=1024)
+    calls = []
+
+    async def call():
+        calls.append(1)
+        return f"result {len(calls)}"
+
+    assert await cache.get_or_call("t", {"q": 1}, 60, call) == "result 1"
+    assert await cache.get_or_call("t", {"q": 1}, 60, call) == "result 1"
+    assert await cache.get_or_call("t", {"q": 2}, -1, call) == "result 2"  # already expired
+    assert await cache.get_or_call("t", {"q": 2}, 60, call) == "result 3"
+    assert cache.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_bounded_by_entries_and_bytes():
+    cache = ToolResultCache(max_entries=2, max_bytes=10)
+
+    async def call():
+        return "12345"
+
+    for i in range(3):
+        await cache.get_or_call("t", {"i": i}, 60, call)
+    assert cache.stats()["entries"] == 2
+    assert cache.stats()["bytes"] == 10
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_coalesced_and_errors_not_cached():
+    cache = ToolResultCache(max_entries=10, max_bytes=1024)
+    calls = []
+
+    async def slow():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "ok"
+
+    results = await asyncio.gather(*(cache.get_or_call("t", {}, 60, slow) for _ in range(5)))
+    assert results == ["ok"] * 5
+    assert len(calls) == 1
+
+    async def failing():
+        raise RuntimeError("boom")
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            await cache.get_or_call("t", {"x": 1}, 60, failing)
+    assert cache.stats()["entries"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_leader_does_not_strand_followers():
+    cache = ToolResultCache(max_entries=10, max_bytes=1024)
+    release = asyncio.Event()
+
+    async def slow():
+        await release.wait()
+        return "ok"
+
+    leader = asyncio.create_task(cache.get_or_call("t", {}, 60, slow))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(cache.get_or_call("t", {}, 60, slow))
+    await asyncio.sleep(0)
+
+    leader.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+    release.set()
+
+    assert await asyncio.wait_for(follower, 1) == "ok"
+    assert await cache.get_or_call("t", {}, 60, slow) == "ok"
+    assert cache.stats()["misses"] == 1
@@ -0,0 +1,110 @@
+import asyncio
+import json
+
+import pytest
+
+from app.core.tool_guard import ToolGuard, ToolUnavailable
+
+
+async def fail():
+    raise RuntimeError("search backend down")
+
+
+async def ok():
+    return "ok"
+
+
+@pytest.mark.asyncio
+async def test_timeout_returns_structured_error():
+    guard = ToolGuard()
+
+    async def hang():
+        await asyncio.sleep(10)
+
+    with pytest.raises(ToolUnavailable) as exc:
+        await guard.run("web_search", {"timeout": 0.05}, hang)
+    assert json.loads(str(exc.value))["error"]["type"] == "timeout"
+
+
+@pytest.mark.asyncio
+async def test_breaker_opens_then_recovers():
+    guard = ToolGuard()
+    options = {"breaker_threshold": 2, "breaker_reset": 0.05}
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            await guard.run("web_search", options, fail)
+
+    with pytest.raises(ToolUnavailable) as exc:
+        await guard.run("web_search", options, ok)
+    assert exc.value.reason == "circuit_open"
+    assert guard.status()["web_search"]["state"] == "open"
+
+    await asyncio.sleep(0.06)
+    assert await guard.run("web_search", options, ok) == "ok"
+    assert guard.status()["web_search"] == {"state": "closed", "failures": 0, "retry_after_s": None}
+
+
+@pytest.mark.asyncio
+async def test_bulkhead_caps_concurrency():
+    guard = ToolGuard()
+    options = {"max_concurrency": 1, "timeout": 0.05}
+    release = asyncio.Event()
+
+    async def slow():
+        await release.wait()
+        return "done"
+
+    first = asyncio.create_task(guard.run("web_search", options | {"timeout": 1}, slow))
+    await asyncio.sleep(0)
+    with pytest.raises(ToolUnavailable) as exc:
+        await guard.run("web_search", options, ok)
+    assert exc.value.reason == "overloaded"
+    release.set()
+    assert await first == "done"
+    assert guard.status()["web_search"]["failures"] == 0
+
+
+
+@pytest.mark.asyncio
+async def test_error_results_reported_by_the_tool_do_not_open_the_breaker():
+    guard = ToolGuard()
+    options = {"breaker_threshold": 1}
+
+    async def no_results():
+        raise LookupError("no results")
+
+    with pytest.raises(LookupError):
+        await guard.run("web_search", options, no_results, tool_errors=(LookupError,))
+    assert guard.status()["web_search"]["state"] == "closed"
+
+    with pytest.raises(RuntimeError):
+        await guard.run("web_search", options, fail, tool_errors=(LookupError,))
+    assert guard.status()["web_search"]["state"] == "open"
+
+
+@pytest.mark.asyncio
+async def test_reloaded_options_apply_to_existing_breaker_and_bulkhead():
+    guard = ToolGuard()
+    release = asyncio.Event()
+    started = []
+
+    async def slow():
+        started.append(1)
+        await release.wait()
+        return "done"
+
+    first = asyncio.create_task(guard.run("web_search", {"max_concurrency": 1}, slow))
+    await asyncio.sleep(0)
+    # Raising the limit lets a second call in while the first still holds its slot
+    second = asyncio.create_task(guard.run("web_search", {"max_concurrency": 2}, slow))
+    await asyncio.sleep(0)
+    assert len(started) == 2
+    release.set()
+    assert await asyncio.gather(first, second) == ["done", "done"]
+
+    with pytest.raises(RuntimeError):
+        await guard.run("web_search", {"breaker_threshold": 5}, fail)
+    assert guard.status()["web_search"]["state"] == "closed"
+    with pytest.raises(RuntimeError):
+        await guard.run("web_search", {"breaker_threshold": 2}, fail)
+    assert guard.status()["web_search"]["state"] == "open"
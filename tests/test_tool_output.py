@@ -0,0 +1,56 @@
+import pytest
+
+from app.config import settings
+from app.core import tool_output
+from app.core.tokens import estimate_tokens
+from app.core.tool_output import compact_tool_result, digest_tool_results, truncate_middle
+from bench.fake_llm import FakeLLMConfig
+
+
+def test_truncate_middle_keeps_both_ends():
+    text = "START " + "x" * 40_000 + " END"
+    result = truncate_middle(text, 1000)
+    assert result.startswith("START") and result.endswith("END")
+    assert "tokens omitted" in result
+    assert estimate_tokens(result) < 1100
+
+
+@pytest.mark.asyncio
+async def test_compact_applies_per_tool_caps():
+    text = "a" * 100_000
+    compacted, summary = await compact_tool_result("web_search", text, {"max_result_tokens": 500})
+    assert summary is None
+    assert estimate_tokens(compacted) < 550
+
+    unchanged, _ = await compact_tool_result("web_search", "short", {})
+    assert unchanged == "short"
+
+    capped, _ = await compact_tool_result("web_search", "é" * 1000, {"max_result_bytes": 101})
+    assert capped.startswith("é" * 50) and "bytes omitted" in capped
+
+
+@pytest.mark.asyncio
+async def test_oversized_result_is_summarized(make_llm, monkeypatch):
+    script = [{"match": "word", "reply": "condensed facts"}]
+    llm = make_llm(FakeLLMConfig(ttft_ms=0, tokens_per_second=0, script=script))
+    monkeypatch.setattr(tool_output, "llm_client", llm)
+    compacted, summary = await compact_tool_result("web_search", "word " * 10_000, {"summarize": True})
+    assert compacted == "condensed facts"
+    assert summary.usage["total_tokens"] > 0
+
+
+def test_digest_is_idempotent(monkeypatch):
+    monkeypatch.setattr(settings, "TOOL_RESULT_DIGEST_TOKENS", 100)
+    messages = [
+        {"role": "user", "content": "y" * 4000},
+        {"role": "tool", "tool_call_id": "1", "content": "x" * 4000},
+        {"role": "tool", "tool_call_id": "2", "content": "short"},
+    ]
+    digest_tool_results(messages)
+    digested = messages[1]["content"]
+    assert digested.startswith("x" * 300) and "~1000 tokens" in digested
+    assert messages[0]["content"] == "y" * 4000
+    assert messages[2]["content"] == "short"
+
+    digest_tool_results(messages)
+    assert messages[1]["content"] == digested
@@ -0,0 +1,65 @@
+import math
+
+import pytest
+
+from app.core.tool_selector import ToolSelector
+
+
+def _tool(name: str, description: str) -> dict:
+    return {"type": "function", "function": {"name": name, "description": description, "parameters": {}}}
+
+
+def bag_of_words(texts: list[str]) -> list[list[float]]:
+    """Deterministic stand-in for the sentence-transformers embedder."""
+    vectors = []
+    for text in texts:
+        vector = [0.0] * 64
+        for word in text.lower().replace(":", " ").replace("_", " ").split():
+            vector[sum(map(ord, word)) % 64] += 1
+        norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+        vectors.append([x / norm for x in vector])
+    return vectors
+
+
+TOOLS = [
+    _tool("web_search", "Search the web for current news"),
+    _tool("get_weather", "Get the weather forecast for a city"),
+    _tool("read_file", "Read a file from disk"),
+    _tool("send_email", "Send an email message"),
+]
+PINNED = [_tool("manage_tasks", "Manage scheduled tasks")]
+
+
+@pytest.mark.asyncio
+async def test_selects_top_k_plus_pinned():
+    selector = ToolSelector(top_k=1, embed=bag_of_words)
+    selected = await selector.select("what is the weather in Beijing", TOOLS, PINNED)
+    assert [t["function"]["name"] for t in selected] == ["get_weather", "manage_tasks"]
+
+
+@pytest.mark.asyncio
+async def test_small_catalogs_are_sent_whole():
+    calls = []
+
+    def embed(texts):
+        calls.append(texts)
+        return bag_of_words(texts)
+
+    selector = ToolSelector(top_k=8, embed=embed)
+    assert await selector.select("anything", TOOLS, PINNED) == TOOLS + PINNED
+    assert calls == []
+
+
+@pytest.mark.asyncio
+async def test_descriptions_are_embedded_once():
+    calls = []
+
+    def embed(texts):
+        calls.append(len(texts))
+        return bag_of_words(texts)
+
+    selector = ToolSelector(top_k=2, embed=embed)
+    await selector.index(TOOLS)
+    await selector.select("search news", TOOLS)
+    await selector.select("send an email", TOOLS)
+    assert calls == [4, 1, 1]
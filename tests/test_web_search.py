@@ -0,0 +1,76 @@
+from pathlib import Path
+
+import httpx
+import pytest
+
+from mcp_servers import web_search
+from mcp_servers.web_search import extract_main_text, fetch_page, parse_ddg_html
+
+FIXTURES = Path(__file__).parent.parent / "bench" / "fixtures"
+
+
+def test_parse_ddg_results():
+    results = parse_ddg_html((FIXTURES / "ddg_results.html").read_text())
+    assert len(results) == 10
+    assert results[0] == {
+        "title": "Python Release Python 3.13.0 | Python.org",
+        "snippet": (
+            "Python 3.13.0 is the newest major release of the Python programming language, "
+            "and it contains many new features and optimizations compared to Python 3.12."
+        ),
+        "url": "https://www.python.org/downloads/release/python-3130/",
+    }
+    # Entities decoded, snippets kept past inline <b> tags
+    assert results[5]["title"] == 'Python 3.13 release: free-threading & JIT "experimental"'
+    assert results[5]["snippet"].endswith("Here's what changed and how to try it.")
+    assert parse_ddg_html((FIXTURES / "ddg_no_results.html").read_text()) == []
+
+
+def test_extract_main_text_drops_page_chrome():
+    title, text = extract_main_text((FIXTURES / "article.html").read_text())
+    assert title == "Understanding Connection Pooling in Async HTTP Clients"
+    assert "A connection pool keeps idle connections open" in text
+    assert "3.3× improvement <without> any change" in text
+    for noise in ("Popular posts", "Subscribe", "Privacy", "dataLayer", "font-family"):
+        assert noise not in text
+
+
+@pytest.mark.parametrize(
+    "url",
+    ["http://127.0.0.1/", "http://169.254.169.254/latest/meta-data/", "http://10.0.0.8:8080/", "http://[::1]/"],
+)
+async def test_fetch_page_refuses_non_public_addresses(url):
+    assert (await fetch_page(url)).startswith("Refused to fetch non-public address")
+
+
+async def test_fetch_page_rechecks_redirect_targets(monkeypatch):
+    requested = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requested.append(str(request.url))
+        return httpx.Response(302, headers={"location": "http://169.254.169.254/latest/meta-data/"})
+
+    async def resolve(host):
+        return ["93.184.215.14"]
+
+    monkeypatch.setattr(web_search, "_resolve", resolve)
+    monkeypatch.setattr(web_search, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+
+    result = await fetch_page("http://redirects.example/")
+    assert result.startswith("Refused to fetch non-public address 169.254.169.254")
+    assert requested == ["http://redirects.example/"]
+
+
+@pytest.mark.parametrize("max_chars", [0, -5])
+async def test_fetch_page_clamps_non_positive_max_chars(monkeypatch, max_chars):
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, headers={"content-type": "text/plain"}, text="abcdef")
+
+    async def resolve(host):
+        return ["93.184.215.14"]
+
+    monkeypatch.setattr(web_search, "_resolve", resolve)
+    monkeypatch.setattr(web_search, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+
+    result = await fetch_page(f"http://plain{-max_chars}.example/", max_chars=max_chars)
+    assert result == "a\n\n[Truncated: 5 more characters]"
@@ -163,5 +163,6 @@ export async function toggleTask(id: string, is_active: boolean): Promise<Schedu
 export async function listTaskExecutions(taskId: string): Promise<TaskExecution[]> {
   const res = await fetch(`${API_BASE}/tasks/${taskId}/executions`)
   if (!res.ok) throw new Error(`Failed to list executions: ${res.status}`)
-  return res.json()
+  const page: { items: TaskExecution[]; next_cursor: string | null } = await res.json()
+  return page.items
 }
@@ -19,6 +19,7 @@ function ExecStatusBadge({ status }: { status: string }) {
     success: 'bg-green-100 text-green-800 dark:bg-green-900/30 dark:text-green-400',
     failed: 'bg-red-100 text-red-800 dark:bg-red-900/30 dark:text-red-400',
     running: 'bg-blue-100 text-blue-800 dark:bg-blue-900/30 dark:text-blue-400',
+    unchanged: 'bg-gray-100 text-gray-600 dark:bg-gray-700 dark:text-gray-400',
   }
   return (
     <span className={`inline-flex items-center px-2 py-0.5 rounded text-xs font-medium ${styles[status] || styles.failed}`}>
@@ -48,6 +49,12 @@ function ExecutionRow({ exec }: { exec: TaskExecution }) {
         {exec.token_usage != null && (
           <span className="text-xs text-gray-400 dark:text-gray-500">{exec.token_usage} tokens</span>
         )}
+        {exec.shared_from_id && (
+          <span className="text-xs text-gray-400 dark:text-gray-500">shared</span>
+        )}
+        {exec.queue_wait_ms != null && exec.queue_wait_ms >= 1000 && (
+          <span className="text-xs text-gray-400 dark:text-gray-500">queued {Math.round(exec.queue_wait_ms / 1000)}s</span>
+        )}
         <span className="ml-auto text-xs text-gray-400">{expanded ? '▲' : '▼'}</span>
       </div>
       {expanded && content && (
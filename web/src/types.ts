@@ -65,5 +65,7 @@ export interface TaskExecution {
   result: string | null
   error: string | null
   token_usage: number | null
+  queue_wait_ms: number | null
+  shared_from_id: string | null
   created_at: string
 }